@@ -5,13 +5,90 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent
 
 # Data directory
-DATA_DIR = BASE_DIR / 'data'
-DATA_DIR.mkdir(exist_ok=True)
+DATA_DIR = BASE_DIR / 'data'  # created by scripts/setup_database.py, not at import
 
 # Database settings
 DB_NAME = 'company.db'
 DB_PATH = BASE_DIR / DB_NAME
 
+# Fan-out: answer across many company databases (one file per subsidiary).
+# A directory (its *.db files), a glob or a path; unset = DB_PATH only.
+DB_PATHS = os.environ.get('DB_PATHS')
+FANOUT_WORKERS = int(os.environ.get('FANOUT_WORKERS', 16))  # databases queried at once
+
+# Schema/department snapshot cached next to the database for fast cold starts
+SCHEMA_SNAPSHOT_SUFFIX = '-meta.json'
+
+# Connection pool settings
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_POOL_TIMEOUT = 30.0           # seconds to wait for a free connection
+DB_HEALTH_CHECK_INTERVAL = 60.0  # seconds a connection may sit idle unchecked
+DB_STATEMENT_CACHE_SIZE = 256    # prepared statements kept per connection (> catalog size)
+
+# Snapshot serving: answer reads from an in-memory copy of the database
+SERVE_FROM_SNAPSHOT = os.environ.get('SERVE_FROM_SNAPSHOT', '0') == '1'
+REPLICA_CHECK_INTERVAL = 1.0     # seconds between checks for a newer database file
+
+# PRAGMAs applied once to every pooled connection
+DB_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,        # negative value is in KiB (~64 MB)
+    'mmap_size': 268435456,      # 256 MB
+    'temp_store': 'MEMORY',
+}
+
+# Query result cache settings
+RESULT_CACHE_SIZE = 256          # max cached responses (0 disables the cache)
+RESULT_CACHE_TTL = 300.0         # seconds before a cached response expires
+
+# Conversation context (follow-up questions and paging) per session
+SESSION_MAX_SESSIONS = 10000     # sessions kept; least recently used are evicted
+SESSION_MAX_BYTES = 64 * 1024 * 1024  # memory budget for all sessions' result id lists
+SESSION_TTL = 1800.0             # seconds of inactivity before a session expires
+
+# Large result handling
+STREAM_CHUNK_SIZE = 1000         # rows fetched per fetchmany() when streaming
+FORMAT_CACHE_SIZE = 65536        # memoized date/currency strings (values repeat across rows)
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 0))  # rows per listing page; 0 = no paging
+
+# Employee name search (FTS5)
+SEARCH_LIMIT = 20                # matches returned per lookup
+SEARCH_CANDIDATES = 1000         # best-ranked matches joined per lookup before the final order
+
+# Hire-date questions
+DATE_PARSE_CACHE_SIZE = 4096     # memoized date expressions ("2022", "q3 2021", "2021-06-30")
+HISTOGRAM_WIDTH = 40             # characters in the longest bar of a hires-per-period chart
+
+# Analytics engine for salary/hire-date filters and salary statistics:
+# 'sqlite' (default) or 'columnar' (in-memory NumPy arrays, requires numpy)
+ANALYTICS_ENGINE = os.environ.get('ANALYTICS_ENGINE', 'sqlite')
+
+# Instrumentation settings
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') == '1'
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+SLOW_QUERY_LOG_SIZE = 100        # most recent slow queries kept in memory
+
+# Chat server settings
+SERVER_HOST = os.environ.get('SERVER_HOST', '127.0.0.1')
+SERVER_PORT = int(os.environ.get('SERVER_PORT', 8080))
+SERVER_WORKERS = DB_POOL_SIZE    # query threads; one pooled connection each
+SERVER_MAX_PENDING = 100         # in-flight queries before returning 503
+SERVER_REQUEST_TIMEOUT = 5.0     # seconds per query before returning 504
+SERVER_IDLE_TIMEOUT = 30.0       # seconds an idle keep-alive connection is kept
+SERVER_SHUTDOWN_GRACE = 10.0     # seconds to drain in-flight queries on shutdown
+
+# Bulk CSV ingestion settings
+BULK_BATCH_SIZE = 10000
+BULK_LOAD_PRAGMAS = {            # applied for the duration of a bulk load
+    'synchronous': 'OFF',
+    'cache_size': -262144,       # ~256 MB
+    'temp_store': 'MEMORY',
+}
+INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', os.cpu_count() or 1))  # parser processes
+INGEST_QUEUE_SIZE = 16           # parsed batches buffered ahead of the SQLite writer
+INGEST_MAX_ERRORS = 100          # bad rows reported per file (all are counted)
+
 # CSV file paths
 EMPLOYEES_CSV = DATA_DIR / 'employees.csv'
 DEPARTMENTS_CSV = DATA_DIR / 'departments.csv'
\ No newline at end of file
@@ -1,20 +1,78 @@
+import argparse
+from config import DB_PATHS
 from src.chatbot.query_handler import QueryHandler
+from src.instrumentation.metrics import METRICS
+
+# The REPL is one conversation; follow-up questions need a session id.
+REPL_SESSION = 'repl'
+
+def handle_stats_command(handler, command):
+    """REPL commands for the pipeline instrumentation."""
+    if command == 'stats on':
+        METRICS.enabled = True
+        return "Instrumentation enabled."
+    elif command == 'stats off':
+        METRICS.enabled = False
+        return "Instrumentation disabled."
+    elif command == 'stats reset':
+        METRICS.reset()
+        return "Instrumentation counters reset."
+    if not hasattr(handler, 'db'):
+        # FanOutQueryHandler: per-database timings are in the report as shard:<name>.
+        cache = handler.cache_stats()
+        return (METRICS.format_report() +
+                f"\nResult cache: {cache['hits']} hits, {cache['misses']} misses, "
+                f"{cache['evictions']} evictions"
+                f"\nDatabases: {', '.join(handler.shards)}")
+    cache = handler.cache_stats()
+    statements = handler.db.statement_stats()
+    sessions = handler.sessions.stats()
+    return (METRICS.format_report() +
+            f"\nResult cache: {cache['hits']} hits, {cache['misses']} misses, "
+            f"{cache['evictions']} evictions"
+            f"\nSessions: {sessions['sessions']} ({sessions['bytes'] / 1024:.0f} KB), "
+            f"{sessions['evictions']} evicted, {sessions['expirations']} expired"
+            f"\nPrepared statements: {statements['prepares']} prepares "
+            f"({statements['prepare_ms']:.1f}ms), {statements['hits']} cache hits")
+
+def answer(handler, query):
+    """Print the answer to a question, streamed; fanned-out answers end with their timings."""
+    if hasattr(handler, 'answer'):
+        result = handler.answer(query)
+        print(result.response + handler.formatter.format_shard_timings(result.timings))
+        return
+    for chunk in handler.stream_query(query, REPL_SESSION):
+        print(chunk, end='', flush=True)
+    print()
 
 def main():
-    handler = QueryHandler()
+    arg_parser = argparse.ArgumentParser(description="Company Database Assistant")
+    arg_parser.add_argument('--databases', default=DB_PATHS,
+                            help="directory or glob of company databases to answer across")
+    args = arg_parser.parse_args()
+    if args.databases:
+        from src.chatbot.fanout import FanOutQueryHandler
+        handler = FanOutQueryHandler(args.databases)
+    else:
+        handler = QueryHandler()
     print("\nWelcome to the Company Database Assistant!")
     print("Type 'help' for available commands or 'exit' to quit.")
     
-    while True:
-        query = input("\nWhat would you like to know? ").strip()
-        
-        if query.lower() == 'exit':
-            print("Goodbye!")
-            break
-        elif query.lower() == 'help':
-            print(handler.process_query("help"))
-        else:
-            print(handler.process_query(query))
+    try:
+        while True:
+            query = input("\nWhat would you like to know? ").strip()
+            
+            if query.lower() == 'exit':
+                print("Goodbye!")
+                break
+            elif query.lower() == 'help':
+                print(handler.process_query("help"))
+            elif query.lower() in ('stats', 'stats on', 'stats off', 'stats reset'):
+                print(handle_stats_command(handler, query.lower()))
+            else:
+                answer(handler, query)
+    finally:
+        handler.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
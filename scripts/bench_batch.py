@@ -0,0 +1,68 @@
+"""Benchmark: QueryHandler.process_queries against a process_query loop.
+
+Builds a report-style batch (listing, manager, average, headcount and
+maximum salary for every department, plus a few company-wide questions)
+from the departments table and times both ways of answering it with the
+result cache cleared before each round. Answers are checked to be equal.
+
+Usage:
+    python scripts/bench_batch.py --rounds 20
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.chatbot.query_handler import QueryHandler
+
+PER_DEPARTMENT = (
+    "show {dept} department",
+    "{dept} manager",
+    "average salary in {dept} department",
+    "how many employees in {dept} department",
+    "maximum salary in {dept} department",
+)
+COMPANY_WIDE = ("average salary", "headcount by department", "minimum salary")
+
+
+def report_queries(handler):
+    departments = handler.catalog.departments()
+    queries = [template.format(dept=dept.lower())
+               for dept in departments for template in PER_DEPARTMENT]
+    return queries + list(COMPANY_WIDE)
+
+
+def timed(handler, answer, queries, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        handler.cache.clear()
+        start = time.perf_counter()
+        responses = answer(queries)
+        best = min(best, time.perf_counter() - start)
+    return best, responses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch query API benchmark")
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--db', default=None, help="database path (default: DB_PATH)")
+    args = parser.parse_args()
+
+    handler = QueryHandler(page_size=0, db_path=args.db)
+    queries = report_queries(handler)
+    loop, expected = timed(handler, lambda batch: [handler.process_query(q) for q in batch],
+                           queries, args.rounds)
+    batch, responses = timed(handler, handler.process_queries, queries, args.rounds)
+    handler.db.close()
+
+    if responses != expected:
+        print("Batch answers differ from process_query answers.")
+        sys.exit(1)
+    print(f"{len(queries)} questions, best of {args.rounds} rounds")
+    print(f"{'process_query loop':<20} {loop * 1000:>9.2f} ms")
+    print(f"{'process_queries':<20} {batch * 1000:>9.2f} ms  ({loop / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Micro-benchmark: date expressions from hire-date questions.
+
+Compares dateutil.parser.parse (what QueryHandler called for every
+hire-date query) with parse_period, uncached (the compiled DATE_FORMATS
+alone) and memoized (the steady state, where dates repeat across queries).
+Expressions dateutil cannot read ("q3 2021") are left out of its run.
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from dateutil import parser
+from src.chatbot.date_parser import parse_period
+
+EXPRESSIONS = [
+    "2021-06-01",
+    "2020/01/15",
+    "06/30/2021",
+    "march 15, 2021",
+    "5th of june 2022",
+    "2022-03",
+    "march 2022",
+    "q3 2021",
+]
+
+
+def dateutil_reads(text):
+    try:
+        parser.parse(text)
+    except (ValueError, OverflowError):
+        return False
+    return True
+
+
+def main(repeat=2000):
+    readable = [text for text in EXPRESSIONS if dateutil_reads(text)]
+    runs = (
+        ('dateutil', readable, parser.parse),
+        ('parse_period, uncached', EXPRESSIONS, parse_period.__wrapped__),
+        ('parse_period, memoized', EXPRESSIONS, parse_period),
+    )
+    print(f"{'parser':<24} {'us/date':>8} {'dates':>6}")
+    for label, texts, parse in runs:
+        seconds = timeit.timeit(lambda: [parse(text) for text in texts], number=repeat)
+        print(f"{label:<24} {seconds * 1e6 / (repeat * len(texts)):>8.2f} {len(texts):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark: company-wide questions answered across many databases.
+
+Generates ``--shards`` databases of ``--employees`` rows each with
+DatabaseSetup and times FanOutQueryHandler answering company-wide
+questions with one worker (the databases one after another) and with one
+worker per database, next to the slowest database's own part.
+
+Usage:
+    python scripts/bench_fanout.py --shards 8 --employees 200000
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+from setup_database import DatabaseSetup
+from src.chatbot.fanout import FanOutQueryHandler
+
+QUESTIONS = (
+    "show employees with salary above 195000",
+    "show employees hired in q1 2022",
+    "list all managers",
+    "average salary",
+    "median salary",
+    "headcount by department",
+    "hires per quarter",
+    "find employee john smi",
+)
+
+
+def build(workdir, shards, num_employees, seed):
+    for shard in range(shards):
+        directory = Path(workdir) / f'company{shard:02d}'
+        directory.mkdir()
+        setup = DatabaseSetup(db_path=Path(workdir) / f'company{shard:02d}.db',
+                              data_dir=directory)
+        setup.generate_sample_data(num_employees, 50, seed=seed + shard)
+        setup.create_database()
+        setup.load_data_to_database()
+
+
+def timed(handler, question, repeat):
+    samples, slowest = [], []
+    for _ in range(repeat):
+        handler.cache.clear()
+        start = time.perf_counter()
+        result = handler.answer(question)
+        samples.append(time.perf_counter() - start)
+        slowest.append(max(timing.seconds for timing in result.timings))
+    return statistics.median(samples) * 1000, statistics.median(slowest) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-database fan-out benchmark")
+    parser.add_argument('--shards', type=int, default=8)
+    parser.add_argument('--employees', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build(tmp, args.shards, args.employees, args.seed)
+        pattern = str(Path(tmp) / '*.db')
+        sequential = FanOutQueryHandler(pattern, workers=1)
+        parallel = FanOutQueryHandler(pattern, workers=args.shards)
+        print(f"{args.shards} databases x {args.employees} employees")
+        print(f"{'question':<42} {'1 worker ms':>12} {'fan-out ms':>11} {'slowest ms':>11}")
+        for question in QUESTIONS:
+            one_ms, _ = timed(sequential, question, args.repeat)
+            fan_ms, slowest_ms = timed(parallel, question, args.repeat)
+            print(f"{question:<42} {one_ms:>12.1f} {fan_ms:>11.1f} {slowest_ms:>11.1f}")
+        sequential.close()
+        parallel.close()
+
+
+if __name__ == "__main__":
+    main()
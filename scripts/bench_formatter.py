@@ -0,0 +1,82 @@
+"""Micro-benchmark: rendering a large employee listing.
+
+Fetches ``--rows`` rows from an in-memory table and renders them three
+ways: the previous path (sqlite3.Row read by key, strptime/strftime and
+currency formatting per row), the same rows through the memoized
+ResponseFormatter, and plain tuple rows through ResponseFormatter (the
+path QueryHandler uses for listings). Fetch time is included.
+"""
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.chatbot.response_formatter import ResponseFormatter
+
+QUERY = "SELECT first_name, last_name, salary, hire_date FROM employees ORDER BY id"
+
+
+def build(num_rows, seed):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE employees (id INTEGER PRIMARY KEY, first_name TEXT, "
+                 "last_name TEXT, salary INTEGER, hire_date TEXT)")
+    start = date(2010, 1, 1)
+    conn.executemany(
+        "INSERT INTO employees VALUES (?, ?, ?, ?, ?)",
+        ((i, f"First{i % 500}", f"Last{i % 2000}", rng.randrange(30000, 200000, 500),
+          (start + timedelta(days=rng.randrange(5000))).isoformat())
+         for i in range(num_rows))
+    )
+    return conn
+
+
+def previous_lines(rows, department):
+    """The per-row formatting ResponseFormatter did before memoization."""
+    yield f"\nEmployees in {department.title()} department:\n"
+    for emp in rows:
+        hired = datetime.strptime(emp['hire_date'], "%Y-%m-%d").strftime("%B %d, %Y")
+        yield (
+            f"- {emp['first_name']} {emp['last_name']} "
+            f"(Salary: ${emp['salary']:,.2f}, "
+            f"Hired: {hired})\n"
+        )
+
+
+def timed(conn, row_factory, render):
+    conn.row_factory = row_factory
+    start = time.perf_counter()
+    text = ''.join(render(conn.execute(QUERY)))
+    return time.perf_counter() - start, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Listing formatting benchmark")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    conn = build(args.rows, args.seed)
+    formatter = ResponseFormatter()
+    runs = (
+        ('Row + strptime', sqlite3.Row, lambda rows: previous_lines(rows, 'sales')),
+        ('Row + memoized', sqlite3.Row, lambda rows: formatter.iter_employee_list(rows, 'sales')),
+        ('tuple + memoized', None, lambda rows: formatter.iter_employee_list(rows, 'sales')),
+    )
+    print(f"{args.rows} rows")
+    baseline = expected = None
+    for label, row_factory, render in runs:
+        seconds, text = timed(conn, row_factory, render)
+        baseline = baseline or seconds
+        expected = expected or text
+        status = '' if text == expected else '  (output differs!)'
+        print(f"{label:<18} {seconds:>7.2f} s  {args.rows / seconds:>10,.0f} rows/s  "
+              f"{baseline / seconds:>5.1f}x{status}")
+
+
+if __name__ == "__main__":
+    main()
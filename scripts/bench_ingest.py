@@ -0,0 +1,76 @@
+"""Benchmark: sharded CSV ingestion throughput against the number of parser processes.
+
+Writes ``--shards`` employees CSVs (streamed from DatabaseSetup's generator),
+then loads them into a fresh database with ParallelLoader for each worker
+count and prints rows/sec. ``workers=0`` parses in the writer process and is
+the single-core baseline; throughput should grow with cores until the
+single SQLite writer is saturated.
+
+Usage:
+    python scripts/bench_ingest.py --employees 1000000 --shards 16 --workers 0 1 2 4 8
+"""
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+from itertools import islice
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+from setup_database import DatabaseSetup
+from src.database.bulk_loader import EMPLOYEE_COLUMNS, EMPLOYEE_CSV_COLUMNS, checked_employee_row
+from src.database.parallel_loader import ParallelLoader
+from src.database.schema import create_schema
+
+
+def write_shards(directory, num_employees, num_shards, seed):
+    """Split one generated data set into ``num_shards`` employees-NN.csv files."""
+    _, rows = DatabaseSetup().iter_sample_data(num_employees, 50, random.Random(seed))
+    per_shard = -(-num_employees // num_shards)
+    for shard in range(num_shards):
+        with open(Path(directory) / f'employees-{shard:02d}.csv', 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(EMPLOYEE_CSV_COLUMNS)
+            writer.writerows(islice(rows, per_shard))
+
+
+def load(directory, workers, batch_size):
+    db_path = Path(directory) / f'ingest-{workers}.db'
+    conn = sqlite3.connect(db_path)
+    try:
+        create_schema(conn)
+        loader = ParallelLoader(conn, batch_size=batch_size, workers=workers)
+        return loader.load([(str(Path(directory) / 'employees-*.csv'), 'employees',
+                             EMPLOYEE_COLUMNS, checked_employee_row)])
+    finally:
+        conn.close()
+        os.remove(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel CSV ingestion benchmark")
+    parser.add_argument('--employees', type=int, default=200000)
+    parser.add_argument('--shards', type=int, default=8)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{args.employees} rows in {args.shards} shards, {os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as tmp:
+        write_shards(tmp, args.employees, args.shards, args.seed)
+        print(f"{'workers':>7}  {'seconds':>8}  {'rows/sec':>10}  {'speedup':>7}")
+        baseline = None
+        for workers in args.workers:
+            result = load(tmp, workers, args.batch_size)
+            baseline = baseline or result['rows_per_sec']
+            print(f"{workers:>7}  {result['seconds']:>8.2f}  {result['rows_per_sec']:>10,.0f}  "
+                  f"{result['rows_per_sec'] / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
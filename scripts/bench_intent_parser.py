@@ -0,0 +1,58 @@
+"""Micro-benchmark: per-query intent parse cost as the pattern table grows.
+
+Compares IntentParser (keyword-indexed) with a linear scan that tries every
+compiled pattern in order, for tables padded with synthetic intents.
+"""
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from src.chatbot.intent_parser import IntentParser, INTENT_PATTERNS
+
+QUERIES = [
+    "show engineering department",
+    "list all managers",
+    "sales manager",
+    "show employees hired after 2021-06-01",
+    "show employees with salary above 90000",
+    "average salary in sales department",
+    "average salary",
+    "something the assistant does not understand",
+]
+
+
+def padded_patterns(extra):
+    """Return the real table plus ``extra`` synthetic intents with their own keywords."""
+    synthetic = tuple(
+        (f'synthetic_{i}', (f'kw{i}',), rf'\bkw{i}\s+(?P<value>\d+)', None)
+        for i in range(extra)
+    )
+    return synthetic + INTENT_PATTERNS
+
+
+def linear_parse(compiled, query):
+    for kind, regex in compiled:
+        if regex.search(query):
+            return kind
+    return 'unknown'
+
+
+def main(sizes=(0, 100, 500, 1000), repeat=2000):
+    print(f"{'patterns':>8}  {'indexed us/query':>17}  {'linear us/query':>16}")
+    for extra in sizes:
+        patterns = padded_patterns(extra)
+        parser = IntentParser(patterns)
+        compiled = [(kind, re.compile(pattern)) for kind, _, pattern, _ in patterns]
+
+        indexed = timeit.timeit(
+            lambda: [parser.parse(q) for q in QUERIES], number=repeat)
+        linear = timeit.timeit(
+            lambda: [linear_parse(compiled, q) for q in QUERIES], number=repeat)
+        per_query = 1e6 / (repeat * len(QUERIES))
+        print(f"{len(patterns):>8}  {indexed * per_query:>17.2f}  {linear * per_query:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark: employee name lookup through FTS5 against a LIKE scan.
+
+Generates ``--employees`` rows with DatabaseSetup's generator into a
+temporary database, builds the employees_fts index and times autocomplete
+style lookups (growing prefixes of a name) both ways.
+
+Usage:
+    python scripts/bench_name_search.py --employees 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+from setup_database import DatabaseSetup
+from config import SEARCH_LIMIT, SEARCH_CANDIDATES
+from src.database.name_search import (NAME_SEARCH, NAME_SEARCH_LIKE, create_search_index,
+                                      match_expression)
+from src.database.schema import EMPLOYEES_TABLE, DEPARTMENTS_TABLE
+
+LOOKUPS = ("j", "jo", "joh", "john", "john s", "john sm", "john smith",
+           "ma", "mar", "mart", "martinez", "eliz", "q")
+
+
+def build(db_path, num_employees, seed):
+    conn = sqlite3.connect(db_path)
+    conn.execute(EMPLOYEES_TABLE)
+    conn.execute(DEPARTMENTS_TABLE)
+    departments, rows = DatabaseSetup().iter_sample_data(num_employees, 50, random.Random(seed))
+    conn.executemany("INSERT INTO departments (id, name) VALUES (?, ?)",
+                     [row[:2] for row in departments])
+    ids = {name: dept_id for dept_id, name, _ in departments}
+    conn.executemany("INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     ((*row[:3], ids[row[3]], *row[4:6], int(row[6] == 'Yes')) for row in rows))
+    start = time.perf_counter()
+    if not create_search_index(conn):
+        sys.exit("This SQLite build has no FTS5.")
+    conn.commit()
+    return conn, time.perf_counter() - start
+
+
+def timed(conn, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Name search benchmark")
+    parser.add_argument('--employees', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn, build_seconds = build(os.path.join(tmp, 'search.db'), args.employees, args.seed)
+        print(f"{args.employees} employees, index built in {build_seconds:.2f}s")
+        print(f"{'lookup':<12} {'fts ms':>8} {'like ms':>9} {'rows':>5}")
+        for text in LOOKUPS:
+            fts_ms, count = timed(conn, NAME_SEARCH,
+                                  (match_expression(text), SEARCH_CANDIDATES, SEARCH_LIMIT),
+                                  args.repeat)
+            like_ms, _ = timed(conn, NAME_SEARCH_LIKE, (f'%{text}%', SEARCH_LIMIT), args.repeat)
+            print(f"{text:<12} {fts_ms:>8.2f} {like_ms:>9.2f} {count:>5}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Benchmark harness at production scale.
+
+Generates a synthetic data set with DatabaseSetup (streamed to CSV), loads it
+through the normal bulk ingestion path, replays a realistic mix of
+QueryHandler.process_query intents and writes a JSON report with ingestion
+rows/sec, per-intent latency percentiles, peak RSS and DB file size.
+
+Usage:
+    python scripts/benchmark.py --employees 1000000 --departments 200 --output bench.json
+    python scripts/benchmark.py ... --compare previous.json
+
+Run once with --engine sqlite and once with --engine columnar (comparing
+against the first report) to measure the columnar analytics engine.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+from setup_database import DatabaseSetup
+from src.chatbot.query_handler import QueryHandler
+from src.database.db_manager import DatabaseManager
+
+# (weight, query template). Templates are filled from the generated data.
+QUERY_MIX = (
+    (20, "show {dept} department"),
+    (10, "{dept} manager"),
+    (5, "list all managers"),
+    (10, "show employees hired after {late_date}"),
+    (10, "show employees hired before {early_date}"),
+    (10, "show employees with salary above {high_salary}"),
+    (5, "show employees with salary below {low_salary}"),
+    (15, "average salary in {dept} department"),
+    (5, "average salary"),
+    (5, "median salary in {dept} department"),
+    (5, "headcount by department"),
+)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if platform.system() == 'Darwin' else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_queries(departments, count, rng):
+    weights = [weight for weight, _ in QUERY_MIX]
+    templates = [template for _, template in QUERY_MIX]
+    names = [name.lower() for name in departments] or ['sales']
+    queries = []
+    for template in rng.choices(templates, weights=weights, k=count):
+        queries.append(template.format(
+            dept=rng.choice(names),
+            late_date=f"2022-{rng.randint(6, 12):02d}-{rng.randint(1, 28):02d}",
+            early_date=f"2019-{rng.randint(1, 6):02d}-{rng.randint(1, 28):02d}",
+            high_salary=rng.randrange(140000, 150000, 1000),
+            low_salary=rng.randrange(36000, 40000, 1000),
+        ))
+    return queries
+
+
+def run(num_employees, num_departments, num_queries, seed, page_size, use_cache, workdir,
+        engine='sqlite'):
+    rng = random.Random(seed)
+    setup = DatabaseSetup(db_path=Path(workdir) / 'bench.db', data_dir=workdir)
+
+    start = time.perf_counter()
+    generated, _ = setup.generate_sample_data(num_employees, num_departments, seed=seed)
+    generate_seconds = time.perf_counter() - start
+
+    setup.create_database()
+    load_stats = setup.load_data_to_database()
+
+    handler = QueryHandler(page_size=page_size, db_path=setup.db_path, engine=engine)
+    if not use_cache:
+        handler.cache.max_entries = 0
+    departments = [row['name'] for row in
+                   handler.db.execute_query("SELECT name FROM departments")]
+
+    # Load the columnar arrays up front so the one-off load is reported
+    # separately instead of landing in the first query's latency.
+    analytics_load_seconds = None
+    if handler.analytics is not None:
+        start = time.perf_counter()
+        handler.analytics.columns()
+        analytics_load_seconds = round(time.perf_counter() - start, 3)
+
+    latencies = {}
+    for query in build_queries(departments, num_queries, rng):
+        kind = handler.parser.parse(query).kind
+        start = time.perf_counter()
+        handler.process_query(query, session_id='bench')
+        latencies.setdefault(kind, []).append(time.perf_counter() - start)
+    handler.db.close()
+
+    def summary(values):
+        return {
+            'count': len(values),
+            'p50_ms': round(percentile(values, 50) * 1000, 3),
+            'p95_ms': round(percentile(values, 95) * 1000, 3),
+            'p99_ms': round(percentile(values, 99) * 1000, 3),
+            'max_ms': round(max(values) * 1000, 3),
+        }
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        'commit': git_commit(),
+        'params': {
+            'employees': generated, 'departments': num_departments,
+            'queries': num_queries, 'seed': seed,
+            'page_size': page_size, 'cache': use_cache, 'engine': engine,
+        },
+        'generate_seconds': round(generate_seconds, 3),
+        'ingestion': {
+            'rows': load_stats['total_rows'],
+            'seconds': round(load_stats['seconds'], 3),
+            'rows_per_sec': round(load_stats['rows_per_sec'], 1),
+        },
+        'analytics_load_seconds': analytics_load_seconds,
+        'queries': {
+            'overall': summary(all_latencies),
+            'by_intent': {kind: summary(values) for kind, values in sorted(latencies.items())},
+        },
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'db_size_mb': round(os.path.getsize(setup.db_path) / (1024 * 1024), 2),
+    }
+
+
+def compare(report, baseline):
+    """Print current/baseline ratios for the headline numbers (>1 means slower/bigger)."""
+    def ratio(current, previous):
+        return f"{current / previous:.2f}x" if previous else "n/a"
+
+    print("\nComparison with baseline:")
+    print(f"- ingestion time per row: "
+          f"{ratio(baseline['ingestion']['rows_per_sec'], report['ingestion']['rows_per_sec'])}")
+    for kind, stats in report['queries']['by_intent'].items():
+        previous = baseline['queries']['by_intent'].get(kind)
+        if previous:
+            print(f"- {kind} p99: {ratio(stats['p99_ms'], previous['p99_ms'])}")
+    print(f"- peak RSS: {ratio(report['peak_rss_mb'], baseline['peak_rss_mb'])}")
+    print(f"- DB size: {ratio(report['db_size_mb'], baseline['db_size_mb'])}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Company Database Assistant benchmark")
+    arg_parser.add_argument('--employees', type=int, default=100000)
+    arg_parser.add_argument('--departments', type=int, default=50)
+    arg_parser.add_argument('--queries', type=int, default=2000)
+    arg_parser.add_argument('--seed', type=int, default=42)
+    arg_parser.add_argument('--page-size', type=int, default=50,
+                            help="rows per listing page (0 returns full listings)")
+    arg_parser.add_argument('--cache', action='store_true', help="enable the result cache")
+    arg_parser.add_argument('--engine', choices=('sqlite', 'columnar'), default='sqlite',
+                            help="analytics engine for salary/hire-date intents")
+    arg_parser.add_argument('--workdir', help="directory for CSVs and the DB (default: temp)")
+    arg_parser.add_argument('--output', help="write the JSON report to this file")
+    arg_parser.add_argument('--compare', help="baseline JSON report to compare against")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report = run(args.employees, args.departments, args.queries, args.seed,
+                     args.page_size, args.cache, args.workdir or tmp, args.engine)
+        DatabaseManager.close_all()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    print(text)
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
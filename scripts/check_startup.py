@@ -0,0 +1,62 @@
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Modules that are only needed for some queries and must not be imported
+# just to start the REPL or server.
+LAZY_MODULES = ('dateutil', 'logging', 'numpy')
+
+DEFAULT_BUDGET_MS = 80
+
+
+def measure_import(module='main', runs=5):
+    """Return (best cumulative import time in ms, set of modules imported)."""
+    best = None
+    modules = set()
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        total = None
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            name = name.strip()
+            modules.add(name.split('.')[0])
+            if name == module:
+                total = int(cumulative) / 1000
+        if total is not None and (best is None or total < best):
+            best = total
+    return best, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check cold-start import time against a budget')
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    total, modules = measure_import(args.module, args.runs)
+    eager = sorted(name for name in LAZY_MODULES if name in modules)
+    print(f"import {args.module}: {total:.1f}ms (budget {args.budget_ms:g}ms, best of {args.runs})")
+
+    failed = False
+    if total > args.budget_ms:
+        print("- over budget")
+        failed = True
+    for name in eager:
+        print(f"- '{name}' is imported at startup; import it where it is used")
+        failed = True
+    if failed:
+        sys.exit("Startup check failed.")
+    print("Startup check passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Load generator for the chat server: reports requests/sec and p50/p99 latency.
+
+Usage: python scripts/load_test.py --concurrency 50 --requests 5000
+(start the server first with: python server.py)
+"""
+import argparse
+import asyncio
+import json
+import time
+
+QUERIES = [
+    "show engineering department",
+    "list all managers",
+    "sales manager",
+    "show employees hired after 2021-06-01",
+    "show employees with salary above 90000",
+    "average salary in sales department",
+    "average salary",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def client(host, port, count, offset, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(count):
+            body = json.dumps({'query': QUERIES[(offset + i) % len(QUERIES)]}).encode()
+            request = (f"POST /query HTTP/1.1\r\nHost: {host}\r\n"
+                       f"Content-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode().partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(host, port, concurrency, total):
+    latencies, statuses = [], {}
+    per_client = max(1, total // concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, per_client, i, latencies, statuses)
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 3),
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'statuses': statuses,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8080)
+    arg_parser.add_argument('--concurrency', type=int, default=50)
+    arg_parser.add_argument('--requests', type=int, default=5000)
+    args = arg_parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.host, args.port, args.concurrency, args.requests)),
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import argparse
+import os
 import sqlite3
 import csv
 import random
@@ -6,170 +8,172 @@ from pathlib import Path
 import sys
 
 sys.path.append(str(Path(__file__).parent.parent))
-from config import DB_PATH, DATA_DIR, EMPLOYEES_CSV, DEPARTMENTS_CSV
+from config import DB_PATH, DATA_DIR, EMPLOYEES_CSV, DEPARTMENTS_CSV, BULK_BATCH_SIZE
+from src.database.bulk_loader import (BulkLoader, EMPLOYEE_COLUMNS, DEPARTMENT_COLUMNS,
+                                      employee_row, department_row)
+from src.database.csv_sync import CsvSync
+from src.database.schema import create_schema, migrate_schema, check_query_plans
+from src.database.queries import INDEXED_QUERIES
+from src.database.aggregates import aggregate_mismatches
+
+DEPARTMENTS = [
+    "Sales", "Engineering", "Marketing", "Human Resources", 
+    "Finance", "Operations", "Customer Support", "Research", 
+    "Legal", "Product Management"
+]
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", 
+    "Michael", "Linda", "William", "Elizabeth", "David", "Barbara", 
+    "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", 
+    "Charles", "Margaret", "Christopher", "Lisa", "Daniel", "Nancy"
+]
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", 
+    "Miller", "Davis", "Rodriguez", "Martinez", "Hernandez", 
+    "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor"
+]
+
+BASE_SALARY = {
+    "Sales": (50000, 80000),
+    "Engineering": (70000, 120000),
+    "Marketing": (45000, 90000),
+    "Human Resources": (45000, 85000),
+    "Finance": (55000, 100000),
+    "Operations": (40000, 80000),
+    "Customer Support": (35000, 70000),
+    "Research": (60000, 110000),
+    "Legal": (65000, 120000),
+    "Product Management": (60000, 110000)
+}
 
 class DatabaseSetup:
-    def __init__(self):
-        self.db_path = DB_PATH
-        self.data_dir = DATA_DIR
-        self.employees_csv = EMPLOYEES_CSV
-        self.departments_csv = DEPARTMENTS_CSV
-
-    def generate_sample_data(self):
-        """Generate sample data for departments and employees"""
-        
-        departments = [
-            "Sales", "Engineering", "Marketing", "Human Resources", 
-            "Finance", "Operations", "Customer Support", "Research", 
-            "Legal", "Product Management"
-        ]
-
-        first_names = [
-            "James", "Mary", "John", "Patricia", "Robert", "Jennifer", 
-            "Michael", "Linda", "William", "Elizabeth", "David", "Barbara", 
-            "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", 
-            "Charles", "Margaret", "Christopher", "Lisa", "Daniel", "Nancy"
-        ]
-        
-        last_names = [
-            "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", 
-            "Miller", "Davis", "Rodriguez", "Martinez", "Hernandez", 
-            "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor"
-        ]
+    def __init__(self, db_path=None, data_dir=None):
+        self.db_path = db_path or DB_PATH
+        self.data_dir = Path(data_dir) if data_dir else DATA_DIR
+        self.employees_csv = self.data_dir / 'employees.csv' if data_dir else EMPLOYEES_CSV
+        self.departments_csv = self.data_dir / 'departments.csv' if data_dir else DEPARTMENTS_CSV
 
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+    @staticmethod
+    def _department_names(num_departments):
+        """The standard departments, extended with numbered divisions if more are requested"""
+        if num_departments <= len(DEPARTMENTS):
+            return DEPARTMENTS[:num_departments]
+        return DEPARTMENTS + [f"Division {i}" for i in range(len(DEPARTMENTS) + 1,
+                                                             num_departments + 1)]
+
+    def iter_sample_data(self, num_employees=None, num_departments=None, rng=random):
+        """Return (department rows, lazy iterator of employee rows).
+
+        With no sizes given this reproduces the small default data set (10
+        departments of 5-15 employees). Otherwise exactly ``num_employees``
+        rows are spread randomly over ``num_departments`` departments; rows
+        are produced one at a time so any size can be streamed to disk.
+        """
+        departments = self._department_names(num_departments or len(DEPARTMENTS))
+        salary_ranges = dict(BASE_SALARY)
+        for dept in departments:
+            if dept not in salary_ranges:
+                low = rng.randrange(35000, 70000, 1000)
+                salary_ranges[dept] = (low, low + rng.randrange(20000, 50000, 1000))
 
         department_data = []
         managers = []
         for i, dept in enumerate(departments, 1):
-            manager_first = random.choice(first_names)
-            manager_last = random.choice(last_names)
-            manager_full = f"{manager_first} {manager_last}"
+            manager_first = rng.choice(FIRST_NAMES)
+            manager_last = rng.choice(LAST_NAMES)
             managers.append((manager_first, manager_last, dept))
-            department_data.append([i, dept, manager_full])
+            department_data.append([i, dept, f"{manager_first} {manager_last}"])
+
+        def employees():
+            employee_id = 1
+            for first_name, last_name, dept in managers:
+                salary = rng.randint(90000, 150000)  # Higher salary for managers
+                start_date = datetime(2019, 1, 1) + timedelta(days=rng.randint(0, 365*3))
+                yield [employee_id, first_name, last_name, dept, salary,
+                       start_date.strftime('%Y-%m-%d'), 'Yes']
+                employee_id += 1
+
+            if num_employees is None:
+                staff = (dept for dept in departments for _ in range(rng.randint(5, 15)))
+            else:
+                staff = (rng.choice(departments)
+                         for _ in range(max(0, num_employees - len(managers))))
+
+            for dept in staff:
+                start_date = datetime(2020, 1, 1) + timedelta(days=rng.randint(0, 365*3))
+                yield [employee_id, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), dept,
+                       rng.randint(*salary_ranges[dept]), start_date.strftime('%Y-%m-%d'), 'No']
+                employee_id += 1
+
+        return department_data, employees()
+
+    def generate_sample_data(self, num_employees=None, num_departments=None, seed=None):
+        """Generate sample data for departments and employees, streaming rows to CSV"""
+        rng = random.Random(seed) if seed is not None else random
+        department_data, employee_rows = self.iter_sample_data(num_employees, num_departments, rng)
+
+        self.data_dir.mkdir(parents=True, exist_ok=True)
 
         with open(self.departments_csv, 'w', newline='') as file:
             writer = csv.writer(file)
             writer.writerow(['id', 'name', 'manager'])
             writer.writerows(department_data)
 
-        employee_data = []
-        employee_id = 1
-
-        for first_name, last_name, dept in managers:
-            salary = random.randint(90000, 150000)  # Higher salary for managers
-            start_date = datetime(2019, 1, 1) + timedelta(days=random.randint(0, 365*3))
-            employee_data.append([
-                employee_id,
-                first_name,
-                last_name,
-                dept,
-                salary,
-                start_date.strftime('%Y-%m-%d'),
-                'Yes'  # is_manager
-            ])
-            employee_id += 1
-
-        for dept in departments:
-            num_employees = random.randint(5, 15)  # Random number of employees per department
-            base_salary = {
-                "Sales": (50000, 80000),
-                "Engineering": (70000, 120000),
-                "Marketing": (45000, 90000),
-                "Human Resources": (45000, 85000),
-                "Finance": (55000, 100000),
-                "Operations": (40000, 80000),
-                "Customer Support": (35000, 70000),
-                "Research": (60000, 110000),
-                "Legal": (65000, 120000),
-                "Product Management": (60000, 110000)
-            }
-
-            for _ in range(num_employees):
-                first_name = random.choice(first_names)
-                last_name = random.choice(last_names)
-                salary = random.randint(*base_salary[dept])
-                start_date = datetime(2020, 1, 1) + timedelta(days=random.randint(0, 365*3))
-                
-                employee_data.append([
-                    employee_id,
-                    first_name,
-                    last_name,
-                    dept,
-                    salary,
-                    start_date.strftime('%Y-%m-%d'),
-                    'No'  # is_manager
-                ])
-                employee_id += 1
-
+        employee_count = 0
         with open(self.employees_csv, 'w', newline='') as file:
             writer = csv.writer(file)
             writer.writerow(['id', 'first_name', 'last_name', 'department', 'salary', 'hire_date', 'is_manager'])
-            writer.writerows(employee_data)
+            for row in employee_rows:
+                writer.writerow(row)
+                employee_count += 1
 
-        return len(employee_data), len(department_data)
+        return employee_count, len(department_data)
 
     def create_database(self):
-        """Create the SQLite database and tables"""
+        """Create the SQLite database, tables and secondary indexes"""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        try:
+            create_schema(conn)
+        finally:
+            conn.close()
 
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS employees (
-            id INTEGER PRIMARY KEY,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            department TEXT NOT NULL,
-            salary INTEGER NOT NULL,
-            hire_date DATE NOT NULL,
-            is_manager TEXT NOT NULL
-        )
-        ''')
-
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS departments (
-            id INTEGER PRIMARY KEY,
-            name TEXT NOT NULL,
-            manager TEXT NOT NULL
-        )
-        ''')
-
-        conn.commit()
-        conn.close()
+    def load_data_to_database(self, batch_size=BULK_BATCH_SIZE, progress=None):
+        """Load data from CSV files into the database in one bulk transaction"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            loader = BulkLoader(conn, batch_size=batch_size, progress=progress)
+            return loader.load([
+                (self.employees_csv, 'employees', EMPLOYEE_COLUMNS, employee_row),
+                (self.departments_csv, 'departments', DEPARTMENT_COLUMNS, department_row),
+            ], clear=True)
+        finally:
+            conn.close()
 
-    def load_data_to_database(self):
-        """Load data from CSV files into the database"""
+    def sync_data_to_database(self, batch_size=BULK_BATCH_SIZE, progress=None, force=False):
+        """Apply only the changes in the CSV files since the last sync (readers stay online)"""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            create_schema(conn)
+            return CsvSync(conn, batch_size=batch_size, progress=progress).sync([
+                (self.employees_csv, 'employees', EMPLOYEE_COLUMNS, employee_row),
+                (self.departments_csv, 'departments', DEPARTMENT_COLUMNS, department_row),
+            ], force=force)
+        finally:
+            conn.close()
 
-        # Clear existing data
-        cursor.execute("DELETE FROM employees")
-        cursor.execute("DELETE FROM departments")
-
-        # Load employees data
-        with open(self.employees_csv, 'r') as file:
-            csv_reader = csv.DictReader(file)
-            for row in csv_reader:
-                cursor.execute('''
-                INSERT INTO employees (id, first_name, last_name, department, salary, hire_date, is_manager)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    int(row['id']), row['first_name'], row['last_name'], 
-                    row['department'], int(row['salary']), row['hire_date'], 
-                    row['is_manager']
-                ))
-
-        # Load departments data
-        with open(self.departments_csv, 'r') as file:
-            csv_reader = csv.DictReader(file)
-            for row in csv_reader:
-                cursor.execute('''
-                INSERT INTO departments (id, name, manager)
-                VALUES (?, ?, ?)
-                ''', (int(row['id']), row['name'], row['manager']))
-
-        conn.commit()
-        conn.close()
+    def migrate_database(self):
+        """Migrate an existing database to the current schema; return file sizes before/after"""
+        size_before = os.path.getsize(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            migrated = migrate_schema(conn)
+            create_schema(conn)
+        finally:
+            conn.close()
+        return migrated, size_before, os.path.getsize(self.db_path)
 
     def verify_setup(self):
         """Verify that the database was set up correctly"""
@@ -182,21 +186,70 @@ class DatabaseSetup:
         cursor.execute("SELECT COUNT(*) FROM departments")
         department_count = cursor.fetchone()[0]
 
-        cursor.execute("SELECT COUNT(DISTINCT department) FROM employees")
+        cursor.execute("SELECT COUNT(DISTINCT department_id) FROM employees")
         unique_departments = cursor.fetchone()[0]
 
+        full_scans = check_query_plans(conn, INDEXED_QUERIES)
+        aggregate_errors = aggregate_mismatches(conn)
+
         conn.close()
 
         return {
             'employees': employee_count,
             'departments': department_count,
-            'unique_departments': unique_departments
+            'unique_departments': unique_departments,
+            'full_scans': full_scans,
+            'aggregate_mismatches': aggregate_errors
         }
 
+def sync(setup, force=False):
+    print("Syncing CSV exports into the database...")
+    result = setup.sync_data_to_database(
+        progress=lambda table, rows: print(f"  {table}: {rows} changes applied", end="\r"),
+        force=force
+    )
+    print(" " * 60, end="\r")
+    for table, counts in result['tables'].items():
+        if counts['skipped']:
+            print(f"- {table}: unchanged file, skipped")
+        else:
+            print(f"- {table}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                  f"{counts['deleted']} deleted, {counts['unchanged']} unchanged")
+            if counts['new_departments']:
+                print(f"  new departments: {', '.join(counts['new_departments'])}")
+    print(f"Sync completed in {result['seconds']:.2f}s")
+
+
+def migrate(setup):
+    print("Migrating the database schema...")
+    migrated, size_before, size_after = setup.migrate_database()
+    if not migrated:
+        print("- Already on the current schema")
+        return
+    print(f"- File size: {size_before / 2**20:.2f} MB -> {size_after / 2**20:.2f} MB")
+
+
 def main():
-    print("Starting database setup...")
-    
+    arg_parser = argparse.ArgumentParser(description="Create or sync the company database")
+    arg_parser.add_argument('--sync', action='store_true',
+                            help="apply changes in data/*.csv incrementally instead of "
+                                 "regenerating and reloading everything")
+    arg_parser.add_argument('--force', action='store_true',
+                            help="with --sync, diff files even if their checksum is unchanged")
+    arg_parser.add_argument('--migrate', action='store_true',
+                            help="move an existing database to the normalized schema "
+                                 "(department ids, 0/1 manager flags) without reloading")
+    args = arg_parser.parse_args()
+
     setup = DatabaseSetup()
+    if args.migrate:
+        migrate(setup)
+        return
+    if args.sync:
+        sync(setup, args.force)
+        return
+
+    print("Starting database setup...")
     
     print("Generating sample data...")
     num_employees, num_departments = setup.generate_sample_data()
@@ -207,8 +260,11 @@ def main():
     print("Database tables created successfully")
     
     print("\nLoading data into database...")
-    setup.load_data_to_database()
-    print("Data loaded successfully")
+    load_stats = setup.load_data_to_database(
+        progress=lambda table, rows: print(f"  {table}: {rows} rows", end="\r")
+    )
+    print(f"\nData loaded successfully: {load_stats['total_rows']} rows in "
+          f"{load_stats['seconds']:.2f}s ({load_stats['rows_per_sec']:,.0f} rows/sec)")
     
     print("\nVerifying setup...")
     stats = setup.verify_setup()
@@ -216,6 +272,16 @@ def main():
     print(f"- Total employees: {stats['employees']}")
     print(f"- Total departments: {stats['departments']}")
     print(f"- Unique departments: {stats['unique_departments']}")
+    if stats['full_scans']:
+        for name, scans in stats['full_scans'].items():
+            print(f"- Query '{name}' is not using an index: {'; '.join(scans)}")
+        sys.exit("Query plan check failed: indexed query shapes fell back to a table scan.")
+    print("- All query shapes use an index")
+    if stats['aggregate_mismatches']:
+        for department, diff in stats['aggregate_mismatches'].items():
+            print(f"- Aggregates for '{department}' are stale: {diff}")
+        sys.exit("Aggregate check failed: department_stats disagrees with employees.")
+    print("- Department aggregates match the employees table")
     
     print("\nDatabase setup completed successfully!")
 
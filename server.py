@@ -0,0 +1,17 @@
+import argparse
+from config import SERVER_HOST, SERVER_PORT, DB_PATHS
+from src.service.chat_server import run
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Company Database Assistant chat server")
+    arg_parser.add_argument('--host', default=SERVER_HOST)
+    arg_parser.add_argument('--port', type=int, default=SERVER_PORT)
+    arg_parser.add_argument('--snapshot', action='store_true', default=None,
+                            help="serve reads from an in-memory snapshot of the database")
+    arg_parser.add_argument('--databases', default=DB_PATHS,
+                            help="directory or glob of company databases to answer across")
+    args = arg_parser.parse_args()
+    run(args.host, args.port, args.snapshot, args.databases)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,232 @@
+import threading
+from collections import namedtuple
+import numpy as np
+from config import STREAM_CHUNK_SIZE
+from ..instrumentation.metrics import METRICS
+
+LOAD_EMPLOYEES = """
+    SELECT e.id, e.first_name, e.last_name, d.name AS department, e.salary,
+           CAST(julianday(e.hire_date) - 2440587.5 AS INTEGER) AS hire_days, e.hire_date
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    ORDER BY e.id
+"""
+
+# Keys of the row dicts produced for the formatter (a superset of the
+# columns the SQL listings return).
+ROW_FIELDS = ('id', 'first_name', 'last_name', 'department', 'salary', 'hire_days', 'hire_date')
+
+_NO_DATE = np.iinfo(np.int32).min
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+# One immutable load of the employees table. Sorted views are index
+# permutations, so filters are binary searches and results are slices.
+Columns = namedtuple('Columns', [
+    'ids', 'first_names', 'last_names', 'departments', 'salary', 'hire_days', 'hire_dates',
+    'salary_order', 'salary_sorted', 'salary_ids',
+    'hire_order', 'hire_sorted', 'hire_ids',
+    'dept_index', 'dept_names', 'dept_bounds', 'dept_salaries', 'dept_sums',
+])
+
+
+def _position(keys, ids, key, row_id, side):
+    """Index of (key, row_id) in a run sorted by (key, id)."""
+    lo = np.searchsorted(keys, key, 'left')
+    hi = np.searchsorted(keys, key, 'right')
+    return int(lo + np.searchsorted(ids[lo:hi], row_id, side))
+
+
+def to_days(date_str):
+    """'YYYY-MM-DD' -> days since 1970-01-01, the unit of the hire_days column."""
+    return int((np.datetime64(date_str, 'D') - _EPOCH).astype(np.int64))
+
+
+class ColumnarEngine:
+    """In-memory columnar copy of ``employees`` for filter and aggregate intents.
+
+    The table is loaded once into NumPy arrays (hire dates as int days,
+    departments as case-insensitive codes) with salary and hire-date sort
+    orders precomputed, so salary/hire-date filters are binary searches and
+    per-department min/max/median/average are array lookups. Answers follow
+    the SQL path's row order and the AggregateStore interface. The copy is
+    reloaded when PRAGMA data_version reports a commit.
+    """
+
+    def __init__(self, db, chunk_size=STREAM_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+        self._columns = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def columns(self):
+        """Return the current Columns, reloading them if the database changed."""
+        version = self.db.data_version()
+        columns = self._columns
+        if columns is not None and version == self._version:
+            return columns
+        with self._lock:
+            if self._columns is None or version != self._version:
+                self._columns = self._load()
+                self._version = version
+            return self._columns
+
+    def _load(self):
+        with METRICS.timer('analytics_load'):
+            ids, first_names, last_names, departments = [], [], [], []
+            salary, hire_days, hire_dates = [], [], []
+            names = {}
+            for row in self.db.iter_query(LOAD_EMPLOYEES, tuples=True):
+                ids.append(row[0])
+                first_names.append(row[1])
+                last_names.append(row[2])
+                departments.append(names.setdefault(row[3], row[3]))
+                salary.append(row[4])
+                hire_days.append(_NO_DATE if row[5] is None else row[5])
+                hire_dates.append(row[6])
+            return self._build(ids, first_names, last_names, departments,
+                               salary, hire_days, hire_dates)
+
+    @staticmethod
+    def _build(ids, first_names, last_names, departments, salary, hire_days, hire_dates):
+        ids = np.array(ids, dtype=np.int64)
+        salary = np.array(salary, dtype=np.int64)
+        hire_days = np.array(hire_days, dtype=np.int32)
+
+        # Department codes compare case-insensitively, like the NOCASE indexes;
+        # the first spelling seen is the display name.
+        dept_index, dept_names = {}, []
+        codes = np.empty(len(departments), dtype=np.int32)
+        for i, name in enumerate(departments):
+            code = dept_index.get(name.lower())
+            if code is None:
+                code = dept_index[name.lower()] = len(dept_names)
+                dept_names.append(name)
+            codes[i] = code
+
+        salary_order = np.lexsort((ids, salary))
+        dated = np.flatnonzero(hire_days != _NO_DATE)
+        hire_order = dated[np.lexsort((ids[dated], hire_days[dated]))]
+
+        by_dept = np.lexsort((salary, codes))
+        dept_bounds = np.searchsorted(codes[by_dept], np.arange(len(dept_names) + 1))
+        dept_salaries = salary[by_dept]
+        dept_sums = (np.add.reduceat(dept_salaries, dept_bounds[:-1]) if len(dept_salaries)
+                     else np.zeros(0, dtype=np.int64))
+
+        return Columns(
+            ids, np.array(first_names, dtype=object), np.array(last_names, dtype=object),
+            np.array(departments, dtype=object), salary, hire_days,
+            np.array(hire_dates, dtype=object),
+            salary_order, salary[salary_order], ids[salary_order],
+            hire_order, hire_days[hire_order], ids[hire_order],
+            dept_index, dept_names, dept_bounds, dept_salaries, dept_sums,
+        )
+
+    def _rows(self, columns, index):
+        """Yield row dicts for ``index`` in order, converting a chunk at a time."""
+        for start in range(0, len(index), self.chunk_size):
+            chunk = index[start:start + self.chunk_size]
+            values = (columns.ids[chunk].tolist(), columns.first_names[chunk].tolist(),
+                      columns.last_names[chunk].tolist(), columns.departments[chunk].tolist(),
+                      columns.salary[chunk].tolist(), columns.hire_days[chunk].tolist(),
+                      columns.hire_dates[chunk].tolist())
+            for row in zip(*values):
+                yield dict(zip(ROW_FIELDS, row))
+
+    def salary_rows(self, operator, value, after=None, limit=None):
+        """Rows with salary above/below ``value``, highest first (SALARY_FILTER order).
+
+        ``after`` is a (salary, id) keyset position as in SALARY_FILTER_PAGE.
+        """
+        columns = self.columns()
+        with METRICS.timer('analytics'):
+            if operator == '>':
+                start = np.searchsorted(columns.salary_sorted, value, 'right')
+                stop = len(columns.salary_sorted)
+            else:
+                start, stop = 0, np.searchsorted(columns.salary_sorted, value, 'left')
+            if after is not None:
+                stop = min(stop, _position(columns.salary_sorted, columns.salary_ids,
+                                           after[0], after[1], 'left'))
+            index = columns.salary_order[start:max(start, stop)][::-1][:limit]
+        return self._rows(columns, index)
+
+    def hire_date_rows(self, operator, date_str, after=None, limit=None):
+        """Rows hired after/since/before ``date_str``, earliest first (HIRE_DATE_FILTER order).
+
+        ``after`` is a (hire_days, id) keyset position.
+        """
+        columns = self.columns()
+        with METRICS.timer('analytics'):
+            days = to_days(date_str)
+            if operator in ('>', '>='):
+                side = 'right' if operator == '>' else 'left'
+                start = np.searchsorted(columns.hire_sorted, days, side)
+                stop = len(columns.hire_sorted)
+            else:
+                start, stop = 0, np.searchsorted(columns.hire_sorted, days, 'left')
+            if after is not None:
+                start = max(start, _position(columns.hire_sorted, columns.hire_ids,
+                                             after[0], after[1], 'right'))
+            index = columns.hire_order[start:max(start, stop)][:limit]
+        return self._rows(columns, index)
+
+    def department_stats(self, department=None):
+        """Same result as AggregateStore.department_stats."""
+        columns = self.columns()
+        if department:
+            code = columns.dept_index.get(department.lower())
+            if code is None:
+                return {'department': department, 'headcount': 0, 'salary_sum': 0,
+                        'salary_min': None, 'salary_max': None}
+            return self._group_stats(columns, code)
+
+        salaries = columns.salary_sorted
+        return {
+            'department': None,
+            'headcount': len(salaries),
+            'salary_sum': int(salaries.sum()),
+            'salary_min': int(salaries[0]) if len(salaries) else None,
+            'salary_max': int(salaries[-1]) if len(salaries) else None,
+        }
+
+    @staticmethod
+    def _group_stats(columns, code):
+        lo, hi = columns.dept_bounds[code], columns.dept_bounds[code + 1]
+        return {
+            'department': columns.dept_names[code],
+            'headcount': int(hi - lo),
+            'salary_sum': int(columns.dept_sums[code]),
+            'salary_min': int(columns.dept_salaries[lo]),
+            'salary_max': int(columns.dept_salaries[hi - 1]),
+        }
+
+    def all_department_stats(self):
+        """Per-department stats dicts ordered by department."""
+        columns = self.columns()
+        stats = [self._group_stats(columns, code) for code in range(len(columns.dept_names))]
+        return sorted(stats, key=lambda row: row['department'])
+
+    def average_salary(self, department=None):
+        """Return (average salary, headcount)."""
+        stats = self.department_stats(department)
+        if not stats['headcount']:
+            return 0, 0
+        return stats['salary_sum'] / stats['headcount'], stats['headcount']
+
+    def median_salary(self, department=None):
+        """Return (median salary, headcount) from the sorted salary columns."""
+        columns = self.columns()
+        if department:
+            code = columns.dept_index.get(department.lower())
+            if code is None:
+                return None, 0
+            lo, hi = columns.dept_bounds[code], columns.dept_bounds[code + 1]
+            salaries = columns.dept_salaries[lo:hi]
+        else:
+            salaries = columns.salary_sorted
+        count = len(salaries)
+        if not count:
+            return None, 0
+        middle = salaries[(count - 1) // 2:count // 2 + 1]
+        return float(middle.mean()), count
@@ -0,0 +1,100 @@
+import re
+from datetime import date, timedelta
+from functools import lru_cache
+from config import DATE_PARSE_CACHE_SIZE
+
+_MONTH_NAMES = (
+    ('january', 'jan'), ('february', 'feb'), ('march', 'mar'), ('april', 'apr'),
+    ('may',), ('june', 'jun'), ('july', 'jul'), ('august', 'aug'),
+    ('september', 'sept', 'sep'), ('october', 'oct'), ('november', 'nov'),
+    ('december', 'dec'),
+)
+MONTHS = {name: number for number, names in enumerate(_MONTH_NAMES, 1) for name in names}
+
+_MONTH = r'(?P<month_name>' + '|'.join(sorted(MONTHS, key=len, reverse=True)) + r')\.?'
+_DAY = r'(?P<day>\d{1,2})(?:st|nd|rd|th)?'
+_YEAR = r'(?P<year>\d{4})'
+
+# (period, pattern) pairs tried in order against the whole expression. The
+# period says how much of the calendar a match covers. Numeric dates are
+# read month-first like dateutil's default ("06/30/2021").
+DATE_FORMATS = (
+    ('day', _YEAR + r'[-/.](?P<month>\d{1,2})[-/.]' + _DAY),
+    ('day', r'(?P<month>\d{1,2})[-/]' + _DAY + r'[-/]' + _YEAR),
+    ('day', _MONTH + r'\s+' + _DAY + r',?\s+' + _YEAR),
+    ('day', _DAY + r'\s+(?:of\s+)?' + _MONTH + r',?\s+' + _YEAR),
+    ('month', _YEAR + r'[-/](?P<month>\d{1,2})'),
+    ('month', _MONTH + r',?\s+' + _YEAR),
+    ('quarter', r'q(?P<quarter>[1-4])[\s,-]*' + _YEAR),
+    ('quarter', _YEAR + r'[\s-]*q(?P<quarter>[1-4])'),
+    ('year', _YEAR),
+)
+
+_NOISE = re.compile(r'^(?:the|of)\s+|[\s?!.,]+$')
+
+
+@lru_cache(maxsize=None)
+def _compiled_formats():
+    """DATE_FORMATS compiled once, on the first date rather than at import."""
+    return tuple((period, re.compile(pattern)) for period, pattern in DATE_FORMATS)
+
+
+def _fallback(text):
+    """Parse with dateutil. It is slow to import, so it is loaded on first use."""
+    from dateutil import parser
+    try:
+        day = parser.parse(text).date()
+    except OverflowError as e:
+        raise ValueError(str(e))
+    return day, day
+
+
+def _month_end(year, month):
+    if month == 12:
+        return date(year, 12, 31)
+    return date(year, month + 1, 1) - timedelta(days=1)
+
+
+def _period(kind, groups):
+    year = int(groups['year'])
+    if kind == 'year':
+        return date(year, 1, 1), date(year, 12, 31)
+    if kind == 'quarter':
+        last_month = 3 * int(groups['quarter'])
+        return date(year, last_month - 2, 1), _month_end(year, last_month)
+    month = MONTHS[groups['month_name']] if groups.get('month_name') else int(groups['month'])
+    if kind == 'month':
+        return date(year, month, 1), _month_end(year, month)
+    day = date(year, month, int(groups['day']))
+    return day, day
+
+
+@lru_cache(maxsize=DATE_PARSE_CACHE_SIZE)
+def parse_period(text):
+    """Return the first and last day (YYYY-MM-DD, inclusive) a date expression covers.
+
+    "2022" covers the year, "q3 2021" a quarter, "march 2022" or "2022-03"
+    a month and "2021-06-30" one day. Common formats are matched by the
+    compiled DATE_FORMATS; anything else goes to dateutil as a single day.
+    Memoized. Raises ValueError for text that is not a valid date.
+    """
+    normalized = _NOISE.sub('', text.strip().lower())
+    for kind, pattern in _compiled_formats():
+        match = pattern.fullmatch(normalized)
+        if match is not None:
+            first, last = _period(kind, match.groupdict())
+            break
+    else:
+        first, last = _fallback(normalized)
+    return first.isoformat(), last.isoformat()
+
+
+def comparison_bound(text, operator):
+    """The YYYY-MM-DD bound for "hired after/since/before <text>".
+
+    "after 2021" (``>``) compares with the last day of 2021, and "since
+    2021" (``>=``) and "before 2021" (``<``) with the first, so the period
+    is excluded or included as a whole.
+    """
+    first, last = parse_period(text)
+    return last if operator == '>' else first
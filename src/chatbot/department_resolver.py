@@ -0,0 +1,150 @@
+import re
+import threading
+from collections import namedtuple
+
+Department = namedtuple('Department', ['id', 'name'])
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_DIGITS = re.compile(r'\d+')
+_SUFFIXES = ('department', 'dept', 'team')
+MAX_MEMO_ENTRIES = 4096
+
+
+def normalize(text):
+    """Lowercase, collapse punctuation/whitespace and drop a trailing 'department'."""
+    tokens = _NON_ALNUM.sub(' ', text.lower()).split()
+    while len(tokens) > 1 and tokens[-1] in _SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(text):
+    """Typos tolerated for a name of this length."""
+    return 0 if len(text) < 4 else 1 if len(text) < 8 else 2 if len(text) < 16 else 3
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, or limit + 1 once it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class DepartmentResolver:
+    """Maps free text such as "custmer support" to a row of the departments table.
+
+    Built from the catalog snapshot on first use and rebuilt when the
+    department list changes. The word n-grams of the text are tried longest
+    first, each as a dict probe and then as a typo lookup through a trigram
+    inverted index: a name within k edits shares all but at most 3k of the
+    query's trigrams, so only the postings of the 3k + 1 rarest query
+    trigrams are read to collect candidates, which are filtered by length
+    and trigram overlap before a bounded edit distance. Cost depends on the
+    posting sizes, not the number of departments.
+    Numbers are never corrected: "division 12" does not resolve to "division 13".
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._rows = None
+        self._departments = []
+        self._exact = {}
+        self._postings = {}
+        self._max_length = 0
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def _index(self):
+        rows = self.catalog.department_rows()
+        if rows is self._rows:
+            return
+        with self._lock:
+            if rows is self._rows:
+                return
+            departments, exact, postings = [], {}, {}
+            for dept_id, name in rows:
+                key = normalize(name)
+                if not key or key in exact:
+                    continue
+                grams = trigrams(key)
+                exact[key] = len(departments)
+                for gram in grams:
+                    postings.setdefault(gram, []).append(len(departments))
+                departments.append((Department(dept_id, name), key, grams))
+            self._departments, self._exact, self._postings = departments, exact, postings
+            self._max_length = max((len(key) for key in exact), default=0)
+            self._memo = {}
+            self._rows = rows
+
+    def __len__(self):
+        self._index()
+        return len(self._departments)
+
+    def resolve(self, text):
+        """Return the Department meant by ``text``, or None if nothing is close."""
+        self._index()
+        memo = self._memo
+        if text in memo:
+            return memo[text]
+        department = self._resolve(text)
+        if len(memo) >= MAX_MEMO_ENTRIES:
+            memo.clear()
+        memo[text] = department
+        return department
+
+    def _resolve(self, text):
+        words = normalize(text).split()
+        for size in range(len(words), 0, -1):
+            phrases = [' '.join(words[start:start + size])
+                       for start in range(len(words) - size + 1)]
+            for phrase in phrases:
+                index = self._exact.get(phrase)
+                if index is not None:
+                    return self._departments[index][0]
+            best = None
+            for phrase in phrases:
+                match = self._closest(phrase)
+                if match is not None and (best is None or match[0] < best[0]):
+                    best = match
+            if best is not None:
+                return best[1]
+        return None
+
+    def _closest(self, phrase):
+        """Return (edits, Department) for the nearest name within max_edits(phrase)."""
+        limit = max_edits(phrase)
+        if not limit or len(phrase) > self._max_length + limit:
+            return None
+        query_grams = trigrams(phrase)
+        grams = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+        candidates = set()
+        for gram in grams[:3 * limit + 1]:
+            candidates.update(self._postings.get(gram, ()))
+
+        min_shared = len(query_grams) - 3 * limit
+        numbers = _DIGITS.findall(phrase)
+        best = None
+        for index in sorted(candidates):
+            department, key, key_grams = self._departments[index]
+            if (abs(len(key) - len(phrase)) > limit
+                    or len(query_grams & key_grams) < min_shared
+                    or _DIGITS.findall(key) != numbers):
+                continue
+            distance = edit_distance(phrase, key, limit if best is None else best[0] - 1)
+            if distance <= limit and (best is None or distance < best[0]):
+                best = (distance, department)
+        return best
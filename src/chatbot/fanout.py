@@ -0,0 +1,354 @@
+import heapq
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice, zip_longest
+from operator import itemgetter
+from config import FANOUT_WORKERS, ANALYTICS_ENGINE, SEARCH_LIMIT
+from ..database.aggregates import combine_stats
+from ..database.parallel_loader import expand_paths
+from ..instrumentation.metrics import METRICS
+from .intent_parser import DEFAULT_PARSER
+from .query_handler import QueryHandler, InvalidQuery
+from .response_formatter import ResponseFormatter
+from .result_cache import ResultCache
+
+# One database's part of an answer: the rows it contributed and how long it
+# took. ``error`` is set when it failed; the other databases still answer.
+ShardTiming = namedtuple('ShardTiming', ['source', 'rows', 'seconds', 'error'])
+
+# A merged response with the timing of every database that was asked.
+FanOutAnswer = namedtuple('FanOutAnswer', ['response', 'timings'])
+
+LISTING_KINDS = frozenset({'department', 'all_managers', 'hired', 'hired_range', 'salary'})
+
+# Sort order of each non-paged listing statement as (key, reverse) over its
+# tuple rows (see queries.py), so per-database results can be k-way merged.
+# Department names sort case-insensitively, like their NOCASE column.
+MERGE_ORDER = {
+    'department_employees': (itemgetter(1), False),
+    'all_managers': (lambda row: (row[2].lower(), row[1]), False),
+    'hired_after': (itemgetter(3), False),
+    'hired_since': (itemgetter(3), False),
+    'hired_before': (itemgetter(3), False),
+    'hired_between': (itemgetter(3), False),
+    'salary_above': (itemgetter(3), True),
+    'salary_below': (itemgetter(3), True),
+}
+
+FOLLOW_UP_MESSAGE = ("Follow-up questions and paging are not available across databases. "
+                     "Ask a complete question instead.")
+
+
+def expand_databases(spec):
+    """Return the database files for a directory (its *.db files), a glob, a path or a list."""
+    paths = expand_paths(spec, '*.db')
+    missing = [str(path) for path in paths if not path.is_file()]
+    if missing:
+        raise ValueError(f"Database file not found: {', '.join(missing)}")
+    if not paths:
+        raise ValueError(f"No database files match {spec!r}.")
+    return paths
+
+
+def _tagged(source, rows):
+    """Prefix each tuple row's first column (the first name) with its source."""
+    tag = f"[{source}] "
+    for row in rows:
+        yield (tag + row[0],) + row[1:]
+
+
+def _tagged_dicts(source, rows):
+    return [dict(row, first_name=f"[{source}] {row['first_name']}") for row in rows]
+
+
+class FanOutQueryHandler:
+    """Answers questions across many company databases, one file per subsidiary.
+
+    Every database gets its own QueryHandler, since connection pools,
+    department ids and aggregate tables are per file. A question is parsed
+    once and each database's part runs on a thread pool (sqlite3 releases
+    the GIL while a statement runs), so an answer costs about as much as
+    the slowest database rather than the sum of all of them. The parts are
+    merged here: listings by a k-way merge in their statement's order,
+    with each row tagged "[source]"; headcounts and salary sums are added,
+    so averages are weighted by headcount; a median is read from each
+    database's salaries in the window around the middle; histograms are
+    added per period.
+
+    Listings are returned whole, and follow-up questions (next page,
+    refinements, "their average salary") are not supported.
+    """
+
+    def __init__(self, databases, workers=FANOUT_WORKERS, engine=ANALYTICS_ENGINE):
+        self.shards = {}
+        for path in expand_databases(databases):
+            source = path.stem if path.stem not in self.shards else str(path)
+            self.shards[source] = QueryHandler(page_size=0, db_path=path, engine=engine)
+        self.formatter = ResponseFormatter()
+        self.parser = DEFAULT_PARSER
+        self.cache = ResultCache(version_source=self.data_version)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, min(workers, len(self.shards))),
+                                           thread_name_prefix='fanout')
+        self._handlers = {
+            'department_manager': self._handle_manager_query,
+            'hire_histogram': self._handle_hire_histogram,
+            'average_salary': self._handle_statistic,
+            'salary_stat': self._handle_statistic,
+            'headcount': self._handle_headcount_query,
+            'find_employee': self._handle_find_employee,
+        }
+
+    def data_version(self):
+        """The data versions of all databases; any write changes it."""
+        return tuple(shard.db.data_version() for shard in self.shards.values())
+
+    def cache_stats(self):
+        """Return result cache hit/miss/eviction counters."""
+        return self.cache.stats()
+
+    def stats(self):
+        """Return pipeline metrics, the merged-answer cache and every database's stats."""
+        return {
+            'metrics': METRICS.snapshot(),
+            'cache': self.cache.stats(),
+            'shards': {source: {name: value for name, value in shard.stats().items()
+                                if name != 'metrics'}
+                       for source, shard in self.shards.items()},
+        }
+
+    def close(self):
+        """Stop the worker threads and close every database's connection pool."""
+        self.executor.shutdown(wait=True)
+        for shard in self.shards.values():
+            shard.close()
+
+    def process_query(self, query, session_id=None):
+        """Answer a question across every database; see answer() for the timings."""
+        return self.answer(query).response
+
+    def stream_query(self, query, session_id=None):
+        """Yield the response; merged answers are built whole, so in one piece."""
+        yield self.process_query(query, session_id)
+
+    def process_queries(self, queries):
+        """Answer many questions; return the responses in input order."""
+        return [self.process_query(query) for query in queries]
+
+    def answer(self, query):
+        """Return a FanOutAnswer: the merged response and each database's timing.
+
+        Answers from the result cache come without timings.
+        """
+        query = ' '.join(query.lower().split())
+        try:
+            with METRICS.timer('parse'):
+                intent = self.parser.parse(query)
+            if intent.kind in ('help', 'exit'):
+                return FanOutAnswer(self._help_or_exit(intent.kind, query), ())
+            if intent.kind in ('next_page', 'context_stat') or intent.kind.startswith('refine_'):
+                return FanOutAnswer(FOLLOW_UP_MESSAGE, ())
+            if intent.kind in LISTING_KINDS:
+                handler = self._handle_listing
+            elif intent.kind in self._handlers:
+                handler = self._handlers[intent.kind]
+            else:
+                return FanOutAnswer(
+                    "I don't understand that query. Type 'help' for available commands.", ())
+            with METRICS.timer('cache'):
+                cached = self.cache.get(intent)
+            if cached is not None:
+                return FanOutAnswer(cached, ())
+            version = self.cache.version()
+            with METRICS.timer('total'):
+                response, timings = handler(intent)
+            failed = self.formatter.format_failed_shards(timings)
+            if not failed:
+                self.cache.put(intent, response, version)
+            return FanOutAnswer(response + failed, tuple(timings))
+        except InvalidQuery as e:
+            return FanOutAnswer(str(e), ())
+        except Exception as e:
+            return FanOutAnswer(f"An error occurred: {str(e)}", ())
+
+    def _help_or_exit(self, kind, query):
+        if kind == 'exit':
+            return "Goodbye!"
+        shard = next(iter(self.shards.values()))
+        return (shard.process_query(query) +
+                f"\nDatabases: {', '.join(self.shards)} (follow-up questions are not "
+                "available across databases)")
+
+    def _gather(self, part, count=len, shards=None):
+        """Run ``part(shard)`` on every database (or those in ``shards``) at once.
+
+        Returns ({source: result}, [ShardTiming]). A database that does not
+        know the question's department (InvalidQuery) contributes nothing;
+        if no database answers, the first error is raised.
+        """
+        def timed(shard):
+            start = time.perf_counter()
+            try:
+                result, error = part(shard), None
+            except Exception as e:
+                result, error = None, e
+            return result, error, time.perf_counter() - start
+
+        futures = {source: self.executor.submit(timed, shard)
+                   for source, shard in (shards or self.shards).items()}
+        results, timings, errors = {}, [], []
+        for source, future in futures.items():
+            result, error, seconds = future.result()
+            METRICS.observe(f'shard:{source}', seconds)
+            if error is None:
+                results[source] = result
+                timings.append(ShardTiming(source, count(result), seconds, None))
+            else:
+                errors.append(error)
+                timings.append(ShardTiming(source, 0, seconds,
+                                           None if isinstance(error, InvalidQuery) else str(error)))
+        if not results and errors:
+            raise errors[0]
+        return results, timings
+
+    def _handle_listing(self, intent):
+        """Merge each database's listing rows into one listing, tagged by source."""
+        results, timings = self._gather(
+            lambda shard: shard.listing_rows(shard.resolve_department(intent)),
+            count=lambda result: len(result[1]))
+        listing = next(iter(results.values()))[0]
+        key, reverse = MERGE_ORDER[listing.statement]
+        rows = heapq.merge(*(_tagged(source, rows) for source, (_, rows) in results.items()),
+                           key=key, reverse=reverse)
+        return ''.join(listing.render(rows, *listing.render_args)), timings
+
+    def _handle_manager_query(self, intent):
+        """Every database's manager of the department, one line each."""
+        if not intent.department:
+            raise InvalidQuery("Please specify a department name.")
+
+        def managers(shard):
+            resolved = shard.resolve_department(intent)
+            return resolved.department, shard.manager_rows(resolved)
+
+        results, timings = self._gather(managers, count=lambda result: len(result[1]))
+        response = ''.join(self.formatter.format_department_manager(_tagged_dicts(source, rows),
+                                                                    department)
+                           for source, (department, rows) in results.items() if rows)
+        if not response:
+            department = next(iter(results.values()))[0]
+            response = self.formatter.format_department_manager([], department)
+        return response, timings
+
+    def _handle_hire_histogram(self, intent):
+        """Hires per period, added up across databases."""
+        def histogram(shard):
+            resolved = shard.resolve_department(intent)
+            return resolved.department, shard.hire_histogram_rows(resolved)
+
+        results, timings = self._gather(histogram, count=lambda result: len(result[1]))
+        hires = Counter()
+        for _, rows in results.values():
+            for period, count in rows:
+                # Years read from department_hire_years are integers.
+                hires[str(period)] += count
+        department = next(iter(results.values()))[0]
+        return (self.formatter.format_hire_histogram(sorted(hires.items()), intent.value,
+                                                     department),
+                timings)
+
+    def _department_stats(self, intent):
+        """Return (department, per-database stats dicts, timings) for the intent."""
+        def stats(shard):
+            resolved = shard.resolve_department(intent)
+            return resolved.department, shard.statistics.department_stats(resolved.department)
+
+        results, timings = self._gather(stats, count=lambda result: 1)
+        department = next(iter(results.values()))[0]
+        return department, {source: result[1] for source, result in results.items()}, timings
+
+    def _handle_statistic(self, intent):
+        """Average, minimum, maximum or median salary over every database's employees."""
+        department, by_source, timings = self._department_stats(intent)
+        stats = combine_stats([stats for stats in by_source.values() if stats['headcount']])
+        count = stats['headcount']
+        if intent.kind == 'average_salary':
+            average = stats['salary_sum'] / count if count else 0
+            return self.formatter.format_average_salary(average, department, count), timings
+        if intent.operator != 'median':
+            return (self.formatter.format_salary_statistic(
+                intent.operator, stats[f'salary_{intent.operator}'], department, count),
+                timings)
+        median, more_timings = self._median(intent, by_source, count)
+        return (self.formatter.format_salary_statistic('median', median, department, count),
+                _add_timings(timings, more_timings))
+
+    def _median(self, intent, by_source, count):
+        """The median of ``count`` salaries spread over the databases in ``by_source``.
+
+        It lies between the lowest lower-middle and the highest upper-middle
+        salary of the databases, so each one reports its middle salaries,
+        then how many of its salaries are below that window and the ones
+        inside it. Only the window is merged; for databases with similar
+        salaries it is small.
+        """
+        if not count:
+            return None, []
+        shards = {source: self.shards[source] for source, stats in by_source.items()
+                  if stats['headcount']}
+
+        def middle(shard):
+            return shard.aggregates.middle_salaries(shard.resolve_department(intent).department)
+
+        middles, timings = self._gather(middle, count=lambda _: 2, shards=shards)
+        bounds = [bounds for bounds in middles.values() if bounds[0] is not None]
+        low = min(lower for lower, _ in bounds)
+        high = max(upper for _, upper in bounds)
+
+        def window(shard):
+            resolved = shard.resolve_department(intent)
+            return shard.aggregates.salaries_between(low, high, resolved.department)
+
+        windows, more_timings = self._gather(window, count=lambda result: len(result[1]),
+                                             shards=shards)
+        below = sum(result[0] for result in windows.values())
+        merged = heapq.merge(*(salaries for _, salaries in windows.values()))
+        values = list(islice(merged, (count - 1) // 2 - below, count // 2 - below + 1))
+        return sum(values) / len(values), _add_timings(timings, more_timings)
+
+    def _handle_headcount_query(self, intent):
+        """Headcount of a department, or per department, over every database."""
+        if intent.department:
+            department, by_source, timings = self._department_stats(intent)
+            count = sum(stats['headcount'] for stats in by_source.values())
+            return self.formatter.format_headcount(count, department), timings
+        results, timings = self._gather(lambda shard: shard.statistics.all_department_stats())
+        by_department = {}
+        for rows in results.values():
+            for row in rows:
+                by_department.setdefault(row['department'].lower(), []).append(row)
+        merged = [dict(combine_stats(rows), department=rows[0]['department'])
+                  for _, rows in sorted(by_department.items())]
+        return self.formatter.format_headcounts(merged), timings
+
+    def _handle_find_employee(self, intent):
+        """Name matches from every database, taken in turn from each one's best."""
+        results, timings = self._gather(lambda shard: shard.search_rows(intent))
+        ranked = chain.from_iterable(zip_longest(*(_tagged_dicts(source, rows)
+                                                   for source, rows in results.items())))
+        matches = list(islice((row for row in ranked if row is not None), SEARCH_LIMIT))
+        return self.formatter.format_search_results(matches, intent.value), timings
+
+
+def _add_timings(first, second):
+    """Sum two rounds of timings per database (rows and seconds)."""
+    later = {timing.source: timing for timing in second}
+    combined = []
+    for timing in first:
+        extra = later.get(timing.source)
+        if extra is not None:
+            timing = timing._replace(rows=timing.rows + extra.rows,
+                                     seconds=timing.seconds + extra.seconds,
+                                     error=timing.error or extra.error)
+        combined.append(timing)
+    return combined
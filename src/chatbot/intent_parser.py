@@ -0,0 +1,164 @@
+import re
+from collections import namedtuple
+
+# Parsed user request. ``kind`` selects the QueryHandler handler; the other
+# fields are the normalized parameters (and together form the cache key).
+Intent = namedtuple('Intent', ['kind', 'department', 'operator', 'value'])
+Intent.__new__.__defaults__ = (None, None, None)
+
+UNKNOWN = Intent('unknown')
+
+_OPERATORS = {
+    'above': '>', 'over': '>', 'more than': '>', 'greater than': '>',
+    'after': '>', 'since': '>=',
+    'below': '<', 'under': '<', 'less than': '<', 'before': '<',
+    'minimum': 'min', 'lowest': 'min', 'min': 'min',
+    'maximum': 'max', 'highest': 'max', 'max': 'max',
+    'median': 'median', 'average': 'avg', 'avg': 'avg',
+}
+
+# A department name of up to five words. The first word may not be a filler
+# word, so in "average salary in customer support department" the capture
+# starts at "customer"; DepartmentResolver maps the text to a real name.
+_FILLER = r'(?:show|list|who|is|what|whats|the|a|by|per|each|every|in|for|of|all|' \
+          r'employees|salary|salaries|pay)\b'
+_DEPT = r'(?P<department>(?!' + _FILLER + r')[a-z]+(?:\s+[a-z0-9]+){0,4}?)'
+_DEPARTMENT = r'(?:department|dept)\b'
+_IN_DEPT = r'(?:.*?\b' + _DEPT + r'\s+' + _DEPARTMENT + r')?'
+# ...or named first: "engineering department average salary".
+_DEPT_FIRST = r'\b' + _DEPT + r'\s+' + _DEPARTMENT + r'\s+(?:the\s+)?'
+
+# Follow-ups to the previous listing ("only those hired after 2021",
+# "and their average salary?", "how many of them").
+_ONLY = r'^(?:and\s+)?(?:only|just)\b.*?'
+_STAT = r'(?P<operator>average|avg|minimum|min|lowest|maximum|max|highest|median)'
+_THEM = r'(?:them|those|these)'
+
+# "find employee john smi": a name lookup, unless it reads like a listing
+# or names nobody ("find employee").
+_PEOPLE = r'(?:employee|employees|person|people|staff)'
+
+# (kind, trigger keywords, pattern, default operator). Patterns are tried in
+# table order, but only those whose trigger keyword occurs in the query, so
+# the cost of a parse does not depend on the size of the table.
+INTENT_PATTERNS = (
+    ('help', ('help',), r'^help$', None),
+    ('exit', ('exit',), r'^exit$', None),
+    ('next_page', ('next', 'more'), r'^(?:show\s+)?(?:the\s+)?(?:next(?:\s+page)?|more)$', None),
+    ('find_employee', ('find', 'search', 'lookup', 'look'),
+     r'^(?:find|search(?:\s+for)?|look\s*up)\s+(?!for\b)(?:an?\s+)?'
+     r'(?!(?:' + _PEOPLE + r'\s+)?(?:in|with|hired|the|all|managers?)\b)'
+     r'(?:' + _PEOPLE + r'\s+)?(?:named\s+|called\s+)?(?!' + _PEOPLE + r'[?!.]*$)'
+     r'(?P<value>[^?!]+?)[?!.]*$', None),
+    ('refine_hired', ('only', 'just'),
+     _ONLY + r'\bhired\s+(?P<operator>after|since|before)\s+(?P<value>.+?)[?!.]*$', None),
+    ('refine_salary', ('only', 'just'),
+     _ONLY + r'\b(?P<operator>above|over|more than|greater than|below|under|less than)'
+     r'\s+\$?(?P<value>\d[\d,]*)', None),
+    ('refine_department', ('only', 'just'),
+     _ONLY + r'\bin\s+(?:the\s+)?' + _DEPT
+     + r'(?=\s+' + _DEPARTMENT + r'|[^a-z0-9]*$)', None),
+    ('context_stat', ('their',), r'\btheir\s+' + _STAT + r'\b', None),
+    ('context_stat', ('them', 'those', 'these'),
+     r'\b' + _STAT + r'\s+(?:salary|salaries|pay)\s+(?:of|for|among)\s+' + _THEM + r'\b', None),
+    ('context_stat', ('them', 'those', 'these', 'there'),
+     r'\bhow many\s+(?:of\s+' + _THEM + r'|' + _THEM + r'|are there)\b', 'count'),
+    ('average_salary', ('average', 'avg'), _DEPT_FIRST + r'(?:average|avg)\b', None),
+    ('average_salary', ('average', 'avg'), r'\b(?:average|avg)\b' + _IN_DEPT, None),
+    ('salary_stat', ('minimum', 'min', 'lowest', 'maximum', 'max', 'highest', 'median'),
+     _DEPT_FIRST + r'(?P<operator>minimum|min|lowest|maximum|max|highest|median)'
+     r'\s+(?:salary|salaries|pay)\b', None),
+    ('salary_stat', ('minimum', 'min', 'lowest', 'maximum', 'max', 'highest', 'median'),
+     r'\b(?P<operator>minimum|min|lowest|maximum|max|highest|median)\s+(?:salary|salaries|pay)\b'
+     + _IN_DEPT, None),
+    ('headcount', ('headcount', 'count', 'number'),
+     _DEPT_FIRST + r'(?:headcount|employee count|number of employees)\b', None),
+    ('headcount', ('headcount', 'many', 'count', 'number'),
+     r'\b(?:headcount|how many employees|employee count|number of employees)\b' + _IN_DEPT, None),
+    ('hire_histogram', ('hires', 'hired', 'hiring'),
+     r'\b(?:hires|hired|hiring)\s+(?:per|by|each)\s+(?P<value>year|quarter|month)\b'
+     + _IN_DEPT, None),
+    ('hired_range', ('hired',),
+     r'\bhired\s+(?:between|from)\s+(?P<value>.+?)\s+(?:and|to|until|through)\s+'
+     r'(?P<end>.+?)[?!.]*$', None),
+    ('hired_range', ('hired',),
+     r'\bhired\s+(?:in|during)\s+(?P<value>[^?!]*\d{4}[^?!]*?)[?!.]*$', None),
+    ('hired', ('hired',),
+     r'\bhired\s+(?P<operator>after|since|before)\s+(?P<value>.+)$', None),
+    ('hired', ('hired',), r'\bhired\b', None),
+    ('salary', ('salary', 'salaries', 'earning', 'paid'),
+     r'\b(?P<operator>above|over|more than|greater than|below|under|less than)'
+     r'\s+\$?(?P<value>\d[\d,]*)', None),
+    ('salary', ('salary', 'salaries'), r'(?P<value>\d[\d,]*)', '<'),
+    ('salary', ('salary', 'salaries'), r'\bsalar', None),
+    ('all_managers', ('managers',), r'\b(?:list|show)?\s*(?:all\s+)?managers\b', None),
+    ('department_manager', ('manager',),
+     r'\bmanager\s+(?:of|for)\s+(?:the\s+)?' + _DEPT
+     + r'(?=\s+' + _DEPARTMENT + r'|[^a-z0-9]*$)', None),
+    ('department_manager', ('manager',),
+     r'\b' + _DEPT + r'\s+(?:' + _DEPARTMENT + r'\s+)?manager\b', None),
+    ('department_manager', ('manager',), r'\bmanager\b', None),
+    ('department', ('department', 'dept'), r'\b' + _DEPT + r'\s+' + _DEPARTMENT, None),
+    ('department', ('department', 'dept'), r'\b' + _DEPARTMENT, None),
+)
+
+_TOKEN_SPLIT = re.compile(r'[^a-z0-9]+')
+
+# Larger amounts do not fit an SQLite INTEGER; they parse as no amount.
+_MAX_SALARY = 2 ** 63 - 1
+
+
+class IntentParser:
+    """Single-pass parser from normalized query text to an ``Intent``.
+
+    The pattern table is compiled once and indexed by trigger keyword, so
+    routing is a dict lookup per query token followed by the few patterns
+    that keyword selects.
+    """
+
+    def __init__(self, patterns=INTENT_PATTERNS):
+        self._by_keyword = {}
+        for order, (kind, keywords, pattern, operator) in enumerate(patterns):
+            entry = (order, kind, re.compile(pattern), operator)
+            for keyword in keywords:
+                self._by_keyword.setdefault(keyword, []).append(entry)
+
+    def parse(self, query):
+        """Return the Intent for a lowercased, whitespace-collapsed query."""
+        candidates = []
+        seen = set()
+        for token in _TOKEN_SPLIT.split(query):
+            if token in seen:
+                continue
+            seen.add(token)
+            entries = self._by_keyword.get(token)
+            if entries:
+                candidates.extend(entries)
+        if not candidates:
+            return UNKNOWN
+
+        candidates.sort(key=lambda entry: entry[0])
+        for _, kind, regex, default_operator in candidates:
+            match = regex.search(query)
+            if match is None:
+                continue
+            groups = match.groupdict()
+            operator = groups.get('operator')
+            value = groups.get('value')
+            if value is not None and kind in ('salary', 'refine_salary'):
+                value = int(value.replace(',', ''))
+                if value > _MAX_SALARY:
+                    value = None
+            elif kind == 'hired_range':
+                # (start, end) expressions; "hired in 2022" is 2022 to 2022.
+                value = (value, groups.get('end') or value)
+            return Intent(
+                kind,
+                groups.get('department'),
+                _OPERATORS.get(operator, operator) or default_operator,
+                value,
+            )
+        return UNKNOWN
+
+
+DEFAULT_PARSER = IntentParser()
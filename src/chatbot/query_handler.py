@@ -1,174 +1,702 @@
-from dateutil import parser
+import json
+import sys
+import time
+from array import array
+from collections import namedtuple
+from itertools import chain
+from functools import partial
+from config import PAGE_SIZE, ANALYTICS_ENGINE, SERVE_FROM_SNAPSHOT
 from ..database.db_manager import DatabaseManager
+from ..database import queries
+from ..database.aggregates import AggregateStore, empty_stats, combine_stats
+from ..database.catalog import SchemaCatalog
+from ..database.name_search import NameSearch
+from ..database.schema import upgrade_schema
+from ..instrumentation.metrics import METRICS
 from .response_formatter import ResponseFormatter
+from .result_cache import ResultCache
+from .session_store import Session, SessionStore
+from .intent_parser import DEFAULT_PARSER
+from .date_parser import parse_period, comparison_bound
+from .department_resolver import DepartmentResolver
+
+# How to run and render a listing intent. ``statement`` names the catalog
+# query (queries.STATEMENTS); ``page_statement``/``sort_key``/``start``
+# describe its keyset-paginated variant (sort_key is None if not pageable).
+# ``rows``, when set, replaces the SQL: rows(after=None, limit=None) yields
+# the rows from the columnar engine. ``statement`` and ``params`` are still
+# set then, for the id statement behind follow-up questions.
+Listing = namedtuple('Listing', ['statement', 'params', 'render', 'render_args',
+                                 'page_statement', 'sort_key', 'start', 'rows'])
+Listing.__new__.__defaults__ = (None,)
+
+# How a hire-date comparison operator reads in responses.
+_HIRED_WORDS = {'>': 'after', '>=': 'since', '<': 'before'}
+
+
+def _json_ids(ids):
+    """Employee ids as the JSON array the context_* statements take."""
+    return f"[{','.join(map(str, ids))}]"
+
+
+def _range_label(value):
+    """Phrase a hired_range intent value: "in 2022" or "between 2020 and 2021-06-30"."""
+    start, end = value
+    return f"in {start}" if start == end else f"between {start} and {end}"
+
+
+class InvalidQuery(Exception):
+    """Raised by handlers when the query is missing a required parameter."""
+
 
 class QueryHandler:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, page_size=PAGE_SIZE, db_path=None, engine=ANALYTICS_ENGINE,
+                 snapshot=SERVE_FROM_SNAPSHOT):
+        if snapshot:
+            from ..database.replica import SnapshotDatabaseManager
+            self.db = SnapshotDatabaseManager(db_path)
+        else:
+            self.db = DatabaseManager(db_path)
+        # An older database file is migrated before its first query.
+        upgrade_schema(self.db.db_path)
         self.formatter = ResponseFormatter()
+        self.catalog = SchemaCatalog(self.db)
+        self.aggregates = AggregateStore(self.db, self.catalog)
+        self.departments = DepartmentResolver(self.catalog)
+        self.names = NameSearch(self.db, self.catalog)
+        self.analytics = None
+        if engine == 'columnar':
+            # numpy is optional and only imported when the engine is selected.
+            from ..analytics.columnar import ColumnarEngine
+            self.analytics = ColumnarEngine(self.db)
+        elif engine != 'sqlite':
+            raise ValueError(f"Unknown analytics engine {engine!r}; use 'sqlite' or 'columnar'.")
+        # Salary statistics come from the columnar engine when it is enabled.
+        self.statistics = self.analytics or self.aggregates
+        self.cache = ResultCache(version_source=self.db.data_version)
+        self.parser = DEFAULT_PARSER
+        self.page_size = page_size
+        self.sessions = SessionStore()
+        self._listings = {
+            'department': self._department_listing,
+            'all_managers': self._all_managers_listing,
+            'hired': self._hire_date_listing,
+            'hired_range': self._hire_range_listing,
+            'salary': self._salary_listing,
+        }
+        self._handlers = {
+            'department': self._handle_listing,
+            'all_managers': self._handle_listing,
+            'department_manager': self._handle_manager_query,
+            'hired': self._handle_listing,
+            'hired_range': self._handle_listing,
+            'hire_histogram': self._handle_hire_histogram,
+            'salary': self._handle_listing,
+            'average_salary': self._handle_average_salary_query,
+            'salary_stat': self._handle_salary_stat_query,
+            'headcount': self._handle_headcount_query,
+            'find_employee': self._handle_find_employee,
+        }
+        # Intent kinds answered together by process_queries, keyed by group.
+        self._batches = {
+            'department_listing': self._batch_department_listings,
+            'department_manager': self._batch_department_managers,
+            'statistics': self._batch_statistics,
+        }
+
+    def cache_stats(self):
+        """Return result cache hit/miss/eviction counters."""
+        return self.cache.stats()
 
-    def process_query(self, query):
+    def stats(self):
+        """Return pipeline metrics, result cache and connection pool stats."""
+        return {
+            'metrics': METRICS.snapshot(),
+            'cache': self.cache.stats(),
+            'pool': self.db.pool.stats(),
+            'statements': self.db.statement_stats(),
+            'sessions': self.sessions.stats(),
+        }
+
+    def close(self):
+        """Close the connection pool."""
+        self.db.close()
+
+    def process_query(self, query, session_id=None):
         """Process and route user queries to appropriate handlers."""
-        query = query.lower().strip()
-        
+        return ''.join(self._pipeline(query, session_id, stream=False))
+
+    def stream_query(self, query, session_id=None):
+        """Yield the response in pieces; listings are streamed from the cursor."""
+        return self._pipeline(query, session_id, stream=True)
+
+    def process_queries(self, queries):
+        """Answer many questions in one call; return the responses in input order.
+
+        Every question is parsed first. Department listings and manager
+        lookups are then answered by one ``IN`` query per kind, and average,
+        minimum, maximum and headcount questions by one read of the
+        per-department stats; the rest run one by one. All of it runs on one
+        pooled connection inside one read transaction. Listings are returned
+        whole, not paginated.
+        """
+        queries = list(queries)
+        responses = [None] * len(queries)
+        groups = {}
+        version = self.cache.version()
+        with self.db.read_transaction():
+            for index, query in enumerate(queries):
+                try:
+                    with METRICS.timer('parse'):
+                        intent = self.resolve_department(
+                            self.parser.parse(' '.join(query.lower().split())))
+                except InvalidQuery as e:
+                    responses[index] = str(e)
+                    continue
+                if intent.kind not in self._handlers:
+                    # help, exit, next page and unknown questions.
+                    responses[index] = self.process_query(query)
+                    continue
+                with METRICS.timer('cache'):
+                    responses[index] = self.cache.get(intent)
+                if responses[index] is None:
+                    members = groups.setdefault(self._batch_group(intent), {})
+                    members.setdefault(intent, []).append(index)
+
+            for group, members in groups.items():
+                answers, error = {}, None
+                if group is not None:
+                    try:
+                        answers = self._batches[group](list(members))
+                    except Exception as e:
+                        error = f"An error occurred: {str(e)}"
+                for intent, indexes in members.items():
+                    if error is not None:
+                        response = error
+                    elif intent in answers:
+                        response = answers[intent]
+                        self.cache.put(intent, response, version)
+                    else:
+                        response = self._batch_answer(intent, version)
+                    for index in indexes:
+                        responses[index] = response
+        return responses
+
+    @staticmethod
+    def _batch_group(intent):
+        """Return the process_queries group for an intent, or None to answer it alone."""
+        if intent.kind == 'department' and intent.department:
+            return 'department_listing'
+        if intent.kind == 'department_manager' and intent.department:
+            return 'department_manager'
+        if intent.kind in ('average_salary', 'headcount'):
+            return 'statistics'
+        if intent.kind == 'salary_stat' and intent.operator != 'median':
+            return 'statistics'
+        return None
+
+    def _batch_answer(self, intent, version):
+        """Answer one intent of a batch on its own (listings unpaginated)."""
+        handler = (self._handle_listing if intent.kind in self._listings
+                   else self._handlers[intent.kind])
         try:
-            if query == 'help':
-                return self._get_help_message()
-            elif query == 'exit':
-                return "Goodbye!"
-            elif "show" in query and "department" in query:
-                return self._handle_department_query(query)
-            elif "manager" in query:
-                return self._handle_manager_query(query)
-            elif "hired" in query:
-                return self._handle_hire_date_query(query)
-            elif "salary" in query:
-                return self._handle_salary_query(query)
-            elif "average" in query:
-                return self._handle_average_salary_query(query)
-            else:
-                return "I don't understand that query. Type 'help' for available commands."
+            response = handler(intent)
+        except InvalidQuery as e:
+            return str(e)
         except Exception as e:
             return f"An error occurred: {str(e)}"
+        self.cache.put(intent, response, version)
+        return response
+
+    def _rows_by_department(self, statement, intents):
+        """Run a batch statement for the intents' departments; rows keyed by department id."""
+        ids = sorted({self._department_id(intent.department) for intent in intents} - {None})
+        by_department = {}
+        for row in self.db.execute_statement(statement, (json.dumps(ids),)):
+            by_department.setdefault(row['department_id'], []).append(row)
+        return by_department
 
-    def _handle_department_query(self, query):
-        """Handle queries about employees in a specific department."""
-        words = query.split()
+    def _batch_department_listings(self, intents):
+        employees = self._rows_by_department('departments_employees', intents)
+        return {
+            intent: self.formatter.format_employee_list(
+                employees.get(self._department_id(intent.department), ()), intent.department)
+            for intent in intents
+        }
+
+    def _batch_department_managers(self, intents):
+        managers = self._rows_by_department('departments_managers', intents)
+        return {
+            intent: self.formatter.format_department_manager(
+                managers.get(self._department_id(intent.department), []), intent.department)
+            for intent in intents
+        }
+
+    def _batch_statistics(self, intents):
+        rows = self.statistics.all_department_stats()
+        by_department = {row['department'].lower(): row for row in rows}
+        company = combine_stats(rows)
+        answers = {}
+        for intent in intents:
+            dept = intent.department
+            stats = (by_department.get(dept.lower()) or empty_stats(dept)) if dept else company
+            count = stats['headcount']
+            if intent.kind == 'headcount':
+                answers[intent] = (self.formatter.format_headcount(count, dept) if dept
+                                   else self.formatter.format_headcounts(rows))
+            elif intent.kind == 'average_salary':
+                average = stats['salary_sum'] / count if count else 0
+                answers[intent] = self.formatter.format_average_salary(average, dept, count)
+            else:
+                answers[intent] = self.formatter.format_salary_statistic(
+                    intent.operator, stats[f'salary_{intent.operator}'], dept, count)
+        return answers
+
+    def _pipeline(self, query, session_id, stream):
+        pieces = self._respond(query, session_id, stream)
+        if not METRICS.enabled:
+            return pieces
+        return self._measured(pieces)
+
+    def _measured(self, pieces):
+        """Time only the work done inside the pipeline, not the consumer's."""
+        trace = {}
+        elapsed = 0.0
+        size = 0
+        while True:
+            start = time.perf_counter()
+            with METRICS.trace(trace):
+                piece = next(pieces, None)
+            elapsed += time.perf_counter() - start
+            if piece is None:
+                break
+            size += len(piece)
+            yield piece
+
+        # Whatever is not routing, caching, date parsing or SQLite is
+        # response building.
+        accounted = sum(trace.get(stage, 0.0) for stage in
+                        ('parse', 'cache', 'date_parse', 'analytics', 'db_acquire',
+                         'db_execute'))
+        METRICS.observe('format', max(0.0, elapsed - accounted))
+        METRICS.observe('total', elapsed)
+        METRICS.count('bytes_formatted', size)
+
+    def _respond(self, query, session_id, stream):
+        query = ' '.join(query.lower().split())
+        
         try:
-            dept_idx = words.index("department") - 1
-            if dept_idx < 0:
-                return "Please specify a department name."
-            
-            dept = words[dept_idx]
-            results = self.db.execute_query(
-                """
-                SELECT first_name, last_name, salary, hire_date 
-                FROM employees 
-                WHERE LOWER(department) = ? 
-                ORDER BY last_name
-                """,
-                (dept,)
-            )
-            return self.formatter.format_employee_list(results, dept)
-        except ValueError:
-            return "Please specify a valid department name."
-
-    def _handle_manager_query(self, query):
-        """Handle queries about managers."""
-        if "list all" in query:
-            results = self.db.execute_query(
-                """
-                SELECT DISTINCT e.first_name, e.last_name, e.department
-                FROM employees e
-                WHERE e.is_manager = 'Yes'
-                ORDER BY e.department, e.last_name
-                """
-            )
-            return self.formatter.format_manager_list(results)
+            with METRICS.timer('parse'):
+                intent = self.resolve_department(self.parser.parse(query))
+            if intent.kind == 'help':
+                yield self._get_help_message()
+            elif intent.kind == 'exit':
+                yield "Goodbye!"
+            elif intent.kind == 'next_page':
+                yield self._next_page(session_id)
+            elif intent.kind.startswith('refine_'):
+                yield self._refine(intent, session_id)
+            elif intent.kind == 'context_stat':
+                yield self._context_statistic(intent, session_id)
+            elif self.page_size and intent.kind in self._listings:
+                yield self._first_page(intent, session_id)
+            elif intent.kind not in self._handlers:
+                yield "I don't understand that query. Type 'help' for available commands."
+            elif intent.kind in self._listings:
+                version = self.cache.version()
+                listing = self._remember(intent, session_id)
+                with METRICS.timer('cache'):
+                    cached = self.cache.get(intent)
+                if cached is not None:
+                    yield cached
+                elif stream:
+                    yield from self._render_listing(listing)
+                else:
+                    response = ''.join(self._render_listing(listing))
+                    self.cache.put(intent, response, version)
+                    yield response
+            else:
+                yield self._answer(intent, self._handlers[intent.kind])
+        except InvalidQuery as e:
+            yield str(e)
+        except Exception as e:
+            yield f"An error occurred: {str(e)}"
+
+    def resolve_department(self, intent):
+        """Replace the department text with the canonical name it refers to.
+
+        Databases without a departments table keep the text as typed.
+        """
+        if not intent.department or not len(self.departments):
+            return intent
+        department = self.departments.resolve(intent.department)
+        if department is None:
+            raise InvalidQuery(f"I couldn't find a department matching '{intent.department}'. "
+                               "Type 'help' to see the departments.")
+        return intent._replace(department=department.name)
+
+    def _department_id(self, department):
+        """departments.id for a resolved department name, from the catalog's id map."""
+        return self.catalog.department_id(department)
+
+    def _answer(self, intent, handler):
+        """Return the formatted answer for an intent, using the result cache."""
+        with METRICS.timer('cache'):
+            response = self.cache.get(intent)
+        if response is None:
+            version = self.cache.version()
+            response = handler(intent)
+            self.cache.put(intent, response, version)
+        return response
+
+    def _render_listing(self, listing):
+        if listing.rows is not None:
+            rows = listing.rows()
         else:
-            try:
-                dept = query.split("manager")[0].strip().split()[-1]
-                results = self.db.execute_query(
-                    """
-                    SELECT e.first_name, e.last_name
-                    FROM employees e
-                    WHERE LOWER(e.department) = ? AND e.is_manager = 'Yes'
-                    """,
-                    (dept,)
-                )
-                return self.formatter.format_department_manager(results, dept)
-            except IndexError:
-                return "Please specify a department name."
-
-    def _handle_hire_date_query(self, query):
-        """Handle queries about employee hire dates."""
-        try:
-            if "after" in query:
-                date_str = query.split("hired after")[1].strip()
-                operator = ">"
+            rows = self.db.iter_statement(listing.statement, listing.params, tuples=True)
+        return listing.render(rows, *listing.render_args)
+
+    def _handle_listing(self, intent):
+        """Handle listing intents by rendering the streamed rows into one string."""
+        return ''.join(self._render_listing(self._listings[intent.kind](intent)))
+
+    # Rows behind an answer, before formatting, for intents whose department
+    # is already resolved. FanOutQueryHandler merges them across databases.
+
+    def listing_rows(self, intent):
+        """Return (listing, rows) for a listing intent; rows are tuples from its statement."""
+        listing = self._listings[intent.kind](intent)
+        return listing, list(self.db.iter_statement(listing.statement, listing.params,
+                                                    tuples=True))
+
+    def manager_rows(self, intent):
+        """Return the department manager row(s) for an intent."""
+        return self.db.execute_statement('department_manager',
+                                         (self._department_id(intent.department),))
+
+    def hire_histogram_rows(self, intent):
+        """Return (period, hires) rows for a hire_histogram intent."""
+        bucket, dept = intent.value, intent.department
+        if bucket == 'year' and self.catalog.has_table('department_hire_years'):
+            statement = 'hire_years'
+        else:
+            statement = f'hires_per_{bucket}'
+        if dept:
+            return self.db.execute_statement(f'department_{statement}',
+                                             (self._department_id(dept),))
+        return self.db.execute_statement(statement)
+
+    def search_rows(self, intent):
+        """Return the name search matches for a find_employee intent."""
+        if not intent.value:
+            raise InvalidQuery("Please give a name to look for (e.g., 'find employee john smi').")
+        return self.names.search(intent.value)
+
+    def _first_page(self, intent, session_id):
+        """Answer a listing with its first page, using the result cache.
+
+        The page is cached with the cursor for the next one, under a key that
+        includes the page size; a hit still sets up the session for "next".
+        """
+        listing = self._remember(intent, session_id)
+        key = (intent, 'page', self.page_size)
+        with METRICS.timer('cache'):
+            cached = self.cache.get(key)
+        if cached is None:
+            version = self.cache.version()
+            if listing.sort_key is None:
+                cached = (''.join(self._render_listing(listing)), None)
             else:
-                date_str = query.split("hired before")[1].strip()
-                operator = "<"
-
-            comparison_date = parser.parse(date_str)
-            results = self.db.execute_query(
-                f"""
-                SELECT first_name, last_name, department, hire_date
-                FROM employees
-                WHERE hire_date {operator} ?
-                ORDER BY hire_date
-                """,
-                (comparison_date.strftime("%Y-%m-%d"),)
-            )
-            return self.formatter.format_hire_date_results(
-                results, date_str, "after" if operator == ">" else "before"
+                cached = self._fetch_page(listing, listing.start, 1)
+            self.cache.put(key, cached, version)
+        response, after = cached
+        self._keep_paging(session_id, listing, after, 1)
+        return response
+
+    def _next_page(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None or session.paging is None:
+            return "There are no more results. Ask a new question first."
+        listing, after, page = session.paging
+        return self._page(session_id, listing, after, page + 1)
+
+    def _page(self, session_id, listing, after, page):
+        """Fetch one keyset page and remember where the next one starts."""
+        response, after = self._fetch_page(listing, after, page)
+        self._keep_paging(session_id, listing, after, page)
+        return response
+
+    def _fetch_page(self, listing, after, page):
+        """Return (text, after) for one keyset page; after is None on the last page."""
+        if listing.rows is not None:
+            rows = list(listing.rows(after, self.page_size + 1))
+        else:
+            rows = self.db.execute_statement(
+                listing.page_statement, listing.params + after + (self.page_size + 1,)
             )
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        after = tuple(rows[-1][key] for key in listing.sort_key) if has_more else None
+
+        lines = listing.render(rows, *listing.render_args)
+        if not rows:
+            return ''.join(lines), after
+        return ''.join(chain(lines, (self.formatter.format_page_footer(page, has_more),))), after
+
+    def _keep_paging(self, session_id, listing, after, page):
+        """Record where the session's next page starts (nothing if it was the last)."""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            paging = None if after is None else (listing, after, page)
+            self.sessions.put(session_id, session._replace(paging=paging))
+
+    def _remember(self, intent, session_id):
+        """Build the listing for an intent and make it the session's context.
+
+        Without a session id nothing is kept: follow-ups get the no-context reply.
+        """
+        listing = self._listings[intent.kind](intent)
+        value = intent.department if intent.kind == 'department' else intent.value
+        self.sessions.put(session_id, Session(
+            listing, self._describe(intent.kind, intent.operator, value)))
+        return listing
+
+    def _describe(self, kind, operator, value):
+        """Phrase a listing or refinement for follow-up answers ("hired after 2021")."""
+        if kind == 'department':
+            return f"in {value.title()} department"
+        if kind == 'all_managers':
+            return "who are managers"
+        if kind == 'hired':
+            return f"hired {_HIRED_WORDS[operator]} {value}"
+        if kind == 'hired_range':
+            return f"hired {_range_label(value)}"
+        return (f"with salary {'above' if operator == '>' else 'below'} "
+                f"{self.formatter.format_currency(value)}")
+
+    def _context_ids(self, session_id, session):
+        """Return (session, ids) with the session's id list read or brought up to date.
+
+        The ids are read once from the listing's id statement and narrowed by
+        each stored filter; they are read again only after the data changed.
+        """
+        version = self.db.data_version()
+        if session.ids is not None and session.version == version:
+            return session, session.ids
+        listing = session.listing
+        ids = array('q', (row[0] for row in self.db.iter_statement(
+            f'{listing.statement}_ids', listing.params, tuples=True)))
+        for kind, operator, value in session.filters:
+            ids = self._filter_ids(ids, kind, operator, value)
+        session = session._replace(ids=ids, version=version)
+        self.sessions.put(session_id, session)
+        return session, ids
+
+    def _filter_ids(self, ids, kind, operator, value):
+        if not ids:
+            return ids
+        if kind == 'department':
+            statement = 'context_department'
+        elif kind == 'hired':
+            statement = f'context_{queries.HIRED_STATEMENTS[operator]}'
+        else:
+            statement = f'context_{queries.SALARY_STATEMENTS[operator]}'
+        rows = self.db.iter_statement(statement, (_json_ids(ids), value), tuples=True)
+        return array('q', (row[0] for row in rows))
+
+    def _refine(self, intent, session_id):
+        """Narrow the previous result set ("only those hired after 2021")."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return self.formatter.format_no_context()
+        kind = intent.kind[len('refine_'):]
+        if kind == 'department':
+            value, description_value = self._department_id(intent.department), intent.department
+        elif kind == 'hired':
+            value = self._comparison_date(intent.value, intent.operator)
+            description_value = intent.value
+        else:
+            if intent.value is None:
+                raise InvalidQuery("Please specify a valid salary amount.")
+            value = description_value = intent.value
+        session, ids = self._context_ids(session_id, session)
+        ids = self._filter_ids(ids, kind, intent.operator, value)
+        description = (f"{session.description} and "
+                       f"{self._describe(kind, intent.operator, description_value)}")
+        self.sessions.put(session_id, session._replace(
+            description=description, filters=session.filters + ((kind, intent.operator, value),),
+            ids=ids, paging=None))
+
+        listing = Listing('context_employees', (_json_ids(ids),),
+                          self.formatter.iter_context_results, (description,),
+                          'context_employees_page', ('last_name', 'id'), ('', 0))
+        if self.page_size:
+            return self._page(session_id, listing, listing.start, 1)
+        return ''.join(self._render_listing(listing))
+
+    def _context_statistic(self, intent, session_id):
+        """Answer "their average salary" / "how many of them" from the previous result set."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return self.formatter.format_no_context()
+        session, ids = self._context_ids(session_id, session)
+        count, value = len(ids), None
+        if count and intent.operator == 'median':
+            value = self.db.execute_statement('context_median_salary',
+                                              (_json_ids(ids), count, count))[0][0]
+        elif count and intent.operator != 'count':
+            _, total, low, high = self.db.execute_statement('context_salary_stats',
+                                                            (_json_ids(ids),))[0]
+            value = {'avg': total / count, 'min': low, 'max': high}[intent.operator]
+        return self.formatter.format_context_statistic(intent.operator, value,
+                                                       session.description, count)
+
+    def _department_listing(self, intent):
+        """Employees in a specific department."""
+        dept = intent.department
+        if not dept:
+            raise InvalidQuery("Please specify a department name.")
+        return Listing('department_employees', (self._department_id(dept),),
+                       self.formatter.iter_employee_list, (dept,),
+                       'department_employees_page', ('last_name', 'id'), ('', 0))
+
+    def _all_managers_listing(self, intent):
+        """Every manager, grouped by department."""
+        return Listing('all_managers', (),
+                       self.formatter.iter_manager_list, (),
+                       None, None, None)
+
+    def _comparison_date(self, text, operator):
+        """Normalize a date from the query to the YYYY-MM-DD bound for ``operator``."""
+        if not text:
+            raise InvalidQuery("Please provide a valid date format (e.g., YYYY-MM-DD).")
+        try:
+            with METRICS.timer('date_parse'):
+                return comparison_bound(text, operator)
         except ValueError:
-            return "Please provide a valid date format (e.g., YYYY-MM-DD)."
+            raise InvalidQuery("Please provide a valid date format (e.g., YYYY-MM-DD).")
 
-    def _handle_salary_query(self, query):
-        """Handle queries about employee salaries."""
+    def _hire_range(self, value):
+        """Return the inclusive (first, last) YYYY-MM-DD dates of a hired_range value."""
+        start, end = value
         try:
-            if "above" in query or "over" in query:
-                operator = ">"
-                amount = int(''.join(filter(str.isdigit, query)))
-            else:
-                operator = "<"
-                amount = int(''.join(filter(str.isdigit, query)))
-
-            results = self.db.execute_query(
-                f"""
-                SELECT first_name, last_name, department, salary
-                FROM employees
-                WHERE salary {operator} ?
-                ORDER BY salary DESC
-                """,
-                (amount,)
-            )
-            return self.formatter.format_salary_results(
-                results, amount, "above" if operator == ">" else "below"
-            )
+            with METRICS.timer('date_parse'):
+                first, last = parse_period(start)[0], parse_period(end)[1]
         except ValueError:
-            return "Please specify a valid salary amount."
-
-    def _handle_average_salary_query(self, query):
-        """Handle queries about average salaries."""
-        if "department" in query:
-            try:
-                dept = query.split("department")[0].strip().split()[-1]
-                results = self.db.execute_query(
-                    """
-                    SELECT 
-                        COALESCE(AVG(salary), 0) as avg_salary,
-                        COUNT(*) as emp_count
-                    FROM employees
-                    WHERE LOWER(department) = ?
-                    """,
-                    (dept,)
-                )
-                return self.formatter.format_average_salary(
-                    results[0]['avg_salary'], 
-                    dept, 
-                    results[0]['emp_count']
-                )
-            except IndexError:
-                return "Please specify a valid department name."
+            raise InvalidQuery("Please provide valid dates (e.g., 'hired in 2022' or "
+                               "'hired between 2020-01-01 and 2021-06-30').")
+        if first > last:
+            raise InvalidQuery(f"The range {_range_label(value)} ends before it starts.")
+        return first, last
+
+    def _hire_range_listing(self, intent):
+        """Employees hired within a date range ("hired in 2022", "hired between X and Y")."""
+        first, last = self._hire_range(intent.value)
+        return Listing('hired_between', (first, last),
+                       self.formatter.iter_hire_range_results, (_range_label(intent.value),),
+                       'hired_between_page', ('hire_date', 'id'), ('', 0))
+
+    def _hire_date_listing(self, intent):
+        """Employees filtered by hire date."""
+        comparison_date = self._comparison_date(intent.value, intent.operator)
+        comparison = _HIRED_WORDS[intent.operator]
+        statement = queries.HIRED_STATEMENTS[intent.operator]
+        if self.analytics is not None:
+            return Listing(statement, (comparison_date,), self.formatter.iter_hire_date_results,
+                           (intent.value, comparison), None,
+                           ('hire_days', 'id'), (-sys.maxsize, 0),
+                           partial(self.analytics.hire_date_rows, intent.operator,
+                                   comparison_date))
+        return Listing(statement,
+                       (comparison_date,),
+                       self.formatter.iter_hire_date_results,
+                       (intent.value, comparison),
+                       f'{statement}_page',
+                       ('hire_date', 'id'), ('', 0))
+
+    def _salary_listing(self, intent):
+        """Employees filtered by salary."""
+        if intent.value is None:
+            raise InvalidQuery("Please specify a valid salary amount.")
+        comparison = "above" if intent.operator == ">" else "below"
+        statement = queries.SALARY_STATEMENTS[intent.operator]
+        if self.analytics is not None:
+            return Listing(statement, (intent.value,), self.formatter.iter_salary_results,
+                           (intent.value, comparison), None,
+                           ('salary', 'id'), (sys.maxsize, sys.maxsize),
+                           partial(self.analytics.salary_rows, intent.operator, intent.value))
+        return Listing(statement,
+                       (intent.value,),
+                       self.formatter.iter_salary_results,
+                       (intent.value, comparison),
+                       f'{statement}_page',
+                       ('salary', 'id'), (sys.maxsize, sys.maxsize))
+
+    def _handle_manager_query(self, intent):
+        """Handle queries about the manager of a department."""
+        dept = intent.department
+        if not dept:
+            return "Please specify a department name."
+        return self.formatter.format_department_manager(self.manager_rows(intent), dept)
+
+    def _handle_hire_histogram(self, intent):
+        """Hires per year, quarter or month, company-wide or for one department."""
+        return self.formatter.format_hire_histogram(self.hire_histogram_rows(intent),
+                                                    intent.value, intent.department)
+
+    def _handle_average_salary_query(self, intent):
+        """Handle queries about average salaries (served from the aggregate store)."""
+        dept = intent.department
+        avg_salary, emp_count = self.statistics.average_salary(dept)
+        return self.formatter.format_average_salary(avg_salary, dept, emp_count)
+
+    def _handle_salary_stat_query(self, intent):
+        """Handle minimum/maximum/median salary queries."""
+        dept = intent.department
+        if intent.operator == 'median':
+            value, emp_count = self.statistics.median_salary(dept)
         else:
-            results = self.db.execute_query(
-                """
-                SELECT 
-                    COALESCE(AVG(salary), 0) as avg_salary,
-                    COUNT(*) as emp_count
-                FROM employees
-                WHERE salary IS NOT NULL
-                """
-            )
-            return self.formatter.format_average_salary(
-                results[0]['avg_salary'],
-                None,
-                results[0]['emp_count']
-            )
+            stats = self.statistics.department_stats(dept)
+            value, emp_count = stats[f'salary_{intent.operator}'], stats['headcount']
+        return self.formatter.format_salary_statistic(intent.operator, value, dept, emp_count)
+
+    def _handle_headcount_query(self, intent):
+        """Handle headcount queries, per department or for all departments."""
+        dept = intent.department
+        if dept:
+            stats = self.statistics.department_stats(dept)
+            return self.formatter.format_headcount(stats['headcount'], dept)
+        return self.formatter.format_headcounts(self.statistics.all_department_stats())
+
+    def _handle_find_employee(self, intent):
+        """Look employees up by (partial) name through the FTS5 name index."""
+        return self.formatter.format_search_results(self.search_rows(intent), intent.value)
 
     def _get_help_message(self):
         """Return help message with available commands."""
-        return 
\ No newline at end of file
+        departments = self.catalog.departments()
+        known = f"\nDepartments: {', '.join(departments)}" if departments else ""
+        return (
+            "\nAvailable commands:\n"
+            "- Show [department] department - List all employees in a department\n"
+            "- Show manager of [department] / [department] manager - Show a department's manager\n"
+            "- List all managers - Show all company managers\n"
+            "- Show employees hired after/before [date] - List employees by hire date\n"
+            "- Show employees hired in [year/quarter/month] / between [date] and [date] - "
+            "List employees hired in a date range\n"
+            "- Hires per year/quarter/month [in department department] - Hiring histogram\n"
+            "- Show employees with salary above/below [amount] - List employees by salary\n"
+            "- Show average salary - Display company-wide average salary\n"
+            "- Show average salary [department] department - Display department average salary\n"
+            "- Show minimum/maximum/median salary [in department department] - Salary statistics\n"
+            "- Headcount by department / How many employees in [department] department\n"
+            "- Find employee [name] - Look people up by first and/or last name (prefixes work)\n"
+            "- Next page - Continue a paginated listing\n"
+            "- Only those hired after [date] / with salary above [amount] / in [department] "
+            "department - Refine the last listing\n"
+            "- Their average/minimum/maximum/median salary / How many of them - "
+            "Follow-up statistics on the last listing\n"
+            "- Stats / Stats on / Stats off / Stats reset - Pipeline timings and slow queries\n"
+            "- Help - Show available commands\n"
+            "- Exit - Quit the program"
+        ) + known
\ No newline at end of file
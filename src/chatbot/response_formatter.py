@@ -1,52 +1,111 @@
 from datetime import datetime
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
+from config import FORMAT_CACHE_SIZE, HISTOGRAM_WIDTH
+
+# Listing rows are rendered from compact tuples in these column orders (the
+# order the non-paged listing statements select them in). Rows carrying
+# names (sqlite3.Row, dicts from the columnar engine) are converted first.
+EMPLOYEE_FIELDS = ('first_name', 'last_name', 'salary', 'hire_date')
+MANAGER_FIELDS = ('first_name', 'last_name', 'department')
+HIRE_DATE_FIELDS = ('first_name', 'last_name', 'department', 'hire_date')
+SALARY_FIELDS = ('first_name', 'last_name', 'department', 'salary')
+CONTEXT_FIELDS = ('first_name', 'last_name', 'department', 'salary', 'hire_date')
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def _format_currency(amount):
+    try:
+        return f"${amount:,.2f}"
+    except (TypeError, ValueError):
+        return "$0.00"
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def _format_date(date_str):
+    try:
+        date = datetime.strptime(date_str, "%Y-%m-%d")
+        return date.strftime("%B %d, %Y")
+    except ValueError:
+        return date_str
+
+
+def _compact(first, rows, fields):
+    """Return ``rows`` as tuples of ``fields``, in that order.
+
+    Plain tuples are assumed to be in that order already; sqlite3.Row is
+    read by position and dicts by key through one itemgetter per listing.
+    """
+    if type(first) is tuple:
+        return rows
+    if isinstance(first, dict):
+        return map(itemgetter(*fields), rows)
+    names = first.keys()
+    return map(itemgetter(*(names.index(field) for field in fields)), rows)
+
 
 class ResponseFormatter:
     @staticmethod
     def format_currency(amount):
-        """Format number as currency."""
+        """Format number as currency (memoized: salaries repeat across rows)."""
         try:
-            return f"${amount:,.2f}"
-        except (TypeError, ValueError):
+            return _format_currency(amount)
+        except TypeError:
+            # Unhashable input; the cached path cannot be used.
             return "$0.00"
 
     @staticmethod
     def format_date(date_str):
-        """Format date string."""
-        try:
-            date = datetime.strptime(date_str, "%Y-%m-%d")
-            return date.strftime("%B %d, %Y")
-        except ValueError:
-            return date_str
+        """Format date string (memoized: hire dates have low cardinality)."""
+        return _format_date(date_str)
+
+    @staticmethod
+    def _peek(results):
+        """Return (first_row, iterator over all rows) without materializing them."""
+        rows = iter(results)
+        first = next(rows, None)
+        if first is None:
+            return None, rows
+        return first, chain((first,), rows)
+
+    def iter_employee_list(self, results, department):
+        """Yield the lines of an employee listing for a department."""
+        first, rows = self._peek(results)
+        if first is None:
+            yield f"No employees found in {department} department."
+            return
+
+        yield f"\nEmployees in {department.title()} department:\n"
+        for first_name, last_name, salary, hire_date in _compact(first, rows, EMPLOYEE_FIELDS):
+            yield (
+                f"- {first_name} {last_name} "
+                f"(Salary: {_format_currency(salary)}, "
+                f"Hired: {_format_date(hire_date)})\n"
+            )
 
     def format_employee_list(self, results, department):
         """Format list of employees in a department."""
-        if not results:
-            return f"No employees found in {department} department."
-        
-        response = f"\nEmployees in {department.title()} department:\n"
-        for emp in results:
-            response += (
-                f"- {emp['first_name']} {emp['last_name']} "
-                f"(Salary: {self.format_currency(emp['salary'])}, "
-                f"Hired: {self.format_date(emp['hire_date'])})\n"
-            )
-        return response
+        return ''.join(self.iter_employee_list(results, department))
+
+    def iter_manager_list(self, results):
+        """Yield the lines of the company manager listing."""
+        first, rows = self._peek(results)
+        if first is None:
+            yield "No managers found."
+            return
+
+        yield "\nCompany Managers:\n"
+        current_dept = None
+        for first_name, last_name, department in _compact(first, rows, MANAGER_FIELDS):
+            if department != current_dept:
+                current_dept = department
+                yield f"\n{current_dept.title()} Department:\n"
+            yield f"- {first_name} {last_name}\n"
 
     def format_manager_list(self, results):
         """Format list of all managers."""
-        if not results:
-            return "No managers found."
-        
-        response = "\nCompany Managers:\n"
-        current_dept = None
-        
-        for mgr in results:
-            if mgr['department'] != current_dept:
-                current_dept = mgr['department']
-                response += f"\n{current_dept.title()} Department:\n"
-            response += f"- {mgr['first_name']} {mgr['last_name']}\n"
-        
-        return response
+        return ''.join(self.iter_manager_list(results))
 
     def format_department_manager(self, results, department):
         """Format manager info for a specific department."""
@@ -57,33 +116,127 @@ class ResponseFormatter:
         return (f"\nManager of {department.title()} department: "
                 f"{manager['first_name']} {manager['last_name']}")
 
+    def iter_hire_date_results(self, results, date_str, comparison):
+        """Yield the lines of a hire-date filtered listing."""
+        return self.iter_hire_range_results(results, f"{comparison} {date_str}")
+
+    def iter_hire_range_results(self, results, period):
+        """Yield the lines of a hire-date range listing ("hired in 2022")."""
+        first, rows = self._peek(results)
+        if first is None:
+            yield f"No employees found hired {period}."
+            return
+
+        yield f"\nEmployees hired {period}:\n"
+        for first_name, last_name, department, hire_date in _compact(first, rows,
+                                                                      HIRE_DATE_FIELDS):
+            yield (
+                f"- {first_name} {last_name} "
+                f"({department}, "
+                f"Hired: {_format_date(hire_date)})\n"
+            )
+
     def format_hire_date_results(self, results, date_str, comparison):
         """Format list of employees filtered by hire date."""
-        if not results:
-            return f"No employees found hired {comparison} {date_str}."
-        
-        response = f"\nEmployees hired {comparison} {date_str}:\n"
-        for emp in results:
-            response += (
-                f"- {emp['first_name']} {emp['last_name']} "
-                f"({emp['department']}, "
-                f"Hired: {self.format_date(emp['hire_date'])})\n"
+        return ''.join(self.iter_hire_date_results(results, date_str, comparison))
+
+    def format_hire_range_results(self, results, period):
+        """Format list of employees hired within a date range."""
+        return ''.join(self.iter_hire_range_results(results, period))
+
+    def format_hire_histogram(self, rows, bucket, department=None):
+        """Format hires per year/quarter/month as a bar chart."""
+        scope = f" in {department.title()} department" if department else ""
+        if not rows:
+            return f"No hires found{scope}."
+        peak = max(hires for _, hires in rows)
+        lines = [f"\nHires per {bucket}{scope}:\n"]
+        lines.extend(f"- {period}: {hires} {'#' * max(1, round(HISTOGRAM_WIDTH * hires / peak))}\n"
+                     for period, hires in rows)
+        lines.append(f"Total: {sum(hires for _, hires in rows)}\n")
+        return ''.join(lines)
+
+    def iter_salary_results(self, results, amount, comparison):
+        """Yield the lines of a salary filtered listing."""
+        first, rows = self._peek(results)
+        if first is None:
+            yield f"No employees found with salary {comparison} {self.format_currency(amount)}."
+            return
+
+        yield f"\nEmployees with salary {comparison} {self.format_currency(amount)}:\n"
+        for first_name, last_name, department, salary in _compact(first, rows, SALARY_FIELDS):
+            yield (
+                f"- {first_name} {last_name} "
+                f"({department}, "
+                f"Salary: {_format_currency(salary)})\n"
             )
-        return response
 
     def format_salary_results(self, results, amount, comparison):
         """Format list of employees filtered by salary."""
-        if not results:
-            return f"No employees found with salary {comparison} {self.format_currency(amount)}."
-        
-        response = f"\nEmployees with salary {comparison} {self.format_currency(amount)}:\n"
-        for emp in results:
-            response += (
-                f"- {emp['first_name']} {emp['last_name']} "
-                f"({emp['department']}, "
-                f"Salary: {self.format_currency(emp['salary'])})\n"
+        return ''.join(self.iter_salary_results(results, amount, comparison))
+
+    def iter_context_results(self, results, description):
+        """Yield the lines of a refined listing ("employees in Sales and hired after ...")."""
+        first, rows = self._peek(results)
+        if first is None:
+            yield f"No employees found {description}."
+            return
+
+        yield f"\nEmployees {description}:\n"
+        for first_name, last_name, department, salary, hire_date in _compact(first, rows,
+                                                                              CONTEXT_FIELDS):
+            yield (
+                f"- {first_name} {last_name} "
+                f"({department}, "
+                f"Salary: {_format_currency(salary)}, "
+                f"Hired: {_format_date(hire_date)})\n"
             )
-        return response
+
+    def format_context_statistic(self, statistic, value, description, emp_count):
+        """Format a follow-up statistic over the previous result set."""
+        if statistic == 'count':
+            return f"\n{emp_count} employees {description}."
+        if not emp_count:
+            return f"\nNo employees found {description}."
+        label = {'avg': 'Average', 'min': 'Minimum', 'max': 'Maximum',
+                 'median': 'Median'}[statistic]
+        return (f"\n{label} salary of employees {description} "
+                f"({emp_count} employees): {self.format_currency(value)}")
+
+    def format_no_context(self):
+        """Reply to a follow-up question with nothing to follow up on."""
+        return ("There is no earlier result to refine. Ask for a list of employees first "
+                "(e.g., 'show sales department').")
+
+    def format_search_results(self, results, text):
+        """Format employee name search matches, best first."""
+        if not results:
+            return f"No employees found matching '{text}'."
+        lines = [f"\nEmployees matching '{text}':\n"]
+        lines.extend(f"- {row['first_name']} {row['last_name']} ({row['department']})\n"
+                     for row in results)
+        return ''.join(lines)
+
+    def format_page_footer(self, page, has_more):
+        """Footer appended to a paginated listing."""
+        if has_more:
+            return f"(Page {page}. Type 'next page' for more.)\n"
+        return f"(Page {page}, end of results.)\n"
+
+    def format_shard_timings(self, timings):
+        """Format each database's part of a fanned-out answer, slowest first."""
+        if not timings:
+            return ""
+        lines = [f"\nAnswered from {len(timings)} databases:\n"]
+        for timing in sorted(timings, key=lambda timing: timing.seconds, reverse=True):
+            outcome = f"failed ({timing.error})" if timing.error else f"{timing.rows} rows"
+            lines.append(f"- {timing.source}: {outcome}, {timing.seconds * 1000:.1f} ms\n")
+        return ''.join(lines)
+
+    def format_failed_shards(self, timings):
+        """Note the databases missing from a fanned-out answer."""
+        return ''.join(f"\n(No answer from {timing.source}: {timing.error})"
+                       for timing in timings if timing.error)
 
     def format_average_salary(self, avg_salary, department=None, emp_count=0):
         """Format average salary information with employee count validation."""
@@ -98,6 +251,35 @@ class ResponseFormatter:
                    f"({emp_count} employees): {formatted_salary}")
         return f"\nCompany-wide average salary ({emp_count} employees): {formatted_salary}"
 
+    def format_salary_statistic(self, statistic, value, department=None, emp_count=0):
+        """Format a minimum/maximum/median salary figure."""
+        if not emp_count:
+            if department:
+                return f"\nNo salary data available for {department.title()} department."
+            return "\nNo salary data available in the database."
+
+        label = {'min': 'Minimum', 'max': 'Maximum', 'median': 'Median'}[statistic]
+        formatted_salary = self.format_currency(value)
+        if department:
+            return (f"\n{label} salary in {department.title()} department "
+                    f"({emp_count} employees): {formatted_salary}")
+        return f"\nCompany-wide {label.lower()} salary ({emp_count} employees): {formatted_salary}"
+
+    def format_headcount(self, emp_count, department):
+        """Format the headcount of a single department."""
+        if not emp_count:
+            return f"No employees found in {department} department."
+        return f"\n{department.title()} department has {emp_count} employees."
+
+    def format_headcounts(self, stats):
+        """Format headcount per department from aggregate rows."""
+        if not stats:
+            return "No employees found."
+        lines = ["\nHeadcount by department:\n"]
+        lines.extend(f"- {row['department']}: {row['headcount']}\n" for row in stats)
+        lines.append(f"Total: {sum(row['headcount'] for row in stats)}\n")
+        return ''.join(lines)
+
     def format_error_message(self, error_msg):
         """Format error messages."""
         return f"\nError: {error_msg}"
\ No newline at end of file
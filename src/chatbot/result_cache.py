@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+from config import RESULT_CACHE_SIZE, RESULT_CACHE_TTL
+
+
+class ResultCache:
+    """LRU/TTL cache of formatted responses keyed on (intent, params).
+
+    When ``version_source`` reports a different data version the whole
+    cache is dropped, so any write to the tables invalidates it. Callers
+    take ``version()`` before computing a response and pass it to ``put``;
+    a response computed against an older version is not stored.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL,
+                 version_source=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_source = version_source
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        if self.version_source is None:
+            return
+        version = self.version_source()
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def version(self):
+        """Return the current data version, dropping the cache if it changed."""
+        with self._lock:
+            self._check_version()
+            return self._version
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss."""
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires = entry
+            if expires is not None and time.monotonic() >= expires:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        """Store a response, evicting the least recently used entry if full.
+
+        ``version`` is what ``version()`` returned before the response was
+        computed; if the data has changed since, the response is dropped.
+        """
+        if self.max_entries <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._check_version()
+            if version != self._version:
+                return
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current size."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+        }
@@ -0,0 +1,118 @@
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from config import SESSION_MAX_SESSIONS, SESSION_MAX_BYTES, SESSION_TTL
+
+# Conversation state of one session. ``listing`` is the last listing asked
+# for and ``filters`` the refinements applied to it since, as
+# (kind, operator, value) tuples; ``description`` reads like "in Sales
+# department and hired after 2021-01-01". ``ids`` is the resulting employee
+# id set as an array('q'), or None until a follow-up needs it, and
+# ``version`` the data version it was read at. ``paging`` is
+# (listing, after, page) while a paginated listing has more pages.
+Session = namedtuple('Session', ['listing', 'description', 'filters', 'ids', 'version',
+                                 'paging'])
+Session.__new__.__defaults__ = ((), None, None, None)
+
+_SESSION_OVERHEAD = 512
+
+
+def session_bytes(session):
+    """Approximate memory held by a session: its id array and listing parameters."""
+    size = _SESSION_OVERHEAD
+    if session.ids is not None:
+        size += session.ids.itemsize * len(session.ids)
+    for listing in (session.listing, session.paging and session.paging[0]):
+        if listing is not None:
+            size += sum(sys.getsizeof(param) for param in listing.params
+                        if isinstance(param, str))
+    return size
+
+
+class SessionStore:
+    """Per-session conversation state with LRU eviction, TTL and a memory cap.
+
+    A session expires ``ttl`` seconds after it was last used. When there
+    are more than ``max_sessions`` sessions, or their estimated size is
+    above ``max_bytes``, the least recently used are evicted. A session
+    whose id list alone does not fit is kept without it; the ids are read
+    again when a follow-up needs them.
+
+    A session id of None (a caller that did not identify itself) is never
+    stored, so anonymous callers do not share one conversation.
+    """
+
+    def __init__(self, max_sessions=SESSION_MAX_SESSIONS, max_bytes=SESSION_MAX_BYTES,
+                 ttl=SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _drop(self, session_id):
+        entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _expire(self, now):
+        """Drop expired sessions; the least recently used expire first."""
+        while self._sessions:
+            session_id, (_, _, expires) = next(iter(self._sessions.items()))
+            if expires is None or now < expires:
+                break
+            self._drop(session_id)
+            self.expirations += 1
+
+    def get(self, session_id):
+        """Return the session's state, or None if it is unknown or expired."""
+        if session_id is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            session, size, _ = entry
+            self._sessions[session_id] = (session, size, now + self.ttl if self.ttl else None)
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def put(self, session_id, session):
+        """Store a session's state, evicting least recently used sessions over budget."""
+        if session_id is None or self.max_sessions <= 0:
+            return
+        size = session_bytes(session)
+        if size > self.max_bytes and session.ids is not None:
+            session = session._replace(ids=None, version=None)
+            size = session_bytes(session)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._drop(session_id)
+            self._sessions[session_id] = (session, size, now + self.ttl if self.ttl else None)
+            self._bytes += size
+            while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions
+                                               or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._sessions)))
+                self.evictions += 1
+
+    def discard(self, session_id):
+        with self._lock:
+            self._drop(session_id)
+
+    def stats(self):
+        """Return session count, estimated bytes and eviction/expiry counters."""
+        return {
+            'sessions': len(self._sessions),
+            'bytes': self._bytes,
+            'max_sessions': self.max_sessions,
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
@@ -0,0 +1,245 @@
+import sqlite3
+
+REBUILD_STATEMENTS = (
+    "DELETE FROM department_stats",
+    """
+    INSERT INTO department_stats (department_id, headcount, salary_sum, salary_min, salary_max)
+    SELECT department_id, COUNT(*), SUM(salary), MIN(salary), MAX(salary)
+    FROM employees
+    GROUP BY department_id
+    """,
+    "DELETE FROM department_hire_years",
+    """
+    INSERT INTO department_hire_years (department_id, hire_year, headcount)
+    SELECT department_id, CAST(substr(hire_date, 1, 4) AS INTEGER), COUNT(*)
+    FROM employees
+    GROUP BY department_id, CAST(substr(hire_date, 1, 4) AS INTEGER)
+    """,
+)
+
+# The store is keyed by department id; names come from departments.
+DEPARTMENT_STATS = """
+    SELECT d.name AS department, s.headcount, s.salary_sum, s.salary_min, s.salary_max
+    FROM department_stats s JOIN departments d ON d.id = s.department_id
+    WHERE s.department_id = ?
+"""
+
+ALL_DEPARTMENT_STATS = """
+    SELECT d.name AS department, s.headcount, s.salary_sum, s.salary_min, s.salary_max
+    FROM department_stats s JOIN departments d ON d.id = s.department_id
+    ORDER BY d.name
+"""
+
+BASE_DEPARTMENT_STATS = """
+    SELECT d.name AS department, COUNT(*) AS headcount, SUM(e.salary) AS salary_sum,
+           MIN(e.salary) AS salary_min, MAX(e.salary) AS salary_max
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    GROUP BY e.department_id
+    ORDER BY d.name
+"""
+
+DEPARTMENT_MEDIAN_SALARY = """
+    SELECT AVG(salary) FROM (
+        SELECT salary FROM employees
+        WHERE department_id = ?
+        ORDER BY salary
+        LIMIT 2 - ? % 2 OFFSET (? - 1) / 2
+    )
+"""
+
+COMPANY_MEDIAN_SALARY = """
+    SELECT AVG(salary) FROM (
+        SELECT salary FROM employees
+        ORDER BY salary
+        LIMIT 2 - ? % 2 OFFSET (? - 1) / 2
+    )
+"""
+
+# A median over several databases (see chatbot/fanout.py) lies between the
+# lowest and the highest of their own medians. Each database reports its
+# middle salaries, then how many salaries fall below that window and the
+# salaries inside it, all read from the salary indexes.
+MIDDLE_SALARIES = "SELECT salary FROM employees ORDER BY salary LIMIT 2 OFFSET ?"
+
+DEPARTMENT_MIDDLE_SALARIES = """
+    SELECT salary FROM employees
+    WHERE department_id = ?
+    ORDER BY salary
+    LIMIT 2 OFFSET ?
+"""
+
+SALARIES_BELOW = "SELECT COUNT(*) FROM employees WHERE salary < ?"
+
+DEPARTMENT_SALARIES_BELOW = """
+    SELECT COUNT(*) FROM employees
+    WHERE department_id = ? AND salary < ?
+"""
+
+SALARIES_BETWEEN = """
+    SELECT salary FROM employees
+    WHERE salary BETWEEN ? AND ?
+    ORDER BY salary
+"""
+
+DEPARTMENT_SALARIES_BETWEEN = """
+    SELECT salary FROM employees
+    WHERE department_id = ? AND salary BETWEEN ? AND ?
+    ORDER BY salary
+"""
+
+_STAT_COLUMNS = ('department', 'headcount', 'salary_sum', 'salary_min', 'salary_max')
+
+
+def empty_stats(department):
+    """Stats dict for a department with no employees."""
+    return {'department': department, 'headcount': 0, 'salary_sum': 0,
+            'salary_min': None, 'salary_max': None}
+
+
+def combine_stats(rows):
+    """Company-wide stats dict from per-department stats dicts."""
+    return {
+        'department': None,
+        'headcount': sum(row['headcount'] for row in rows),
+        'salary_sum': sum(row['salary_sum'] for row in rows),
+        'salary_min': min((row['salary_min'] for row in rows), default=None),
+        'salary_max': max((row['salary_max'] for row in rows), default=None),
+    }
+
+
+def aggregates_exist(conn):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'department_stats'"
+    ).fetchone()
+    return row is not None
+
+
+def rebuild_aggregates(conn):
+    """Recompute the aggregate tables from employees (after a bulk load)."""
+    if not aggregates_exist(conn):
+        return False
+    for sql in REBUILD_STATEMENTS:
+        conn.execute(sql)
+    return True
+
+
+def aggregate_mismatches(conn):
+    """Return {department: {'stored': ..., 'actual': ...}} where the store is stale."""
+    if not aggregates_exist(conn):
+        return {}
+    stored = {row[0].lower(): tuple(row[1:])
+              for row in conn.execute(ALL_DEPARTMENT_STATS)}
+    actual = {row[0].lower(): tuple(row[1:])
+              for row in conn.execute(BASE_DEPARTMENT_STATS)}
+    return {
+        department: {'stored': stored.get(department), 'actual': actual.get(department)}
+        for department in set(stored) | set(actual)
+        if stored.get(department) != actual.get(department)
+    }
+
+
+class AggregateStore:
+    """Answers salary and headcount questions from the department_stats table.
+
+    Lookups cost O(departments) at most. If the aggregate tables have not
+    been created yet (an older database), the same figures are computed
+    from the employees table instead; with a ``catalog`` that case is known
+    up front rather than discovered by a failing query.
+    """
+
+    def __init__(self, db, catalog=None):
+        self.db = db
+        self.catalog = catalog
+
+    def _department_id(self, department):
+        """Resolve a department name through the catalog's cached id map."""
+        if self.catalog is not None:
+            return self.catalog.department_id(department)
+        rows = self.db.execute_statement('department_id', (department,))
+        return rows[0][0] if rows else None
+
+    def _stats_rows(self, statement, params=()):
+        if self.catalog is not None and not self.catalog.has_table('department_stats'):
+            return None, False
+        try:
+            return self.db.execute_statement(statement, params), True
+        except sqlite3.OperationalError as e:
+            if 'no such table' not in str(e):
+                raise
+            return None, False
+
+    def department_stats(self, department=None):
+        """Return a dict of headcount/salary_sum/salary_min/salary_max.
+
+        With no department the figures are combined across all departments.
+        """
+        if department:
+            rows, ok = self._stats_rows('department_stats', (self._department_id(department),))
+            if not ok:
+                rows = [row for row in self.db.execute_statement('base_department_stats')
+                        if row['department'].lower() == department.lower()]
+            if not rows:
+                return empty_stats(department)
+            return dict(zip(_STAT_COLUMNS, rows[0]))
+        return combine_stats(self.all_department_stats())
+
+    def all_department_stats(self):
+        """Return per-department stats dicts ordered by department."""
+        rows, ok = self._stats_rows('all_department_stats')
+        if not ok:
+            rows = self.db.execute_statement('base_department_stats')
+        return [dict(zip(_STAT_COLUMNS, row)) for row in rows]
+
+    def average_salary(self, department=None):
+        """Return (average salary, headcount)."""
+        stats = self.department_stats(department)
+        if not stats['headcount']:
+            return 0, 0
+        return stats['salary_sum'] / stats['headcount'], stats['headcount']
+
+    def median_salary(self, department=None):
+        """Return (median salary, headcount).
+
+        The headcount comes from the store; the middle row(s) are then read
+        with an OFFSET over the (department, salary) or salary index.
+        """
+        stats = self.department_stats(department)
+        count = stats['headcount']
+        if not count:
+            return None, 0
+        if department:
+            rows = self.db.execute_statement('department_median_salary',
+                                             (self._department_id(department), count, count))
+        else:
+            rows = self.db.execute_statement('company_median_salary', (count, count))
+        return rows[0][0], count
+
+    def _salary_rows(self, statement, department, params):
+        """Run a company-wide statement, or its department_ variant for ``department``."""
+        if not department:
+            return self.db.execute_statement(statement, params)
+        return self.db.execute_statement(f'department_{statement}',
+                                         (self._department_id(department),) + params)
+
+    def middle_salaries(self, department=None):
+        """Return the (lower, upper) middle salaries; they are equal for an odd headcount.
+
+        As in median_salary the headcount comes from the store. Returns
+        (None, None) when there are no employees.
+        """
+        count = self.department_stats(department)['headcount']
+        if not count:
+            return None, None
+        rows = self._salary_rows('middle_salaries', department, ((count - 1) // 2,))
+        return rows[0][0], rows[count // 2 - (count - 1) // 2][0]
+
+    def salaries_between(self, low, high, department=None):
+        """Return (how many salaries are below ``low``, the salaries from low to high ascending)."""
+        below = self._salary_rows('salaries_below', department, (low,))[0][0]
+        return below, [row[0] for row in self._salary_rows('salaries_between', department,
+                                                             (low, high))]
+
+    def check_consistency(self):
+        """Compare the store with the base table; return mismatching departments."""
+        with self.db.get_connection() as conn:
+            return aggregate_mismatches(conn)
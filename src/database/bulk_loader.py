@@ -0,0 +1,215 @@
+import csv
+import time
+from datetime import date
+from itertools import islice
+from config import BULK_BATCH_SIZE, BULK_LOAD_PRAGMAS
+from .aggregates import rebuild_aggregates
+from .name_search import rebuild_search_index
+from .schema import link_department_managers
+
+# The CSV exports name an employee's department and flag managers with
+# 'Yes'/'No'; the tables store the department id and a 0/1 flag, and the
+# departments.csv manager column is derived from those flags instead.
+EMPLOYEE_CSV_COLUMNS = ('id', 'first_name', 'last_name', 'department',
+                        'salary', 'hire_date', 'is_manager')
+EMPLOYEE_COLUMNS = ('id', 'first_name', 'last_name', 'department_id',
+                    'salary', 'hire_date', 'is_manager')
+DEPARTMENT_COLUMNS = ('id', 'name')
+
+
+def employee_row(row):
+    """Convert an employees.csv record into an INSERT parameter tuple.
+
+    The department is still the name here; DepartmentKeys swaps in the id
+    when the row is written.
+    """
+    return (int(row['id']), row['first_name'], row['last_name'],
+            row['department'], int(row['salary']), row['hire_date'],
+            int(row['is_manager'] == 'Yes'))
+
+
+def checked_employee_row(row):
+    """employee_row that also rejects malformed hire dates and manager flags."""
+    if row['is_manager'] not in ('Yes', 'No'):
+        raise ValueError(f"is_manager must be 'Yes' or 'No', got {row['is_manager']!r}")
+    values = employee_row(row)
+    date.fromisoformat(values[5])
+    return values
+
+
+def department_row(row):
+    """Convert a departments.csv record into an INSERT parameter tuple."""
+    return (int(row['id']), row['name'])
+
+
+def departments_first(sources):
+    """Order sources so departments are written before the employees that refer to them."""
+    return sorted(sources, key=lambda source: source[1] != 'departments')
+
+
+class DepartmentKeys:
+    """Cached department name -> id map used while writing employee rows.
+
+    The map is read from the departments table on first use. A name that is
+    not there yet is added to departments (without a manager) the first
+    time it is seen, so employee exports load on their own as before.
+
+    With ``defer`` a new name is only given the next free id and kept in
+    ``added`` as ``(id, name)``, for the caller to insert in the transaction
+    that writes the rows using it.
+    """
+
+    def __init__(self, conn, defer=False):
+        self.conn = conn
+        self.defer = defer
+        self.added = []
+        self._ids = None
+
+    def id(self, name):
+        if self._ids is None:
+            self._ids = {dept_name.lower(): dept_id for dept_id, dept_name in
+                         self.conn.execute("SELECT id, name FROM main.departments")}
+        dept_id = self._ids.get(name.lower())
+        if dept_id is None:
+            if self.defer:
+                dept_id = max(self._ids.values(), default=0) + 1
+                self.added.append((dept_id, name))
+            else:
+                dept_id = self.conn.execute("INSERT INTO main.departments (name) VALUES (?)",
+                                            (name,)).lastrowid
+            self._ids[name.lower()] = dept_id
+        return dept_id
+
+    def encode(self, table, rows):
+        """Return ``rows`` for ``table`` with department names replaced by ids."""
+        if table != 'employees':
+            return rows
+        ids = self.id
+        return [row[:3] + (ids(row[3]),) + row[4:] for row in rows]
+
+
+class BulkLoader:
+    """Stream CSV files into SQLite in fixed-size executemany batches.
+
+    The whole load runs in a single transaction on the given connection, so
+    memory use is bounded by ``batch_size`` regardless of the file size.
+    Indexes and triggers on the loaded tables are dropped for the load and
+    recreated afterwards, and the aggregate tables are rebuilt.
+    """
+
+    def __init__(self, conn, batch_size=BULK_BATCH_SIZE, pragmas=None,
+                 rebuild_indexes=True, progress=None):
+        self.conn = conn
+        self.batch_size = max(1, batch_size)
+        self.pragmas = BULK_LOAD_PRAGMAS if pragmas is None else pragmas
+        self.rebuild_indexes = rebuild_indexes
+        self.progress = progress
+
+    def _apply_pragmas(self, pragmas):
+        """Set PRAGMAs and return their previous values for restoring."""
+        previous = {}
+        for name, value in pragmas.items():
+            row = self.conn.execute(f"PRAGMA {name}").fetchone()
+            if row is not None:
+                previous[name] = row[0]
+            self.conn.execute(f"PRAGMA {name} = {value}")
+        return previous
+
+    def _drop_derived(self, tables):
+        """Drop user-defined indexes and triggers on the tables, returning their DDL."""
+        placeholders = ', '.join('?' for _ in tables)
+        objects = self.conn.execute(
+            f"""
+            SELECT type, name, sql FROM sqlite_master
+            WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+              AND tbl_name IN ({placeholders})
+            """,
+            tuple(tables)
+        ).fetchall()
+        for kind, name, _ in objects:
+            self.conn.execute(f'DROP {kind.upper()} IF EXISTS "{name}"')
+        return [sql for _, _, sql in objects]
+
+    def _forget_sync_state(self, tables):
+        """A full load replaces what an incremental sync last saw; drop its checksums."""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sync_state'"
+        ).fetchone()
+        if exists:
+            self.conn.executemany("DELETE FROM sync_state WHERE source = ?",
+                                  [(table,) for table in tables])
+
+    def _insert_batches(self, csv_path, table, columns, convert, replace):
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT'
+        sql = (f"{verb} INTO {table} ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' for _ in columns)})")
+        loaded = 0
+        with open(csv_path, 'r', newline='') as file:
+            rows = map(convert, csv.DictReader(file))
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                self.conn.executemany(sql, self.department_keys.encode(table, batch))
+                loaded += len(batch)
+                if self.progress:
+                    self.progress(table, loaded)
+        return loaded
+
+    def _insert_sources(self, sources, replace, counts):
+        """Insert every source, adding per-table row counts to ``counts``."""
+        for csv_path, table, columns, convert in sources:
+            counts[table] = counts.get(table, 0) + self._insert_batches(
+                csv_path, table, columns, convert, replace
+            )
+
+    def _result(self, counts, elapsed):
+        total = sum(counts.values())
+        return {
+            'rows': counts,
+            'total_rows': total,
+            'seconds': elapsed,
+            'rows_per_sec': total / elapsed if elapsed > 0 else float(total),
+        }
+
+    def load(self, sources, clear=False, replace=False):
+        """Load CSV sources in one transaction.
+
+        ``sources`` is a sequence of ``(csv_path, table, columns, convert)``
+        tuples. Returns a dict with per-table row counts, elapsed seconds and
+        overall rows/sec.
+        """
+        sources = departments_first(sources)
+        tables = [source[1] for source in sources]
+        counts = {}
+        start = time.perf_counter()
+
+        if self.conn.in_transaction:
+            self.conn.commit()
+        previous = self._apply_pragmas(self.pragmas)
+        try:
+            self.conn.execute("BEGIN")
+            try:
+                # Dropping the aggregate and search triggers avoids per-row
+                # upkeep; both are rebuilt in one pass after the load.
+                derived_sql = self._drop_derived(tables) if self.rebuild_indexes else []
+                if clear:
+                    for table in set(tables):
+                        self.conn.execute(f"DELETE FROM {table}")
+                self.department_keys = DepartmentKeys(self.conn)
+                self._insert_sources(sources, replace, counts)
+                for sql in derived_sql:
+                    self.conn.execute(sql)
+                if 'employees' in tables:
+                    rebuild_aggregates(self.conn)
+                    rebuild_search_index(self.conn)
+                link_department_managers(self.conn)
+                self._forget_sync_state(tables)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        finally:
+            self._apply_pragmas(previous)
+
+        return self._result(counts, time.perf_counter() - start)
@@ -0,0 +1,132 @@
+import json
+import os
+import sqlite3
+import threading
+from config import SCHEMA_SNAPSHOT_SUFFIX
+
+SNAPSHOT_FORMAT = 2
+
+
+class SchemaCatalog:
+    """Snapshot of the schema (tables, columns, indexes, triggers) and department names.
+
+    The snapshot is written as JSON next to the database and reused by later
+    processes as long as the database and WAL files are unchanged (same
+    mtime and size), so a cold start does not have to query sqlite_master
+    and the departments table. Inside one process it is rebuilt when
+    PRAGMA data_version reports a commit from another connection.
+    """
+
+    def __init__(self, db, snapshot_path=None):
+        self.db = db
+        self.snapshot_path = snapshot_path or f"{db.db_path}{SCHEMA_SNAPSHOT_SUFFIX}"
+        self._snapshot = None
+        self._version = None
+        self._department_ids = (None, {})
+        self._lock = threading.Lock()
+
+    def _fingerprint(self):
+        fingerprint = []
+        for path in (self.db.db_path, f"{self.db.db_path}-wal"):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                fingerprint.append(None)
+            else:
+                fingerprint.append([stat.st_mtime_ns, stat.st_size])
+        return fingerprint
+
+    def _read_file(self, fingerprint):
+        try:
+            with open(self.snapshot_path, encoding='utf-8') as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if (snapshot.get('format') != SNAPSHOT_FORMAT
+                or snapshot.get('fingerprint') != fingerprint):
+            return None
+        return snapshot
+
+    def _write_file(self, snapshot):
+        """Write the snapshot atomically; a read-only directory just skips the cache."""
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(snapshot, file)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            pass
+
+    def _build(self, fingerprint):
+        with self.db.get_connection() as conn:
+            objects = conn.execute(
+                "SELECT type, name FROM sqlite_master "
+                "WHERE type IN ('table', 'index', 'trigger') AND name NOT LIKE 'sqlite_%' "
+                "ORDER BY name"
+            ).fetchall()
+            tables = [name for kind, name in objects if kind == 'table']
+            columns = {table: [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+                       for table in tables}
+            departments = []
+            if 'departments' in tables:
+                departments = [[row[0], row[1]] for row in
+                               conn.execute("SELECT id, name FROM departments ORDER BY name")]
+        return {
+            'format': SNAPSHOT_FORMAT,
+            'fingerprint': fingerprint,
+            'tables': tables,
+            'columns': columns,
+            'indexes': [name for kind, name in objects if kind == 'index'],
+            'triggers': [name for kind, name in objects if kind == 'trigger'],
+            'departments': departments,
+        }
+
+    def snapshot(self):
+        """Return the current snapshot dict, loading or rebuilding it as needed."""
+        with self._lock:
+            version = self.db.data_version()
+            if self._snapshot is not None and version == self._version:
+                return self._snapshot
+
+            fingerprint = self._fingerprint()
+            snapshot = None
+            if self._snapshot is None:
+                snapshot = self._read_file(fingerprint)
+            if snapshot is None:
+                try:
+                    snapshot = self._build(fingerprint)
+                except sqlite3.DatabaseError:
+                    return {'tables': [], 'columns': {}, 'indexes': [],
+                            'triggers': [], 'departments': []}
+                self._write_file(snapshot)
+            self._snapshot = snapshot
+            self._version = version
+            return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            self._version = None
+
+    def has_table(self, table):
+        return table in self.snapshot()['tables']
+
+    def departments(self):
+        """Return department names as stored in the departments table."""
+        return [name for _, name in self.snapshot()['departments']]
+
+    def department_rows(self):
+        """Return [id, name] pairs from the departments table, ordered by name."""
+        return self.snapshot()['departments']
+
+    def department_id(self, name):
+        """Return the departments.id for a name (case-insensitive), or None.
+
+        The name -> id map is built once per snapshot.
+        """
+        rows = self.department_rows()
+        built_from, ids = self._department_ids
+        if built_from is not rows:
+            ids = {dept_name.lower(): dept_id for dept_id, dept_name in rows}
+            self._department_ids = (rows, ids)
+        return ids.get(name.lower())
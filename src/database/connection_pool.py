@@ -0,0 +1,173 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from config import (DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_HEALTH_CHECK_INTERVAL, DB_PRAGMAS,
+                    DB_STATEMENT_CACHE_SIZE)
+from ..instrumentation.metrics import METRICS
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connection that remembers which catalog statements it has prepared.
+
+    sqlite3 keeps prepared statements in a per-connection LRU keyed by the
+    SQL text; with ``cached_statements`` above the catalog size a statement
+    is compiled once per connection, which ``prepared`` mirrors.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections shared between threads."""
+
+    def __init__(self, db_path, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 pragmas=None, health_check_interval=DB_HEALTH_CHECK_INTERVAL, uri=False):
+        self.db_path = db_path
+        self.uri = uri
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.pragmas = DB_PRAGMAS if pragmas is None else pragmas
+        self.health_check_interval = health_check_interval
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._last_used = {}
+        self._closed = False
+
+    def _connect(self):
+        """Open a connection and apply the PRAGMA setup once."""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout,
+                               check_same_thread=False, uri=self.uri, factory=PooledConnection,
+                               cached_statements=DB_STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def _is_healthy(self, conn):
+        """Cheap liveness probe, only run on connections idle for a while."""
+        last_used = self._last_used.get(id(conn), 0)
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            self._connections.discard(conn)
+            self._last_used.pop(id(conn), None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def acquire(self):
+        """Take a connection from the pool, opening one if below capacity."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed.")
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if len(self._connections) < self.size:
+                    conn = self._connect()
+                    self._connections.add(conn)
+                    self._last_used[id(conn)] = time.monotonic()
+            if conn is None:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout}s."
+                    )
+
+        if not self._is_healthy(conn):
+            self._discard(conn)
+            conn = self._connect()
+            with self._lock:
+                self._connections.add(conn)
+                self._last_used[id(conn)] = time.monotonic()
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back any open transaction."""
+        if self._closed or conn not in self._connections:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._last_used[id(conn)] = time.monotonic()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that acquires and always releases a connection."""
+        with METRICS.timer('db_acquire'):
+            conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """Return current pool occupancy."""
+        return {
+            'size': self.size,
+            'open': len(self._connections),
+            'idle': self._idle.qsize(),
+        }
+
+    def close_all(self):
+        """Close every connection; connections in use are closed on release."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, **kwargs):
+    """Return the process-wide pool for a database file, creating it once."""
+    key = str(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_path, **kwargs)
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools():
+    """Close every pool created through get_pool (call on shutdown)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
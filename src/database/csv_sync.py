@@ -0,0 +1,199 @@
+import csv
+import hashlib
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from config import BULK_BATCH_SIZE
+from .bulk_loader import DepartmentKeys, departments_first
+from .schema import SYNC_STATE_TABLE, link_department_managers
+
+# Rows that other tables still reference are not deleted when an export
+# drops them: departments added by an employees sync are not in
+# departments.csv.
+_REFERENCED = {
+    'departments': "SELECT department_id FROM main.employees",
+}
+
+
+def file_checksum(path, block_size=1 << 20):
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CsvSync:
+    """Apply a CSV export to its table incrementally instead of reloading it.
+
+    Each file is checksummed first and skipped if it matches the checksum
+    recorded by the previous sync. Otherwise it is staged into a TEMP table
+    (no lock on the database), diffed against the target by primary key and
+    column values in SQL, and only the changed rows are written: inserts
+    and updates as one UPSERT, removals as DELETE, ``batch_size`` ids per
+    committed transaction. Departments that only appear on employee rows
+    are added in the first UPSERT transaction, and departments employees
+    still reference are never deleted. Writes go through the
+    aggregate triggers, and WAL readers keep being served between (and
+    during) the batches.
+    """
+
+    def __init__(self, conn, batch_size=BULK_BATCH_SIZE, progress=None):
+        self.conn = conn
+        self.batch_size = max(1, batch_size)
+        self.progress = progress
+
+    def _stored_checksum(self, table):
+        row = self.conn.execute("SELECT checksum FROM sync_state WHERE source = ?",
+                                (table,)).fetchone()
+        return row[0] if row else None
+
+    def _stage(self, csv_path, table, columns, convert):
+        """Load the CSV into temp.sync_incoming (department ids resolved).
+
+        Return the row count and the ``(id, name)`` departments the rows
+        name that are not in the departments table yet.
+        """
+        self.conn.execute("DROP TABLE IF EXISTS temp.sync_incoming")
+        self.conn.execute(
+            f"CREATE TEMP TABLE sync_incoming ({columns[0]} INTEGER PRIMARY KEY, "
+            f"{', '.join(columns[1:])})"
+        )
+        sql = (f"INSERT OR REPLACE INTO temp.sync_incoming ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' for _ in columns)})")
+        staged = 0
+        keys = DepartmentKeys(self.conn, defer=True)
+        with open(csv_path, 'r', newline='') as file:
+            rows = map(convert, csv.DictReader(file))
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                self.conn.executemany(sql, keys.encode(table, batch))
+                staged += len(batch)
+        self.conn.commit()
+        return staged, keys.added
+
+    def _diff(self, table, columns):
+        """Fill temp.sync_changes with (id, op) for rows to upsert ('i'/'u') or delete ('d')."""
+        key = columns[0]
+        changed = ' OR '.join(f"t.{column} IS NOT i.{column}" for column in columns[1:])
+        self.conn.execute("DROP TABLE IF EXISTS temp.sync_changes")
+        self.conn.execute("CREATE TEMP TABLE sync_changes (id INTEGER PRIMARY KEY, op TEXT)")
+        self.conn.execute(f"""
+            INSERT INTO temp.sync_changes (id, op)
+            SELECT i.{key}, CASE WHEN t.{key} IS NULL THEN 'i' ELSE 'u' END
+            FROM temp.sync_incoming i LEFT JOIN main.{table} t ON t.{key} = i.{key}
+            WHERE t.{key} IS NULL OR {changed}
+        """)
+        referenced = _REFERENCED.get(table)
+        keep = f"AND {key} NOT IN ({referenced})" if referenced else ""
+        self.conn.execute(f"""
+            INSERT INTO temp.sync_changes (id, op)
+            SELECT {key}, 'd' FROM main.{table}
+            WHERE {key} NOT IN (SELECT {key} FROM temp.sync_incoming) {keep}
+        """)
+        counts = dict(self.conn.execute(
+            "SELECT op, COUNT(*) FROM temp.sync_changes GROUP BY op").fetchall())
+        if self.conn.in_transaction:
+            self.conn.commit()
+        return counts
+
+    def _apply(self, table, columns, departments=()):
+        key = columns[0]
+        column_list = ', '.join(columns)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in columns[1:])
+        upsert = f"""
+            INSERT INTO main.{table} ({column_list})
+            SELECT {column_list} FROM temp.sync_incoming
+            WHERE {key} IN (SELECT id FROM temp.sync_changes
+                            WHERE op != 'd' AND id > ? ORDER BY id LIMIT ?)
+            ON CONFLICT ({key}) DO UPDATE SET {updates}
+        """
+        delete = f"""
+            DELETE FROM main.{table}
+            WHERE {key} IN (SELECT id FROM temp.sync_changes
+                            WHERE op = 'd' AND id > ? ORDER BY id LIMIT ?)
+        """
+        applied = 0
+        for sql, op_filter in ((upsert, "op != 'd'"), (delete, "op = 'd'")):
+            after = -1 << 63
+            while True:
+                last = self.conn.execute(
+                    f"SELECT MAX(id), COUNT(*) FROM (SELECT id FROM temp.sync_changes "
+                    f"WHERE {op_filter} AND id > ? ORDER BY id LIMIT ?)",
+                    (after, self.batch_size)
+                ).fetchone()
+                if not last[1]:
+                    break
+                try:
+                    self.conn.execute("BEGIN IMMEDIATE")
+                    if departments and sql is upsert:
+                        self.conn.executemany(
+                            "INSERT INTO main.departments (id, name) VALUES (?, ?)", departments)
+                    self.conn.execute(sql, (after, self.batch_size))
+                    self.conn.commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+                if sql is upsert:
+                    departments = ()
+                after = last[0]
+                applied += last[1]
+                if self.progress:
+                    self.progress(table, applied)
+        return applied
+
+    def _record(self, table, checksum, rows):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO sync_state (source, checksum, rows, synced_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (source) DO UPDATE SET checksum = excluded.checksum, "
+                "rows = excluded.rows, synced_at = excluded.synced_at",
+                (table, checksum, rows, datetime.now(timezone.utc).isoformat(timespec='seconds'))
+            )
+
+    def sync(self, sources, force=False):
+        """Sync ``(csv_path, table, columns, convert)`` sources; return change counts.
+
+        The result has per-table ``inserted``/``updated``/``deleted``/
+        ``unchanged`` counts (``skipped`` when the file checksum matched) and
+        the ``new_departments`` its rows added, plus elapsed seconds.
+        """
+        start = time.perf_counter()
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.conn.execute(SYNC_STATE_TABLE)
+
+        tables = {}
+        try:
+            for csv_path, table, columns, convert in departments_first(sources):
+                checksum = file_checksum(csv_path)
+                if not force and checksum == self._stored_checksum(table):
+                    tables[table] = {'skipped': True, 'inserted': 0, 'updated': 0,
+                                     'deleted': 0, 'unchanged': None, 'new_departments': []}
+                    continue
+                staged, departments = self._stage(csv_path, table, columns, convert)
+                counts = self._diff(table, columns)
+                self._apply(table, columns, departments)
+                self._record(table, checksum, staged)
+                inserted, updated = counts.get('i', 0), counts.get('u', 0)
+                tables[table] = {
+                    'skipped': False,
+                    'inserted': inserted,
+                    'updated': updated,
+                    'deleted': counts.get('d', 0),
+                    'unchanged': staged - inserted - updated,
+                    'new_departments': [name for _, name in departments],
+                }
+            if any(not counts['skipped'] for counts in tables.values()):
+                with self.conn:
+                    link_department_managers(self.conn)
+        finally:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            self.conn.execute("DROP TABLE IF EXISTS temp.sync_incoming")
+            self.conn.execute("DROP TABLE IF EXISTS temp.sync_changes")
+
+        return {'tables': tables, 'seconds': time.perf_counter() - start}
@@ -1,30 +1,38 @@
-import csv
-from config import EMPLOYEES_CSV, DEPARTMENTS_CSV
+from config import EMPLOYEES_CSV, DEPARTMENTS_CSV, BULK_BATCH_SIZE, INGEST_WORKERS
 from .db_manager import DatabaseManager
+from .bulk_loader import (BulkLoader, EMPLOYEE_COLUMNS, DEPARTMENT_COLUMNS,
+                          employee_row, checked_employee_row, department_row)
+from .parallel_loader import ParallelLoader
+from .csv_sync import CsvSync
 
 class DataLoader:
     def __init__(self):
         self.db = DatabaseManager()
 
-    def load_csv_data(self):
-        # Load employees
-        with open(EMPLOYEES_CSV, 'r') as file:
-            csv_reader = csv.DictReader(file)
-            for row in csv_reader:
-                self.db.execute_query(
-                    '''INSERT INTO employees 
-                       (id, first_name, last_name, department, salary, hire_date, is_manager)
-                       VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                    (int(row['id']), row['first_name'], row['last_name'], 
-                     row['department'], int(row['salary']), row['hire_date'], 
-                     row['is_manager'])
-                )
+    def load_csv_data(self, batch_size=BULK_BATCH_SIZE, progress=None):
+        """Bulk-load employees and departments in a single transaction."""
+        with self.db.get_connection() as conn:
+            loader = BulkLoader(conn, batch_size=batch_size, progress=progress)
+            return loader.load([
+                (EMPLOYEES_CSV, 'employees', EMPLOYEE_COLUMNS, employee_row),
+                (DEPARTMENTS_CSV, 'departments', DEPARTMENT_COLUMNS, department_row),
+            ])
 
-        # Load departments
-        with open(DEPARTMENTS_CSV, 'r') as file:
-            csv_reader = csv.DictReader(file)
-            for row in csv_reader:
-                self.db.execute_query(
-                    'INSERT INTO departments (id, name, manager) VALUES (?, ?, ?)',
-                    (int(row['id']), row['name'], row['manager'])
-                )
\ No newline at end of file
+    def load_csv_files(self, employees, departments=None, workers=INGEST_WORKERS,
+                       batch_size=BULK_BATCH_SIZE, progress=None, clear=False):
+        """Load sharded exports (directories, globs or file lists) on a parser process pool."""
+        sources = [(employees, 'employees', EMPLOYEE_COLUMNS, checked_employee_row)]
+        if departments is not None:
+            sources.append((departments, 'departments', DEPARTMENT_COLUMNS, department_row))
+        with self.db.get_connection() as conn:
+            loader = ParallelLoader(conn, batch_size=batch_size, progress=progress,
+                                    workers=workers)
+            return loader.load(sources, clear=clear)
+
+    def sync_csv_data(self, batch_size=BULK_BATCH_SIZE, progress=None, force=False):
+        """Apply only the rows that changed in the CSV exports since the last sync."""
+        with self.db.get_connection() as conn:
+            return CsvSync(conn, batch_size=batch_size, progress=progress).sync([
+                (EMPLOYEES_CSV, 'employees', EMPLOYEE_COLUMNS, employee_row),
+                (DEPARTMENTS_CSV, 'departments', DEPARTMENT_COLUMNS, department_row),
+            ], force=force)
\ No newline at end of file
@@ -1,49 +1,197 @@
 import sqlite3
-from config import DB_PATH
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from config import DB_PATH, STREAM_CHUNK_SIZE
+from ..instrumentation.metrics import METRICS
+from .connection_pool import get_pool, close_all_pools
+from .schema import create_schema, check_query_plans
+from .queries import INDEXED_QUERIES, STATEMENTS
 
 class DatabaseManager:
-    def __init__(self):
-        self.db_path = DB_PATH
+    def __init__(self, db_path=None, pool=None, statements=None):
+        self.db_path = db_path or DB_PATH
+        self.pool = pool or get_pool(self.db_path)
+        self.statements = dict(STATEMENTS if statements is None else statements)
+        self._version_conn = None
+        self._version_lock = threading.Lock()
+        self._statement_lock = threading.Lock()
+        self._statement_counts = {}
+        self._prepare_seconds = 0.0
+        self._pinned = threading.local()
 
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """Context manager yielding a pooled connection.
 
-    def execute_query(self, query, params=None):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        Inside read_transaction() this thread's pinned connection is reused.
+        """
+        conn = getattr(self._pinned, 'conn', None)
+        if conn is not None:
+            return nullcontext(conn)
+        return self.pool.connection()
+
+    @contextmanager
+    def read_transaction(self):
+        """Pin one pooled connection to this thread inside a read transaction.
+
+        Every query this thread runs until the block exits uses the same
+        connection and sees the same database snapshot. Nested calls reuse
+        the outer transaction.
+        """
+        conn = getattr(self._pinned, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN")
+            self._pinned.conn = conn
+            try:
+                yield conn
+            finally:
+                self._pinned.conn = None
+                conn.rollback()
+
+    def register_statement(self, name, sql):
+        """Add a named statement to this manager's catalog."""
+        self.statements[name] = sql
+
+    def _statement_sql(self, name):
         try:
-            if params:
-                cursor.execute(query, params)
+            return self.statements[name]
+        except KeyError:
+            raise KeyError(f"Unknown statement {name!r}") from None
+
+    def _record_statement(self, conn, name, seconds):
+        """Count a catalog execution as a prepare (first on this connection) or a hit."""
+        prepared = getattr(conn, 'prepared', None)
+        first = prepared is None or name not in prepared
+        if first and prepared is not None:
+            prepared.add(name)
+        with self._statement_lock:
+            counts = self._statement_counts.setdefault(name, [0, 0])
+            if first:
+                counts[0] += 1
+                self._prepare_seconds += seconds
             else:
-                cursor.execute(query)
-            results = cursor.fetchall()
-            conn.commit()
-            return results
-        finally:
-            conn.close()
+                counts[1] += 1
+
+    def statement_stats(self):
+        """Prepare/hit counters for catalog statements.
+
+        ``prepare_ms`` is the time of the executes that compiled a statement
+        (prepare plus first step). In steady state ``prepares`` stays at one
+        per statement per pooled connection and only ``hits`` grow.
+        """
+        with self._statement_lock:
+            by_statement = {name: {'prepares': prepares, 'hits': hits}
+                            for name, (prepares, hits) in sorted(self._statement_counts.items())}
+            prepare_ms = self._prepare_seconds * 1000
+        return {
+            'statements': len(self.statements),
+            'prepares': sum(stats['prepares'] for stats in by_statement.values()),
+            'hits': sum(stats['hits'] for stats in by_statement.values()),
+            'prepare_ms': round(prepare_ms, 3),
+            'by_statement': by_statement,
+        }
+
+    def execute_statement(self, name, params=None):
+        """Run a catalog statement by name and return all rows."""
+        return self.execute_query(self._statement_sql(name), params, name)
+
+    def iter_statement(self, name, params=None, chunk_size=STREAM_CHUNK_SIZE, tuples=False):
+        """Stream a catalog statement's rows in fetchmany chunks."""
+        return self.iter_query(self._statement_sql(name), params, chunk_size, name, tuples)
+
+    def execute_query(self, query, params=None, statement=None):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                start = time.perf_counter()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                if statement is not None:
+                    self._record_statement(conn, statement, time.perf_counter() - start)
+                results = cursor.fetchall()
+                if conn is not getattr(self._pinned, 'conn', None):
+                    conn.commit()
+                if METRICS.enabled:
+                    elapsed = time.perf_counter() - start
+                    METRICS.observe('db_execute', elapsed)
+                    METRICS.record_query(conn, query, params, elapsed, len(results))
+                return results
+            finally:
+                cursor.close()
+
+    def iter_query(self, query, params=None, chunk_size=STREAM_CHUNK_SIZE, statement=None,
+                   tuples=False):
+        """Yield result rows in fetchmany chunks instead of materializing them.
+
+        With ``tuples`` rows are plain tuples in SELECT order rather than
+        sqlite3.Row, which is cheaper to build for large listings. The pooled
+        connection is held until the generator is exhausted or closed.
+        """
+        with self.get_connection() as conn:
+            elapsed = 0.0
+            count = 0
+            start = time.perf_counter()
+            cursor = conn.cursor()
+            if tuples:
+                cursor.row_factory = None
+            try:
+                cursor.execute(query, params or ())
+                if statement is not None:
+                    self._record_statement(conn, statement, time.perf_counter() - start)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    elapsed += time.perf_counter() - start
+                    if not rows:
+                        break
+                    count += len(rows)
+                    yield from rows
+                    start = time.perf_counter()
+            finally:
+                cursor.close()
+                if METRICS.enabled:
+                    METRICS.observe('db_execute', elapsed)
+                    METRICS.record_query(conn, query, params, elapsed, count)
+
+    def data_version(self):
+        """Return a token that changes whenever any other connection commits.
+
+        PRAGMA data_version only reflects commits made by *other* connections,
+        so it is read from a dedicated connection that never writes. This
+        picks up writes from the pool, DataLoader and the setup script alike.
+        """
+        with self._version_lock:
+            if self._version_conn is None:
+                self._version_conn = sqlite3.connect(self.db_path,
+                                                     check_same_thread=False)
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        """Close this manager's pooled connections."""
+        with self._version_lock:
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+        self.pool.close_all()
+
+    @staticmethod
+    def close_all():
+        """Close every pooled connection in the process (call on shutdown)."""
+        close_all_pools()
 
     def create_tables(self):
-        employee_table = '''
-        CREATE TABLE IF NOT EXISTS employees (
-            id INTEGER PRIMARY KEY,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            department TEXT NOT NULL,
-            salary INTEGER NOT NULL,
-            hire_date DATE NOT NULL,
-            is_manager TEXT NOT NULL
-        )
-        '''
-        
-        department_table = '''
-        CREATE TABLE IF NOT EXISTS departments (
-            id INTEGER PRIMARY KEY,
-            name TEXT NOT NULL,
-            manager TEXT NOT NULL
-        )
-        '''
-        
-        self.execute_query(employee_table)
-        self.execute_query(department_table)
\ No newline at end of file
+        """Create tables and the secondary indexes used by QueryHandler.
+
+        A database in the previous (version 1) layout is migrated in place.
+        """
+        with self.get_connection() as conn:
+            create_schema(conn)
+
+    def check_query_plans(self):
+        """Return QueryHandler query shapes that fall back to a full table scan."""
+        with self.get_connection() as conn:
+            return check_query_plans(conn, INDEXED_QUERIES)
\ No newline at end of file
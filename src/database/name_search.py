@@ -0,0 +1,135 @@
+import re
+import sqlite3
+from config import SEARCH_LIMIT, SEARCH_CANDIDATES
+
+# Full-text index over employee names. It is an external-content FTS5 table
+# (the text lives only in employees) with extra prefix indexes for two- and
+# three-character prefixes, so autocomplete lookups like "jo*" read one
+# posting list instead of every term that starts with "jo".
+EMPLOYEES_FTS_TABLE = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5(
+    first_name, last_name,
+    content='employees', content_rowid='id',
+    prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+)
+'''
+
+# Keep the index in step with employees. External-content rows are removed
+# with the special 'delete' command, which needs the old column values.
+_FTS_ADD = '''
+    INSERT INTO employees_fts (rowid, first_name, last_name)
+    VALUES (NEW.id, NEW.first_name, NEW.last_name);
+'''
+_FTS_REMOVE = '''
+    INSERT INTO employees_fts (employees_fts, rowid, first_name, last_name)
+    VALUES ('delete', OLD.id, OLD.first_name, OLD.last_name);
+'''
+
+SEARCH_TRIGGERS = (
+    'CREATE TRIGGER IF NOT EXISTS trg_employees_fts_insert '
+    'AFTER INSERT ON employees BEGIN' + _FTS_ADD + 'END',
+    'CREATE TRIGGER IF NOT EXISTS trg_employees_fts_delete '
+    'AFTER DELETE ON employees BEGIN' + _FTS_REMOVE + 'END',
+    'CREATE TRIGGER IF NOT EXISTS trg_employees_fts_update '
+    'AFTER UPDATE OF id, first_name, last_name ON employees BEGIN'
+    + _FTS_REMOVE + _FTS_ADD + 'END',
+)
+
+REBUILD_SEARCH_INDEX = "INSERT INTO employees_fts (employees_fts) VALUES ('rebuild')"
+
+# Ranked by bm25 with a last-name match weighted above a first-name match.
+# FTS5 sorts by rank inside the index query and keeps only the best ``?``
+# candidates, so just those are joined to employees and departments; the
+# LIMIT applies to the ranked matches, not the first ones in rowid order.
+NAME_SEARCH = """
+    SELECT e.id, e.first_name, e.last_name, d.name AS department
+    FROM (SELECT rowid, rank AS score
+          FROM employees_fts
+          WHERE employees_fts MATCH ? AND rank MATCH 'bm25(1.0, 2.0)'
+          ORDER BY rank LIMIT ?) f
+    JOIN employees e ON e.id = f.rowid
+    JOIN departments d ON d.id = e.department_id
+    ORDER BY f.score, e.last_name, e.first_name
+    LIMIT ?
+"""
+
+# Fallback when the FTS5 index is missing: a full scan per lookup.
+NAME_SEARCH_LIKE = """
+    SELECT e.id, e.first_name, e.last_name, d.name AS department
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    WHERE e.first_name || ' ' || e.last_name LIKE ?
+    ORDER BY e.last_name, e.first_name
+    LIMIT ?
+"""
+
+_TERMS = re.compile(r'\w+')
+
+
+def search_index_exists(conn):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employees_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def create_search_index(conn):
+    """Create the name index and its triggers, filling it if it is new.
+
+    Returns False (and creates nothing) when SQLite was built without FTS5.
+    """
+    existed = search_index_exists(conn)
+    try:
+        conn.execute(EMPLOYEES_FTS_TABLE)
+    except sqlite3.OperationalError as e:
+        if 'fts5' not in str(e):
+            raise
+        return False
+    for ddl in SEARCH_TRIGGERS:
+        conn.execute(ddl)
+    if not existed:
+        conn.execute(REBUILD_SEARCH_INDEX)
+    return True
+
+
+def rebuild_search_index(conn):
+    """Re-read every name from employees (after a bulk load)."""
+    if not search_index_exists(conn):
+        return False
+    conn.execute(REBUILD_SEARCH_INDEX)
+    return True
+
+
+def match_expression(text):
+    """FTS5 query for free text: every word as a quoted prefix ("jo"* "smi"*)."""
+    return ' '.join(f'"{term}"*' for term in _TERMS.findall(text))
+
+
+class NameSearch:
+    """Looks employees up by (partial) first and/or last name.
+
+    Served from the employees_fts index: every word of the text must prefix
+    a name token, best bm25 matches first. Databases without the index
+    (SQLite without FTS5, or not yet migrated) fall back to a LIKE scan.
+    """
+
+    def __init__(self, db, catalog=None):
+        self.db = db
+        self.catalog = catalog
+
+    def _has_index(self):
+        return self.catalog is None or self.catalog.has_table('employees_fts')
+
+    def search(self, text, limit=SEARCH_LIMIT, candidates=SEARCH_CANDIDATES):
+        """Return up to ``limit`` (id, first_name, last_name, department) rows."""
+        expression = match_expression(text)
+        if not expression:
+            return []
+        if self._has_index():
+            try:
+                return self.db.execute_statement('employee_name_search',
+                                                 (expression, max(limit, candidates), limit))
+            except sqlite3.OperationalError as e:
+                if 'no such table' not in str(e):
+                    raise
+        pattern = '%' + ' '.join(_TERMS.findall(text)) + '%'
+        return self.db.execute_statement('employee_name_like', (pattern, limit))
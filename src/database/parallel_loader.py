@@ -0,0 +1,181 @@
+import csv
+import glob
+import multiprocessing
+import queue
+import sqlite3
+from pathlib import Path
+from config import (BULK_BATCH_SIZE, INGEST_WORKERS, INGEST_QUEUE_SIZE,
+                    INGEST_MAX_ERRORS)
+from .bulk_loader import BulkLoader
+
+_BATCH, _FILE_DONE, _EXIT = 'batch', 'file_done', 'exit'
+
+
+def expand_paths(spec, pattern='*.csv'):
+    """Return the files for a directory, a glob pattern, a path or a list of those.
+
+    A directory contributes the files in it that match ``pattern``.
+    """
+    if isinstance(spec, (list, tuple)):
+        return [path for item in spec for path in expand_paths(item, pattern)]
+    path = Path(spec)
+    if path.is_dir():
+        return sorted(path.glob(pattern))
+    if not any(char in str(spec) for char in '*?['):
+        # A plain path is kept even if missing so it shows up as a failed file.
+        return [path]
+    return [Path(match) for match in sorted(glob.glob(str(spec)))]
+
+
+def parse_file(path, table, convert, batch_size, max_errors):
+    """Yield (_BATCH, table, path, rows) for a CSV file, then (_FILE_DONE, table, path, report).
+
+    Rows that fail ``convert`` are skipped and reported with their line
+    number; an unreadable file ends with ``report['failed']`` set.
+    """
+    report = {'path': str(path), 'table': table, 'rows': 0, 'error_count': 0,
+              'errors': [], 'failed': None}
+    batch = []
+    try:
+        with open(path, 'r', newline='') as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                try:
+                    batch.append(convert(row))
+                except (ValueError, TypeError, KeyError) as e:
+                    report['error_count'] += 1
+                    if len(report['errors']) < max_errors:
+                        report['errors'].append((reader.line_num, str(e)))
+                    continue
+                if len(batch) >= batch_size:
+                    report['rows'] += len(batch)
+                    yield _BATCH, table, report['path'], batch
+                    batch = []
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        report['failed'] = str(e)
+    if batch:
+        report['rows'] += len(batch)
+        yield _BATCH, table, report['path'], batch
+    yield _FILE_DONE, table, report['path'], report
+
+
+def _parse_worker(tasks, results, batch_size, max_errors):
+    """Worker process: parse files from ``tasks`` onto the bounded ``results`` queue."""
+    while True:
+        task = tasks.get()
+        if task is None:
+            results.put((_EXIT, None, None, None))
+            return
+        path, table, convert = task
+        for message in parse_file(path, table, convert, batch_size, max_errors):
+            results.put(message)
+
+
+class ParallelLoader(BulkLoader):
+    """BulkLoader for sharded exports: many CSVs parsed on a process pool.
+
+    Sources are ``(paths, table, columns, convert)`` where ``paths`` is a
+    directory, glob or list of files. ``workers`` processes parse, validate
+    and convert rows into batches; this process is the single SQLite writer
+    and inserts each batch with executemany inside the BulkLoader
+    transaction. The result queue holds at most ``queue_size`` batches, so
+    parsers block instead of buffering a whole export when the writer falls
+    behind. Bad rows are skipped and listed per file under ``files`` in the
+    result; a row the table rejects (an id already loaded from another
+    file) aborts the load with an IntegrityError naming the file and id.
+    ``workers=0`` parses in this process.
+    """
+
+    def __init__(self, conn, batch_size=BULK_BATCH_SIZE, pragmas=None,
+                 rebuild_indexes=True, progress=None, workers=INGEST_WORKERS,
+                 queue_size=INGEST_QUEUE_SIZE, max_errors=INGEST_MAX_ERRORS):
+        super().__init__(conn, batch_size, pragmas, rebuild_indexes, progress)
+        self.workers = max(0, workers)
+        self.queue_size = max(1, queue_size)
+        self.max_errors = max_errors
+        self.files = []
+
+    def _write(self, message, sqls, counts):
+        kind, table, path, payload = message
+        if kind == _BATCH:
+            rows = self.department_keys.encode(table, payload)
+            current = [None]
+
+            def tracked():
+                # executemany takes one row at a time, so on failure the
+                # last row handed out is the one the table rejected.
+                for current[0] in rows:
+                    yield current[0]
+
+            try:
+                self.conn.executemany(sqls[table], tracked())
+            except sqlite3.IntegrityError as e:
+                raise sqlite3.IntegrityError(
+                    f"{path}: {table} row with id {current[0][0]} was rejected: {e}") from e
+            counts[table] = counts.get(table, 0) + len(payload)
+            if self.progress:
+                self.progress(table, counts[table])
+        elif kind == _FILE_DONE:
+            self.files.append(payload)
+
+    def _insert_sources(self, sources, replace, counts):
+        # Tables go through the pool one after the other, so departments are
+        # written before any employee batch needs their ids.
+        self.files = []
+        for source in sources:
+            self._insert_files([source], replace, counts)
+
+    def _insert_files(self, sources, replace, counts):
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT'
+        sqls = {}
+        tasks = []
+        for paths, table, columns, convert in sources:
+            sqls[table] = (f"{verb} INTO {table} ({', '.join(columns)}) "
+                           f"VALUES ({', '.join('?' for _ in columns)})")
+            tasks.extend((path, table, convert) for path in expand_paths(paths))
+
+        if not self.workers:
+            for path, table, convert in tasks:
+                for message in parse_file(path, table, convert,
+                                          self.batch_size, self.max_errors):
+                    self._write(message, sqls, counts)
+            return
+
+        context = multiprocessing.get_context()
+        task_queue = context.Queue()
+        results = context.Queue(maxsize=self.queue_size)
+        for task in tasks:
+            task_queue.put(task)
+        workers = [context.Process(target=_parse_worker, daemon=True,
+                                   args=(task_queue, results, self.batch_size, self.max_errors))
+                   for _ in range(min(self.workers, len(tasks)) or 1)]
+        for _ in workers:
+            task_queue.put(None)
+        for worker in workers:
+            worker.start()
+
+        running = len(workers)
+        try:
+            while running:
+                try:
+                    message = results.get(timeout=1.0)
+                except queue.Empty:
+                    if any(worker.exitcode not in (None, 0) for worker in workers):
+                        raise RuntimeError("A CSV parser process exited unexpectedly.")
+                    continue
+                if message[0] == _EXIT:
+                    running -= 1
+                else:
+                    self._write(message, sqls, counts)
+        finally:
+            for worker in workers:
+                if worker.is_alive() and running:
+                    worker.terminate()
+                worker.join()
+
+    def _result(self, counts, elapsed):
+        result = super()._result(counts, elapsed)
+        result['files'] = sorted(self.files, key=lambda report: report['path'])
+        result['bad_rows'] = sum(report['error_count'] for report in self.files)
+        result['workers'] = self.workers
+        return result
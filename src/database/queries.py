@@ -0,0 +1,284 @@
+from .aggregates import (DEPARTMENT_STATS, ALL_DEPARTMENT_STATS, BASE_DEPARTMENT_STATS,
+                         DEPARTMENT_MEDIAN_SALARY, COMPANY_MEDIAN_SALARY,
+                         MIDDLE_SALARIES, DEPARTMENT_MIDDLE_SALARIES, SALARIES_BELOW,
+                         DEPARTMENT_SALARIES_BELOW, SALARIES_BETWEEN,
+                         DEPARTMENT_SALARIES_BETWEEN)
+from .name_search import NAME_SEARCH, NAME_SEARCH_LIKE
+
+# SQL used by QueryHandler. Department parameters are departments.id values
+# (QueryHandler resolves names through the catalog's id map), so filters hit
+# idx_employees_department with an integer key (see schema.py); names are
+# joined in from departments only for rows that are returned. The listing
+# statements select columns in the order ResponseFormatter expects for
+# compact tuple rows (EMPLOYEE_FIELDS, MANAGER_FIELDS, ...).
+
+DEPARTMENT_EMPLOYEES = """
+    SELECT first_name, last_name, salary, hire_date
+    FROM employees
+    WHERE department_id = ?
+    ORDER BY last_name
+"""
+
+ALL_MANAGERS = """
+    SELECT DISTINCT e.first_name, e.last_name, d.name AS department
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    WHERE e.is_manager = 1
+    ORDER BY d.name, e.last_name
+"""
+
+DEPARTMENT_MANAGER = """
+    SELECT e.first_name, e.last_name
+    FROM departments d JOIN employees e ON e.id = d.manager_id
+    WHERE d.id = ?
+"""
+
+DEPARTMENT_ID = "SELECT id FROM departments WHERE name = ?"
+
+HIRE_DATE_FILTER = """
+    SELECT e.first_name, e.last_name, d.name AS department, e.hire_date
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    WHERE e.hire_date {operator} ?
+    ORDER BY e.hire_date
+"""
+
+# Inclusive hire-date range ("hired in 2022", "hired between ... and ..."):
+# one range scan of idx_employees_hire_date.
+HIRE_DATE_RANGE = """
+    SELECT e.first_name, e.last_name, d.name AS department, e.hire_date
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    WHERE e.hire_date BETWEEN ? AND ?
+    ORDER BY e.hire_date
+"""
+
+SALARY_FILTER = """
+    SELECT e.first_name, e.last_name, d.name AS department, e.salary
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    WHERE e.salary {operator} ?
+    ORDER BY e.salary DESC
+"""
+
+# Keyset-paginated variants of the listing queries. Each page continues
+# after the (sort key, id) of the last row of the previous page.
+DEPARTMENT_EMPLOYEES_PAGE = """
+    SELECT id, first_name, last_name, salary, hire_date
+    FROM employees
+    WHERE department_id = ? AND (last_name, id) > (?, ?)
+    ORDER BY last_name, id
+    LIMIT ?
+"""
+
+HIRE_DATE_FILTER_PAGE = """
+    SELECT e.id, e.first_name, e.last_name, d.name AS department, e.hire_date
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    WHERE e.hire_date {operator} ? AND (e.hire_date, e.id) > (?, ?)
+    ORDER BY e.hire_date, e.id
+    LIMIT ?
+"""
+
+HIRE_DATE_RANGE_PAGE = """
+    SELECT e.id, e.first_name, e.last_name, d.name AS department, e.hire_date
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    WHERE e.hire_date BETWEEN ? AND ? AND (e.hire_date, e.id) > (?, ?)
+    ORDER BY e.hire_date, e.id
+    LIMIT ?
+"""
+
+SALARY_FILTER_PAGE = """
+    SELECT e.id, e.first_name, e.last_name, d.name AS department, e.salary
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    WHERE e.salary {operator} ? AND (e.salary, e.id) < (?, ?)
+    ORDER BY e.salary DESC, e.id DESC
+    LIMIT ?
+"""
+
+# Batch variants used by QueryHandler.process_queries: one statement answers
+# the listing or manager question for a whole group of departments. The
+# department ids are passed as one JSON array so the SQL text stays fixed.
+DEPARTMENTS_EMPLOYEES = """
+    SELECT e.department_id, e.first_name, e.last_name, e.salary, e.hire_date
+    FROM employees e
+    WHERE e.department_id IN (SELECT value FROM json_each(?))
+    ORDER BY e.department_id, e.last_name, e.id
+"""
+
+DEPARTMENTS_MANAGERS = """
+    SELECT d.id AS department_id, e.first_name, e.last_name
+    FROM departments d JOIN employees e ON e.id = d.manager_id
+    WHERE d.id IN (SELECT value FROM json_each(?))
+"""
+
+# Hires per period. Company-wide buckets are counted from the covering
+# idx_employees_hire_date index; a department's from its rows in
+# idx_employees_department. Years come from department_hire_years instead.
+HIRE_BUCKETS = {
+    'year': "strftime('%Y', hire_date)",
+    'quarter': "strftime('%Y', hire_date) || '-Q' || "
+               "((CAST(strftime('%m', hire_date) AS INTEGER) + 2) / 3)",
+    'month': "strftime('%Y-%m', hire_date)",
+}
+
+HIRE_HISTOGRAM = """
+    SELECT {bucket} AS bucket, COUNT(*) AS hires
+    FROM employees
+    {where}
+    GROUP BY bucket
+    ORDER BY bucket
+"""
+
+HIRE_YEARS = """
+    SELECT hire_year, SUM(headcount) AS hires
+    FROM department_hire_years
+    GROUP BY hire_year
+    ORDER BY hire_year
+"""
+
+DEPARTMENT_HIRE_YEARS = """
+    SELECT hire_year, headcount AS hires
+    FROM department_hire_years
+    WHERE department_id = ?
+    ORDER BY hire_year
+"""
+
+# Conversation context (see chatbot/session_store.py). Each listing has an
+# id-only variant; follow-up questions then narrow that id list with the
+# context_* statements, whose first parameter is the ids as a JSON array, so
+# they are answered by rowid lookups instead of another pass over the table.
+ID_STATEMENTS = {
+    'department_employees': "SELECT id FROM employees WHERE department_id = ? ORDER BY id",
+    'all_managers': "SELECT id FROM employees WHERE is_manager = 1 ORDER BY id",
+    'hired_after': "SELECT id FROM employees WHERE hire_date > ? ORDER BY id",
+    'hired_since': "SELECT id FROM employees WHERE hire_date >= ? ORDER BY id",
+    'hired_before': "SELECT id FROM employees WHERE hire_date < ? ORDER BY id",
+    'salary_above': "SELECT id FROM employees WHERE salary > ? ORDER BY id",
+    'salary_below': "SELECT id FROM employees WHERE salary < ? ORDER BY id",
+    'hired_between': "SELECT id FROM employees WHERE hire_date BETWEEN ? AND ? ORDER BY id",
+}
+
+CONTEXT_FILTER = """
+    SELECT id FROM employees
+    WHERE id IN (SELECT value FROM json_each(?)) AND {condition}
+    ORDER BY id
+"""
+
+CONTEXT_EMPLOYEES = """
+    SELECT e.first_name, e.last_name, d.name AS department, e.salary, e.hire_date
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    WHERE e.id IN (SELECT value FROM json_each(?))
+    ORDER BY e.last_name, e.id
+"""
+
+CONTEXT_EMPLOYEES_PAGE = """
+    SELECT e.id, e.first_name, e.last_name, d.name AS department, e.salary, e.hire_date
+    FROM employees e JOIN departments d ON d.id = e.department_id
+    WHERE e.id IN (SELECT value FROM json_each(?)) AND (e.last_name, e.id) > (?, ?)
+    ORDER BY e.last_name, e.id
+    LIMIT ?
+"""
+
+CONTEXT_SALARY_STATS = """
+    SELECT COUNT(*), SUM(salary), MIN(salary), MAX(salary)
+    FROM employees
+    WHERE id IN (SELECT value FROM json_each(?))
+"""
+
+CONTEXT_MEDIAN_SALARY = """
+    SELECT AVG(salary) FROM (
+        SELECT salary FROM employees
+        WHERE id IN (SELECT value FROM json_each(?))
+        ORDER BY salary
+        LIMIT 2 - ? % 2 OFFSET (? - 1) / 2
+    )
+"""
+
+# Named statement catalog executed through DatabaseManager.execute_statement /
+# iter_statement. The SQL text is fixed per name (operator variants are
+# expanded here, not at call time), so each statement is prepared once per
+# pooled connection and then served from sqlite3's statement cache.
+STATEMENTS = {
+    'department_employees': DEPARTMENT_EMPLOYEES,
+    'department_employees_page': DEPARTMENT_EMPLOYEES_PAGE,
+    'all_managers': ALL_MANAGERS,
+    'department_manager': DEPARTMENT_MANAGER,
+    'department_id': DEPARTMENT_ID,
+    'departments_employees': DEPARTMENTS_EMPLOYEES,
+    'departments_managers': DEPARTMENTS_MANAGERS,
+    'hired_after': HIRE_DATE_FILTER.format(operator='>'),
+    'hired_since': HIRE_DATE_FILTER.format(operator='>='),
+    'hired_before': HIRE_DATE_FILTER.format(operator='<'),
+    'hired_after_page': HIRE_DATE_FILTER_PAGE.format(operator='>'),
+    'hired_since_page': HIRE_DATE_FILTER_PAGE.format(operator='>='),
+    'hired_before_page': HIRE_DATE_FILTER_PAGE.format(operator='<'),
+    'hired_between': HIRE_DATE_RANGE,
+    'hired_between_page': HIRE_DATE_RANGE_PAGE,
+    **{f'hires_per_{bucket}': HIRE_HISTOGRAM.format(bucket=sql, where='')
+       for bucket, sql in HIRE_BUCKETS.items()},
+    **{f'department_hires_per_{bucket}':
+       HIRE_HISTOGRAM.format(bucket=sql, where='WHERE department_id = ?')
+       for bucket, sql in HIRE_BUCKETS.items()},
+    'hire_years': HIRE_YEARS,
+    'department_hire_years': DEPARTMENT_HIRE_YEARS,
+    'salary_above': SALARY_FILTER.format(operator='>'),
+    'salary_below': SALARY_FILTER.format(operator='<'),
+    'salary_above_page': SALARY_FILTER_PAGE.format(operator='>'),
+    'salary_below_page': SALARY_FILTER_PAGE.format(operator='<'),
+    'department_stats': DEPARTMENT_STATS,
+    'all_department_stats': ALL_DEPARTMENT_STATS,
+    'base_department_stats': BASE_DEPARTMENT_STATS,
+    'department_median_salary': DEPARTMENT_MEDIAN_SALARY,
+    'company_median_salary': COMPANY_MEDIAN_SALARY,
+    'middle_salaries': MIDDLE_SALARIES,
+    'department_middle_salaries': DEPARTMENT_MIDDLE_SALARIES,
+    'salaries_below': SALARIES_BELOW,
+    'department_salaries_below': DEPARTMENT_SALARIES_BELOW,
+    'salaries_between': SALARIES_BETWEEN,
+    'department_salaries_between': DEPARTMENT_SALARIES_BETWEEN,
+    'employee_name_search': NAME_SEARCH,
+    'employee_name_like': NAME_SEARCH_LIKE,
+    **{f'{name}_ids': sql for name, sql in ID_STATEMENTS.items()},
+    'context_department': CONTEXT_FILTER.format(condition='department_id = ?'),
+    'context_hired_after': CONTEXT_FILTER.format(condition='hire_date > ?'),
+    'context_hired_since': CONTEXT_FILTER.format(condition='hire_date >= ?'),
+    'context_hired_before': CONTEXT_FILTER.format(condition='hire_date < ?'),
+    'context_salary_above': CONTEXT_FILTER.format(condition='salary > ?'),
+    'context_salary_below': CONTEXT_FILTER.format(condition='salary < ?'),
+    'context_employees': CONTEXT_EMPLOYEES,
+    'context_employees_page': CONTEXT_EMPLOYEES_PAGE,
+    'context_salary_stats': CONTEXT_SALARY_STATS,
+    'context_median_salary': CONTEXT_MEDIAN_SALARY,
+}
+
+# Statement names for the comparison operators the intent parser produces.
+HIRED_STATEMENTS = {'>': 'hired_after', '>=': 'hired_since', '<': 'hired_before'}
+SALARY_STATEMENTS = {'>': 'salary_above', '<': 'salary_below'}
+
+# Filtered query shapes that must be answered through an index, with
+# representative parameters for EXPLAIN QUERY PLAN checks.
+INDEXED_QUERIES = {
+    'department_employees': (DEPARTMENT_EMPLOYEES, (1,)),
+    'all_managers': (ALL_MANAGERS, ()),
+    'department_manager': (DEPARTMENT_MANAGER, (1,)),
+    'department_id': (DEPARTMENT_ID, ('sales',)),
+    'departments_employees': (DEPARTMENTS_EMPLOYEES, ('[1, 9]',)),
+    'departments_managers': (DEPARTMENTS_MANAGERS, ('[1, 9]',)),
+    'hired_after': (HIRE_DATE_FILTER.format(operator='>'), ('2021-01-01',)),
+    'hired_since': (HIRE_DATE_FILTER.format(operator='>='), ('2021-01-01',)),
+    'hired_before': (HIRE_DATE_FILTER.format(operator='<'), ('2021-01-01',)),
+    'salary_above': (SALARY_FILTER.format(operator='>'), (100000,)),
+    'salary_below': (SALARY_FILTER.format(operator='<'), (50000,)),
+    'department_median_salary': (DEPARTMENT_MEDIAN_SALARY, (1, 10, 10)),
+    'department_middle_salaries': (DEPARTMENT_MIDDLE_SALARIES, (1, 10)),
+    'salaries_between': (SALARIES_BETWEEN, (60000, 61000)),
+    'department_salaries_below': (DEPARTMENT_SALARIES_BELOW, (1, 60000)),
+    'department_employees_page': (DEPARTMENT_EMPLOYEES_PAGE, (1, 'M', 10, 50)),
+    'hired_after_page': (HIRE_DATE_FILTER_PAGE.format(operator='>'),
+                         ('2021-01-01', '2021-06-01', 10, 50)),
+    'salary_above_page': (SALARY_FILTER_PAGE.format(operator='>'),
+                          (100000, 120000, 10, 50)),
+    'hired_between': (HIRE_DATE_RANGE, ('2022-01-01', '2022-12-31')),
+    'hired_between_page': (HIRE_DATE_RANGE_PAGE,
+                           ('2022-01-01', '2022-12-31', '2022-06-01', 10, 50)),
+    'hires_per_quarter': (HIRE_HISTOGRAM.format(bucket=HIRE_BUCKETS['quarter'], where=''), ()),
+    'department_hires_per_month': (
+        HIRE_HISTOGRAM.format(bucket=HIRE_BUCKETS['month'], where='WHERE department_id = ?'),
+        (1,)),
+}
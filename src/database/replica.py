@@ -0,0 +1,174 @@
+import itertools
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from config import DB_PATH, DB_POOL_SIZE, DB_POOL_TIMEOUT, REPLICA_CHECK_INTERVAL
+from ..instrumentation.metrics import METRICS
+from .connection_pool import ConnectionPool
+from .db_manager import DatabaseManager
+
+# One loaded copy of the database. ``source_version`` is the disk
+# PRAGMA data_version read just before the copy was taken.
+Snapshot = namedtuple('Snapshot', ['generation', 'pool', 'anchor', 'taken_at',
+                                   'source_version', 'bytes', 'load_seconds'])
+
+_names = itertools.count(1)
+
+
+class SnapshotReplica:
+    """Serves reads from an in-memory copy of a database file.
+
+    The file is copied with the sqlite3 backup API into a shared-cache
+    ``mode=memory`` database, and a ConnectionPool of query-only
+    connections is opened on the copy. Readers never touch the file, so an
+    ingestion holding the write lock or saturating I/O cannot slow them.
+
+    At most every ``check_interval`` seconds the file's data_version is
+    compared with the snapshot's. On a change a new copy is built on a
+    background thread under a fresh name and swapped in with one reference
+    assignment; queries already running finish on the old copy, which is
+    freed when its last connection is released.
+
+    Exposes the connection()/stats()/close_all() interface of
+    ConnectionPool, so it can be passed to DatabaseManager as ``pool``.
+    """
+
+    def __init__(self, db_path, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 check_interval=REPLICA_CHECK_INTERVAL):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self._current = None
+        self._source = None
+        self._source_lock = threading.Lock()
+        self._refresh_lock = threading.RLock()
+        self._refreshing = False
+        self._last_check = 0.0
+        self._generations = itertools.count(1)
+        self.refreshes = 0
+        self.last_error = None
+
+    def _source_version(self):
+        with self._source_lock:
+            if self._source is None:
+                self._source = sqlite3.connect(self.db_path, check_same_thread=False)
+            return self._source.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self):
+        """Copy the database file into a new in-memory snapshot and swap it in."""
+        with self._refresh_lock:
+            start = time.perf_counter()
+            uri = f"file:replica-{next(_names)}?mode=memory&cache=shared"
+            anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            try:
+                version = self._source_version()
+                with self._source_lock:
+                    self._source.backup(anchor)
+                page_count = anchor.execute("PRAGMA page_count").fetchone()[0]
+                page_size = anchor.execute("PRAGMA page_size").fetchone()[0]
+            except Exception:
+                anchor.close()
+                raise
+            pool = ConnectionPool(uri, size=self.size, timeout=self.timeout,
+                                  pragmas={'query_only': 'ON'}, uri=True)
+            snapshot = Snapshot(next(self._generations), pool, anchor, time.time(),
+                                version, page_count * page_size,
+                                time.perf_counter() - start)
+
+            previous, self._current = self._current, snapshot
+            self.refreshes += 1
+            self._last_check = time.monotonic()
+            if previous is not None:
+                previous.pool.close_all()
+                previous.anchor.close()
+            return snapshot
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+            self.last_error = None
+        except sqlite3.Error as e:
+            self.last_error = str(e)
+        finally:
+            self._refreshing = False
+
+    def snapshot(self):
+        """Return the current snapshot, loading the first one synchronously."""
+        snapshot = self._current
+        if snapshot is None:
+            with self._refresh_lock:
+                return self._current or self.refresh()
+
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval and not self._refreshing:
+            self._last_check = now
+            if self._source_version() != snapshot.source_version:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_in_background,
+                                 name='snapshot-refresh', daemon=True).start()
+        return snapshot
+
+    def generation(self):
+        return self.snapshot().generation
+
+    @contextmanager
+    def connection(self):
+        """Pooled query-only connection to the current snapshot."""
+        with METRICS.timer('db_acquire'):
+            while True:
+                snapshot = self.snapshot()
+                try:
+                    conn = snapshot.pool.acquire()
+                    break
+                except sqlite3.ProgrammingError:
+                    # Swapped out between reading _current and acquiring.
+                    if not snapshot.pool.closed:
+                        raise
+        try:
+            yield conn
+        finally:
+            snapshot.pool.release(conn)
+
+    def stats(self):
+        """Snapshot generation, age and size plus the snapshot pool occupancy."""
+        snapshot = self._current
+        if snapshot is None:
+            return {'mode': 'snapshot', 'generation': None, 'size': self.size,
+                    'open': 0, 'idle': 0}
+        return dict(
+            snapshot.pool.stats(),
+            mode='snapshot',
+            generation=snapshot.generation,
+            age_seconds=round(time.time() - snapshot.taken_at, 3),
+            bytes=snapshot.bytes,
+            load_ms=round(snapshot.load_seconds * 1000, 3),
+            refreshes=self.refreshes,
+            refreshing=self._refreshing,
+            last_error=self.last_error,
+        )
+
+    def close_all(self):
+        with self._refresh_lock:
+            snapshot, self._current = self._current, None
+        if snapshot is not None:
+            snapshot.pool.close_all()
+            snapshot.anchor.close()
+        with self._source_lock:
+            if self._source is not None:
+                self._source.close()
+                self._source = None
+
+
+class SnapshotDatabaseManager(DatabaseManager):
+    """DatabaseManager whose reads are answered from a SnapshotReplica."""
+
+    def __init__(self, db_path=None, statements=None, **replica_options):
+        db_path = db_path or DB_PATH
+        super().__init__(db_path, SnapshotReplica(db_path, **replica_options), statements)
+
+    def data_version(self):
+        """Changes when a new snapshot is swapped in, not on every disk commit."""
+        return self.pool.generation()
@@ -0,0 +1,252 @@
+import os
+import sqlite3
+from .aggregates import rebuild_aggregates
+from .name_search import create_search_index, rebuild_search_index
+
+# Version 2 stores departments once: employees reference them by integer id
+# and carry is_manager as 0/1, and departments point at their manager's
+# employee row. Version 1 databases (department names and 'Yes'/'No' flags
+# on every employee row) are migrated by create_schema.
+SCHEMA_VERSION = 2
+
+EMPLOYEES_TABLE = '''
+CREATE TABLE IF NOT EXISTS employees (
+    id INTEGER PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    department_id INTEGER NOT NULL REFERENCES departments (id),
+    salary INTEGER NOT NULL,
+    hire_date DATE NOT NULL,
+    is_manager INTEGER NOT NULL DEFAULT 0
+)
+'''
+
+DEPARTMENTS_TABLE = '''
+CREATE TABLE IF NOT EXISTS departments (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    manager_id INTEGER REFERENCES employees (id)
+)
+'''
+
+# Materialized per-department aggregates, kept current by the triggers below
+# (bulk loads drop the triggers and rebuild these tables in one pass).
+DEPARTMENT_STATS_TABLE = '''
+CREATE TABLE IF NOT EXISTS department_stats (
+    department_id INTEGER PRIMARY KEY,
+    headcount INTEGER NOT NULL,
+    salary_sum INTEGER NOT NULL,
+    salary_min INTEGER,
+    salary_max INTEGER
+)
+'''
+
+DEPARTMENT_HIRE_YEARS_TABLE = '''
+CREATE TABLE IF NOT EXISTS department_hire_years (
+    department_id INTEGER NOT NULL,
+    hire_year INTEGER NOT NULL,
+    headcount INTEGER NOT NULL,
+    PRIMARY KEY (department_id, hire_year)
+)
+'''
+
+# Checksum of the CSV each table was last synced from (see csv_sync.py).
+SYNC_STATE_TABLE = '''
+CREATE TABLE IF NOT EXISTS sync_state (
+    source TEXT PRIMARY KEY,
+    checksum TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    synced_at TEXT NOT NULL
+)
+'''
+
+TABLES = (EMPLOYEES_TABLE, DEPARTMENTS_TABLE,
+          DEPARTMENT_STATS_TABLE, DEPARTMENT_HIRE_YEARS_TABLE, SYNC_STATE_TABLE)
+
+_ADD_TO_AGGREGATES = '''
+    INSERT INTO department_stats (department_id, headcount, salary_sum, salary_min, salary_max)
+    VALUES (NEW.department_id, 1, NEW.salary, NEW.salary, NEW.salary)
+    ON CONFLICT (department_id) DO UPDATE SET
+        headcount = headcount + 1,
+        salary_sum = salary_sum + excluded.salary_sum,
+        salary_min = MIN(salary_min, excluded.salary_min),
+        salary_max = MAX(salary_max, excluded.salary_max);
+    INSERT INTO department_hire_years (department_id, hire_year, headcount)
+    VALUES (NEW.department_id, CAST(substr(NEW.hire_date, 1, 4) AS INTEGER), 1)
+    ON CONFLICT (department_id, hire_year) DO UPDATE SET headcount = headcount + 1;
+'''
+
+# Runs after the row is gone (or changed), so a min/max that was held by the
+# old row is recomputed from the (department, salary) index.
+_REMOVE_FROM_AGGREGATES = '''
+    UPDATE department_stats SET
+        headcount = headcount - 1,
+        salary_sum = salary_sum - OLD.salary,
+        salary_min = CASE WHEN OLD.salary > salary_min THEN salary_min ELSE (
+            SELECT MIN(salary) FROM employees
+            WHERE department_id = OLD.department_id) END,
+        salary_max = CASE WHEN OLD.salary < salary_max THEN salary_max ELSE (
+            SELECT MAX(salary) FROM employees
+            WHERE department_id = OLD.department_id) END
+    WHERE department_id = OLD.department_id;
+    DELETE FROM department_stats
+    WHERE department_id = OLD.department_id AND headcount <= 0;
+    UPDATE department_hire_years SET headcount = headcount - 1
+    WHERE department_id = OLD.department_id
+      AND hire_year = CAST(substr(OLD.hire_date, 1, 4) AS INTEGER);
+    DELETE FROM department_hire_years
+    WHERE department_id = OLD.department_id AND headcount <= 0;
+'''
+
+# departments.manager_id follows the is_manager flags: it is the lowest
+# employee id flagged as manager in the department. Only rows that are or
+# were managers touch it.
+LINK_DEPARTMENT_MANAGERS = '''
+    UPDATE departments SET manager_id = (
+        SELECT MIN(id) FROM employees
+        WHERE is_manager = 1 AND department_id = departments.id)
+'''
+
+TRIGGERS = (
+    'CREATE TRIGGER IF NOT EXISTS trg_employees_stats_insert '
+    'AFTER INSERT ON employees BEGIN' + _ADD_TO_AGGREGATES + 'END',
+    'CREATE TRIGGER IF NOT EXISTS trg_employees_stats_delete '
+    'AFTER DELETE ON employees BEGIN' + _REMOVE_FROM_AGGREGATES + 'END',
+    'CREATE TRIGGER IF NOT EXISTS trg_employees_stats_update '
+    'AFTER UPDATE OF department_id, salary, hire_date ON employees BEGIN'
+    + _REMOVE_FROM_AGGREGATES + _ADD_TO_AGGREGATES + 'END',
+    'CREATE TRIGGER IF NOT EXISTS trg_employees_manager_insert '
+    'AFTER INSERT ON employees WHEN NEW.is_manager = 1 BEGIN'
+    + LINK_DEPARTMENT_MANAGERS + 'WHERE id = NEW.department_id; END',
+    'CREATE TRIGGER IF NOT EXISTS trg_employees_manager_delete '
+    'AFTER DELETE ON employees WHEN OLD.is_manager = 1 BEGIN'
+    + LINK_DEPARTMENT_MANAGERS + 'WHERE id = OLD.department_id; END',
+    'CREATE TRIGGER IF NOT EXISTS trg_employees_manager_update '
+    'AFTER UPDATE OF department_id, is_manager ON employees '
+    'WHEN OLD.is_manager = 1 OR NEW.is_manager = 1 BEGIN'
+    + LINK_DEPARTMENT_MANAGERS + 'WHERE id IN (OLD.department_id, NEW.department_id); END',
+)
+
+# Secondary indexes backing the QueryHandler query shapes. Department names
+# are resolved to ids before querying (case-insensitively, through the NOCASE
+# unique index on departments.name), so employee lookups compare integers.
+INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_employees_department '
+    'ON employees (department_id, last_name)',
+    'CREATE INDEX IF NOT EXISTS idx_employees_salary '
+    'ON employees (salary)',
+    'CREATE INDEX IF NOT EXISTS idx_employees_hire_date '
+    'ON employees (hire_date)',
+    'CREATE INDEX IF NOT EXISTS idx_employees_manager_department '
+    'ON employees (is_manager, department_id)',
+    'CREATE INDEX IF NOT EXISTS idx_employees_department_salary '
+    'ON employees (department_id, salary)',
+)
+
+# Version 1 -> 2: the old tables are renamed (their indexes and triggers go
+# with them), rows are copied into the new layout and the old tables dropped.
+# Departments that only appear on employee rows are added to departments.
+MIGRATE_V1_STATEMENTS = (
+    "ALTER TABLE employees RENAME TO employees_v1",
+    "ALTER TABLE departments RENAME TO departments_v1",
+    "DROP TABLE IF EXISTS department_stats",
+    "DROP TABLE IF EXISTS department_hire_years",
+    DEPARTMENTS_TABLE,
+    EMPLOYEES_TABLE,
+    DEPARTMENT_STATS_TABLE,
+    DEPARTMENT_HIRE_YEARS_TABLE,
+    "INSERT OR IGNORE INTO departments (id, name) SELECT id, name FROM departments_v1 ORDER BY id",
+    "INSERT OR IGNORE INTO departments (name) SELECT department FROM employees_v1 "
+    "GROUP BY department COLLATE NOCASE ORDER BY MIN(id)",
+    """
+    INSERT INTO employees (id, first_name, last_name, department_id, salary, hire_date,
+                           is_manager)
+    SELECT e.id, e.first_name, e.last_name, d.id, e.salary, e.hire_date,
+           e.is_manager = 'Yes'
+    FROM employees_v1 e JOIN departments d ON d.name = e.department
+    """,
+    "DROP TABLE employees_v1",
+    "DROP TABLE departments_v1",
+    LINK_DEPARTMENT_MANAGERS,
+)
+
+
+def link_department_managers(conn):
+    """Point every department at its manager (after a bulk load or sync)."""
+    conn.execute(LINK_DEPARTMENT_MANAGERS)
+
+
+def migrate_schema(conn):
+    """Move a version 1 database to the current layout in one transaction.
+
+    Returns True if a migration ran. The aggregate tables and the name
+    index are rebuilt from the migrated rows, and the file is vacuumed so
+    the pages freed by the old layout are returned.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(employees)")]
+    if 'department' not in columns:
+        return False
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    try:
+        for sql in MIGRATE_V1_STATEMENTS:
+            conn.execute(sql)
+        rebuild_aggregates(conn)
+        rebuild_search_index(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    conn.execute("VACUUM")
+    return True
+
+
+def create_schema(conn):
+    """Create (or migrate) tables, secondary indexes, triggers and the name search index."""
+    for ddl in TABLES:
+        conn.execute(ddl)
+    migrate_schema(conn)
+    for ddl in INDEXES + TRIGGERS:
+        conn.execute(ddl)
+    create_search_index(conn)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+
+def upgrade_schema(db_path):
+    """Bring an existing database file to the current schema if it is behind.
+
+    Used when a database is opened for queries, so an older file (such as a
+    version 1 export) works without running the setup script. Returns True
+    if the schema was created or migrated.
+    """
+    if not os.path.exists(db_path):
+        return False
+    conn = sqlite3.connect(db_path)
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return False
+        create_schema(conn)
+        return True
+    finally:
+        conn.close()
+
+
+def full_scans(conn, sql, params=()):
+    """Return the EXPLAIN QUERY PLAN steps that scan a table without an index."""
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [step[3] for step in plan
+            if step[3].startswith('SCAN') and 'INDEX' not in step[3]
+            and not step[3].startswith(('SCAN (subquery', 'SCAN CONSTANT'))]
+
+
+def check_query_plans(conn, queries):
+    """Map each query name to its full-table scans; an empty dict means all indexed."""
+    problems = {}
+    for name, (sql, params) in queries.items():
+        scans = full_scans(conn, sql, params)
+        if scans:
+            problems[name] = scans
+    return problems
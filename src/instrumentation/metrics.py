@@ -0,0 +1,169 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from config import METRICS_ENABLED, SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG_SIZE
+
+_DISABLED = nullcontext()
+
+# Pipeline stages in the order they happen for one question.
+STAGES = ('parse', 'cache', 'date_parse', 'analytics_load', 'analytics',
+          'db_acquire', 'db_execute', 'format', 'total')
+
+
+def _logger():
+    # logging is only needed once a slow query is seen; importing it lazily
+    # keeps it off the startup path.
+    import logging
+    logger = logging.getLogger(__name__)
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    return logger
+
+
+class Metrics:
+    """Per-stage timers, counters and a slow-query log for the query pipeline.
+
+    Disabled by default; while disabled ``timer()`` returns a shared no-op
+    context manager and the other recorders return immediately, so the
+    instrumentation left in the hot path costs one attribute check.
+    """
+
+    def __init__(self, enabled=METRICS_ENABLED, slow_query_ms=SLOW_QUERY_THRESHOLD_MS,
+                 slow_query_log_size=SLOW_QUERY_LOG_SIZE):
+        self.enabled = enabled
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.slow_queries = deque(maxlen=slow_query_log_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stages = {}
+        self._counters = {}
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._counters = {}
+            self.slow_queries.clear()
+
+    def observe(self, stage, seconds):
+        """Record one timing for a stage (and the current request trace)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                self._stages[stage] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                if seconds > entry[2]:
+                    entry[2] = seconds
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            trace[stage] = trace.get(stage, 0.0) + seconds
+
+    def timer(self, stage):
+        """Context manager timing a block as ``stage``."""
+        if not self.enabled:
+            return _DISABLED
+        return self._timed(stage)
+
+    @contextmanager
+    def _timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def count(self, counter, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    @contextmanager
+    def trace(self, trace=None):
+        """Collect per-stage times for the current request into ``trace``.
+
+        A request that is resumed on several threads (a streamed response)
+        re-activates the same dict around each step.
+        """
+        previous = getattr(self._local, 'trace', None)
+        trace = {} if trace is None else trace
+        self._local.trace = trace
+        try:
+            yield trace
+        finally:
+            self._local.trace = previous
+
+    def record_query(self, conn, sql, params, seconds, rows):
+        """Count a statement and log it with its query plan if it was slow."""
+        if not self.enabled:
+            return
+        self.count('queries')
+        self.count('rows_returned', rows)
+        if seconds < self.slow_query_seconds:
+            return
+        try:
+            plan = [step[3] for step in
+                    conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()]
+        except sqlite3.Error:
+            plan = []
+        entry = {
+            'sql': ' '.join(sql.split()),
+            'params': list(params or ()),
+            'ms': round(seconds * 1000, 3),
+            'rows': rows,
+            'plan': plan,
+            'at': time.time(),
+        }
+        self.slow_queries.append(entry)
+        _logger().warning("Slow query (%.1f ms, %d rows): %s params=%r plan=%s",
+                       entry['ms'], rows, entry['sql'], entry['params'], plan)
+
+    def snapshot(self):
+        """Return stage timings, counters and the slow-query log as a dict."""
+        with self._lock:
+            stages = {
+                stage: {
+                    'count': count,
+                    'total_ms': round(total * 1000, 3),
+                    'avg_ms': round(total * 1000 / count, 3),
+                    'max_ms': round(peak * 1000, 3),
+                }
+                for stage, (count, total, peak) in self._stages.items()
+            }
+            counters = dict(self._counters)
+        return {
+            'enabled': self.enabled,
+            'stages': stages,
+            'counters': counters,
+            'slow_queries': list(self.slow_queries),
+        }
+
+    def format_report(self):
+        """Human-readable stats dump for the REPL."""
+        snapshot = self.snapshot()
+        if not snapshot['enabled'] and not snapshot['stages']:
+            return "\nInstrumentation is off. Type 'stats on' to enable it."
+
+        lines = [f"\nPipeline stats ({'on' if snapshot['enabled'] else 'off'}):"]
+        rank = {stage: index for index, stage in enumerate(STAGES)}
+        ordered = sorted(snapshot['stages'].items(),
+                         key=lambda item: rank.get(item[0], len(STAGES)))
+        for stage, stats in ordered:
+            lines.append(f"- {stage:<11} n={stats['count']:<6} avg={stats['avg_ms']:.3f}ms "
+                         f"max={stats['max_ms']:.3f}ms total={stats['total_ms']:.1f}ms")
+        for counter, value in sorted(snapshot['counters'].items()):
+            lines.append(f"- {counter}: {value}")
+        if snapshot['slow_queries']:
+            lines.append(f"Slow queries (>= {self.slow_query_seconds * 1000:g}ms):")
+            for entry in snapshot['slow_queries']:
+                lines.append(f"- {entry['ms']}ms {entry['sql']} {entry['params']}")
+                lines.extend(f"    {step}" for step in entry['plan'])
+        return '\n'.join(lines)
+
+
+METRICS = Metrics()
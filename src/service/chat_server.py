@@ -0,0 +1,355 @@
+import asyncio
+import json
+import signal
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from config import (SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_MAX_PENDING,
+                    SERVER_REQUEST_TIMEOUT, SERVER_IDLE_TIMEOUT, SERVER_SHUTDOWN_GRACE)
+from ..chatbot.query_handler import QueryHandler
+from ..database.db_manager import DatabaseManager
+
+_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error',
+    503: 'Service Unavailable', 504: 'Gateway Timeout',
+}
+MAX_BODY_BYTES = 64 * 1024
+# Pseudo-methods _read_request returns for requests it could not read.
+_REJECTED = ('BAD', 'BAD_LENGTH', 'TOO_LARGE')
+STREAM_CHUNK_BYTES = 16 * 1024   # flush a streamed response at this size...
+STREAM_FLUSH_SECONDS = 0.05      # ...or once a chunk has been collecting this long
+
+
+class ChatServer:
+    """Minimal asyncio HTTP/1.1 front-end for QueryHandler.
+
+    Endpoints:
+        POST /query   body {"query": "..."} -> {"response": "..."}
+        POST /query/stream  same body, response streamed as chunked text/plain
+        GET  /health  liveness probe
+        GET  /stats   server, pool, cache and pipeline metrics
+
+    Conversation context (follow-ups, "next page") is kept per X-Session-Id.
+    A request without one uses an id issued for its connection, returned in
+    the X-Session-Id response header so the client can send it later.
+
+    Queries run on a bounded thread pool sized to the connection pool. When
+    ``max_pending`` requests are already in flight new ones are rejected with
+    503 instead of queueing without bound, and each request is cut off with
+    504 after ``request_timeout`` seconds.
+    """
+
+    def __init__(self, handler=None, host=SERVER_HOST, port=SERVER_PORT,
+                 workers=SERVER_WORKERS, max_pending=SERVER_MAX_PENDING,
+                 request_timeout=SERVER_REQUEST_TIMEOUT, idle_timeout=SERVER_IDLE_TIMEOUT):
+        self.handler = handler or QueryHandler()
+        self.host = host
+        self.port = port
+        self.max_pending = max_pending
+        self.request_timeout = request_timeout
+        self.idle_timeout = idle_timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix='query-worker')
+        self._server = None
+        self._pending = 0
+        self._connections = set()
+        self._stopping = None
+        self.counters = {'requests': 0, 'rejected': 0, 'timeouts': 0, 'errors': 0}
+
+    async def start(self):
+        self._stopping = asyncio.Event()
+        self._server = await asyncio.start_server(self._serve_connection,
+                                                  self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        """Serve until stop() is called or SIGINT/SIGTERM is received."""
+        if self._server is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._stopping.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        await self._stopping.wait()
+        await self.stop()
+
+    async def stop(self, grace=SERVER_SHUTDOWN_GRACE):
+        """Stop accepting connections, drain in-flight requests, then close."""
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+        deadline = time.monotonic() + grace
+        while self._pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for writer in list(self._connections):
+            writer.close()
+        self.executor.shutdown(wait=False)
+        self.handler.close()
+        if self._stopping is not None:
+            self._stopping.set()
+
+    def stats(self):
+        return dict(self.handler.stats(),
+                    server=dict(self.counters, pending=self._pending,
+                                connections=len(self._connections)))
+
+    async def _serve_connection(self, reader, writer):
+        self._connections.add(writer)
+        connection_session = uuid.uuid4().hex
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader),
+                                                     self.idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                        ConnectionError):
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                # After a rejected request the rest of it (an unread body) is
+                # still on the connection, so it cannot carry another one.
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and method not in _REJECTED)
+                session_id = headers.get('x-session-id') or connection_session
+                if path == '/query/stream' and method == 'POST':
+                    await self._stream_query(writer, body, session_id, keep_alive)
+                else:
+                    status, payload = await self._dispatch(method, path, body, session_id)
+                    self._write_response(writer, status, payload, keep_alive, session_id)
+                    await writer.drain()
+                if not keep_alive or self._server is None or writer.is_closing():
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            return ('BAD', '', {}, b'')
+        method, path, _ = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = headers.get('content-length') or '0'
+        if not length.isdigit():
+            return ('BAD_LENGTH', path, headers, b'')
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            return ('TOO_LARGE', path, headers, b'')
+        body = await reader.readexactly(length) if length else b''
+        return method, path, headers, body
+
+    @staticmethod
+    def _parse_query(body):
+        try:
+            query = json.loads(body or b'{}').get('query')
+        except (ValueError, AttributeError):
+            query = None
+        if not isinstance(query, str) or not query.strip():
+            return None
+        return query
+
+    async def _dispatch(self, method, path, body, session_id):
+        if method == 'BAD':
+            return 400, {'error': 'Malformed request line.'}
+        if method == 'BAD_LENGTH':
+            return 400, {'error': 'Invalid Content-Length.'}
+        if method == 'TOO_LARGE':
+            return 413, {'error': 'Request body too large.'}
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/stats':
+            return 200, self.stats()
+        if path != '/query':
+            return 404, {'error': f'Unknown path {path}.'}
+        if method != 'POST':
+            return 405, {'error': 'Use POST /query.'}
+
+        query = self._parse_query(body)
+        if query is None:
+            return 400, {'error': 'Body must be JSON with a non-empty "query".'}
+
+        return await self._run_query(query, session_id)
+
+    async def _stream_query(self, writer, body, session_id, keep_alive):
+        """Send the response as it is produced, using chunked transfer encoding.
+
+        If a piece takes longer than ``request_timeout`` the connection is
+        aborted without the terminating chunk, so the client sees a cut-off
+        body as an error rather than as a complete answer. The generator is
+        closed only once the worker still producing a piece has finished.
+        """
+        query = self._parse_query(body)
+        if query is None:
+            self._write_response(writer, 400, {
+                'error': 'Body must be JSON with a non-empty "query".'}, keep_alive)
+            await writer.drain()
+            return
+        if self._pending >= self.max_pending:
+            self.counters['rejected'] += 1
+            self._write_response(writer, 503, {'error': 'Server busy, retry later.'},
+                                 keep_alive)
+            await writer.drain()
+            return
+
+        self._pending += 1
+        self.counters['requests'] += 1
+        loop = asyncio.get_running_loop()
+        pieces = self.handler.stream_query(query, session_id)
+        writer.write((
+            'HTTP/1.1 200 OK\r\n'
+            'Content-Type: text/plain; charset=utf-8\r\n'
+            'Transfer-Encoding: chunked\r\n'
+            f'X-Session-Id: {session_id}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+        ).encode('latin-1'))
+        future = None
+        max_bytes = 1  # the first piece goes out on its own, as soon as it exists
+        try:
+            while True:
+                # Shielded: a timeout must not cancel the wrapper of a worker
+                # that is still running the generator.
+                future = loop.run_in_executor(self.executor, _next_chunk, pieces, max_bytes)
+                max_bytes = STREAM_CHUNK_BYTES
+                chunk = await asyncio.wait_for(asyncio.shield(future), self.request_timeout)
+                if not chunk:
+                    break
+                data = chunk.encode('utf-8')
+                writer.write(f'{len(data):X}\r\n'.encode('latin-1') + data + b'\r\n')
+                await writer.drain()
+            writer.write(b'0\r\n\r\n')
+            await writer.drain()
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            writer.transport.abort()
+        except ConnectionError:
+            writer.transport.abort()
+        finally:
+            await self._close_stream(loop, pieces, future)
+
+    async def _close_stream(self, loop, pieces, future):
+        """Close a response generator after its last _next_chunk call has returned."""
+        try:
+            if future is not None:
+                await asyncio.wait([future])
+            await loop.run_in_executor(self.executor, pieces.close)
+        except RuntimeError:
+            # The executor was shut down by stop(); no worker runs the generator.
+            pieces.close()
+        finally:
+            self._pending -= 1
+
+    async def _run_query(self, query, session_id=None):
+        if self._pending >= self.max_pending:
+            self.counters['rejected'] += 1
+            return 503, {'error': 'Server busy, retry later.'}
+
+        self.counters['requests'] += 1
+        try:
+            if hasattr(self.handler, 'answer'):
+                # FanOutQueryHandler: add how long each database took.
+                result = await asyncio.wait_for(self._submit(self.handler.answer, query),
+                                                self.request_timeout)
+                return 200, {'response': result.response,
+                             'databases': [timing._asdict() for timing in result.timings]}
+            response = await asyncio.wait_for(
+                self._submit(self.handler.process_query, query, session_id),
+                self.request_timeout,
+            )
+            return 200, {'response': response}
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            return 504, {'error': f'Query timed out after {self.request_timeout}s.'}
+        except Exception as e:
+            self.counters['errors'] += 1
+            return 500, {'error': str(e)}
+
+    def _submit(self, fn, *args):
+        """Run ``fn`` on the query pool, holding a pending slot until the worker is done.
+
+        A request that times out gets its 504 at once, but the slot stays
+        taken while the worker keeps running, so backpressure still counts
+        the saturated pool. The returned awaitable is shielded: a timeout
+        does not detach the worker's future from that bookkeeping.
+        """
+        future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        self._pending += 1
+        future.add_done_callback(self._release)
+        return asyncio.shield(future)
+
+    def _release(self, future):
+        self._pending -= 1
+        if not future.cancelled():
+            future.exception()  # retrieved here if the request already timed out
+
+    @staticmethod
+    def _write_response(writer, status, payload, keep_alive, session_id=None):
+        body = json.dumps(payload).encode('utf-8')
+        headers = [
+            f'HTTP/1.1 {status} {_REASONS.get(status, "")}',
+            'Content-Type: application/json',
+            f'Content-Length: {len(body)}',
+            f'Connection: {"keep-alive" if keep_alive else "close"}',
+        ]
+        if session_id is not None:
+            headers.append(f'X-Session-Id: {session_id}')
+        if status == 503:
+            headers.append('Retry-After: 1')
+        writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body)
+
+
+def _next_chunk(pieces, max_bytes=STREAM_CHUNK_BYTES, max_seconds=STREAM_FLUSH_SECONDS):
+    """Pull response pieces until roughly max_bytes are buffered or max_seconds
+    have passed ('' when done)."""
+    buffered = []
+    size = 0
+    deadline = time.monotonic() + max_seconds
+    for piece in pieces:
+        buffered.append(piece)
+        size += len(piece)
+        if size >= max_bytes or time.monotonic() >= deadline:
+            break
+    return ''.join(buffered)
+
+
+def run(host=SERVER_HOST, port=SERVER_PORT, snapshot=None, databases=None):
+    """Run the chat server until interrupted.
+
+    ``snapshot`` overrides SERVE_FROM_SNAPSHOT (serve reads from an in-memory copy).
+    ``databases`` (a directory, glob or path) answers across several databases.
+    """
+    async def _main():
+        if databases:
+            from ..chatbot.fanout import FanOutQueryHandler
+            handler = FanOutQueryHandler(databases)
+        else:
+            handler = QueryHandler() if snapshot is None else QueryHandler(snapshot=snapshot)
+        server = await ChatServer(handler, host=host, port=port).start()
+        print(f"Chat server listening on http://{server.host}:{server.port}")
+        await server.serve_forever()
+        print("Chat server stopped.")
+
+    try:
+        asyncio.run(_main())
+    finally:
+        DatabaseManager.close_all()
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.database.db_manager import DatabaseManager
+
+DEPARTMENTS = [(1, 'Legal'), (2, 'Sales')]
+EMPLOYEES = [
+    (1, 'Ann', 'Lee', 1, 90000, '2020-01-15', 1),
+    (2, 'Bob', 'Moss', 1, 70000, '2021-03-01', 0),
+    (3, 'Cid', 'Park', 1, 65000, '2022-06-30', 0),
+    (4, 'Dee', 'Ray', 2, 80000, '2019-11-05', 1),
+    (5, 'Eve', 'Sun', 2, 55000, '2023-02-10', 0),
+]
+
+
+def _build_db(path, departments, employees):
+    db = DatabaseManager(path)
+    db.create_tables()
+    with db.get_connection() as conn:
+        conn.executemany("INSERT INTO departments (id, name) VALUES (?, ?)", departments)
+        conn.executemany("INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?, ?)", employees)
+        conn.commit()
+    db.close()
+    return path
+
+
+@pytest.fixture
+def make_db():
+    """Build a database file from (id, name) departments and employee rows."""
+    return _build_db
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A small company database: Legal (3 employees) and Sales (2)."""
+    return _build_db(tmp_path / 'company.db', DEPARTMENTS, EMPLOYEES)
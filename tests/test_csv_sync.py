@@ -0,0 +1,49 @@
+import csv
+import sqlite3
+
+from src.database.bulk_loader import (DEPARTMENT_COLUMNS, EMPLOYEE_COLUMNS, EMPLOYEE_CSV_COLUMNS,
+                                      department_row, employee_row)
+from src.database.csv_sync import CsvSync
+
+
+def _write_csv(path, header, rows):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+
+def _employees_csv(tmp_path):
+    return _write_csv(tmp_path / 'employees.csv', EMPLOYEE_CSV_COLUMNS, [
+        (1, 'Ann', 'Lee', 'Legal', 90000, '2020-01-15', 'Yes'),
+        (6, 'Fay', 'Tan', 'Research', 60000, '2024-04-01', 'No'),
+    ])
+
+
+def test_department_new_to_the_export_is_added_with_its_rows(db_path, tmp_path):
+    path = _employees_csv(tmp_path)
+    conn = sqlite3.connect(db_path)
+    result = CsvSync(conn, batch_size=1).sync(
+        [(path, 'employees', EMPLOYEE_COLUMNS, employee_row)])
+    assert result['tables']['employees']['new_departments'] == ['Research']
+    assert conn.execute(
+        "SELECT d.name FROM employees e JOIN departments d ON d.id = e.department_id "
+        "WHERE e.id = 6").fetchone() == ('Research',)
+    conn.close()
+
+
+def test_departments_sync_keeps_departments_employees_reference(db_path, tmp_path):
+    conn = sqlite3.connect(db_path)
+    CsvSync(conn).sync([(_employees_csv(tmp_path), 'employees', EMPLOYEE_COLUMNS, employee_row)])
+
+    # departments.csv does not list Research; only its manager column changed.
+    path = _write_csv(tmp_path / 'departments.csv', ('id', 'name', 'manager'),
+                      [(1, 'Legal', 'Someone Else'), (2, 'Sales', 'Dee Ray')])
+    result = CsvSync(conn).sync([(path, 'departments', DEPARTMENT_COLUMNS, department_row)])
+    counts = result['tables']['departments']
+    assert (counts['updated'], counts['deleted']) == (0, 0)
+    assert conn.execute(
+        "SELECT COUNT(*) FROM employees e LEFT JOIN departments d ON d.id = e.department_id "
+        "WHERE d.id IS NULL").fetchone() == (0,)
+    conn.close()
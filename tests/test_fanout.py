@@ -0,0 +1,82 @@
+import re
+
+import pytest
+
+from src.chatbot.fanout import FanOutQueryHandler
+from src.chatbot.query_handler import QueryHandler
+
+# (id, first, last, department, salary, hire date, manager) per database.
+# gamma has the departments but no employees.
+SHARDS = {
+    'acme': [
+        (1, 'Ann', 'Lee', 'Legal', 90000, '2020-01-15', 1),
+        (2, 'Bob', 'Moss', 'Legal', 50000, '2021-03-01', 0),
+        (3, 'Cid', 'Park', 'Sales', 70000, '2022-06-30', 1),
+    ],
+    'beta': [
+        (4, 'Dee', 'Ray', 'Sales', 62000, '2019-11-05', 0),
+        (5, 'Eve', 'Sun', 'Legal', 65000, '2023-02-10', 0),
+        (6, 'Fay', 'Tan', 'Sales', 100000, '2018-07-20', 1),
+        (7, 'Gus', 'Uhl', 'Sales', 55000, '2021-09-12', 0),
+    ],
+    'gamma': [],
+}
+
+QUESTIONS = [
+    "show legal department",
+    "show sales department",
+    "list all managers",
+    "show employees hired after 2020",
+    "show employees with salary above 60000",
+    "average salary",
+    "average salary in sales department",
+    "median salary",
+    "median salary in legal department",
+    "median salary in sales department",
+    "highest salary in sales department",
+    "headcount",
+    "headcount in legal department",
+]
+
+
+def _rows(employees, departments):
+    ids = {name: dept_id for dept_id, name in departments}
+    return [row[:3] + (ids[row[3]],) + row[4:] for row in employees]
+
+
+@pytest.fixture
+def handlers(tmp_path, make_db):
+    shards = tmp_path / 'shards'
+    shards.mkdir()
+    for index, (source, employees) in enumerate(SHARDS.items()):
+        # Department ids differ between databases; names are what match.
+        departments = [(1, 'Legal'), (2, 'Sales')][::-1 if index % 2 else 1]
+        make_db(shards / f'{source}.db', departments, _rows(employees, departments))
+    departments = [(1, 'Legal'), (2, 'Sales')]
+    combined = make_db(tmp_path / 'combined.db', departments,
+                       _rows([row for rows in SHARDS.values() for row in rows], departments))
+    fanout = FanOutQueryHandler(shards)
+    single = QueryHandler(page_size=0, db_path=combined)
+    yield fanout, single
+    fanout.close()
+    single.close()
+
+
+@pytest.mark.parametrize('question', QUESTIONS)
+def test_fanout_matches_one_combined_database(handlers, question):
+    fanout, single = handlers
+    merged = re.sub(r'\[(?:acme|beta|gamma)\] ', '', fanout.process_query(question))
+    assert merged == single.process_query(question)
+
+
+def test_fanout_median_of_odd_and_even_counts(handlers):
+    fanout, _ = handlers
+    # Company: 50, 55, 62, [65], 70, 90, 100. Sales: 55, [62, 70], 100.
+    assert "$65,000.00" in fanout.process_query("median salary")
+    assert "$66,000.00" in fanout.process_query("median salary in sales department")
+
+
+def test_fanout_tags_rows_with_their_database(handlers):
+    fanout, _ = handlers
+    response = fanout.process_query("show legal department")
+    assert "[acme] Ann Lee" in response and "[beta] Eve Sun" in response
@@ -0,0 +1,31 @@
+import pytest
+
+from src.chatbot.intent_parser import DEFAULT_PARSER, UNKNOWN
+
+
+@pytest.mark.parametrize('query', ["find employee", "search for staff", "look up people?"])
+def test_find_without_a_name_is_not_a_lookup(query):
+    assert DEFAULT_PARSER.parse(query) == UNKNOWN
+
+
+def test_find_employee_by_name():
+    intent = DEFAULT_PARSER.parse("find employee john smi")
+    assert (intent.kind, intent.value) == ('find_employee', 'john smi')
+    assert DEFAULT_PARSER.parse("search for staff named ann").value == 'ann'
+
+
+@pytest.mark.parametrize('query', ["show engineering department average salary",
+                                   "average salary in engineering department"])
+def test_average_salary_in_a_department(query):
+    intent = DEFAULT_PARSER.parse(query)
+    assert (intent.kind, intent.department) == ('average_salary', 'engineering')
+
+
+@pytest.mark.parametrize('query, operator, value', [
+    ("show employees hired since 2021", '>=', '2021'),
+    ("employees hired after march 2021", '>', 'march 2021'),
+    ("who was hired before 2021-03", '<', '2021-03'),
+])
+def test_hired_comparisons(query, operator, value):
+    intent = DEFAULT_PARSER.parse(query)
+    assert (intent.kind, intent.operator, intent.value) == ('hired', operator, value)
@@ -0,0 +1,14 @@
+from src.database.db_manager import DatabaseManager
+from src.database.name_search import NameSearch
+
+
+def test_best_ranked_match_past_the_candidate_limit(tmp_path, make_db):
+    # Ten first-name matches come before the one last-name match in rowid order.
+    employees = [(i, 'Lee', f'Name{i}', 1, 50000, '2020-01-01', 0) for i in range(1, 11)]
+    employees.append((11, 'Ann', 'Lee', 1, 50000, '2020-01-01', 0))
+    path = make_db(tmp_path / 'names.db', [(1, 'Legal')], employees)
+
+    db = DatabaseManager(path)
+    rows = NameSearch(db).search("lee", limit=1, candidates=3)
+    assert [(row['first_name'], row['last_name']) for row in rows] == [('Ann', 'Lee')]
+    db.close()
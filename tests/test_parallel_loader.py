@@ -0,0 +1,80 @@
+import csv
+import sqlite3
+
+import pytest
+
+from src.database.bulk_loader import (DEPARTMENT_COLUMNS, EMPLOYEE_COLUMNS, EMPLOYEE_CSV_COLUMNS,
+                                      BulkLoader, checked_employee_row, department_row)
+from src.database.parallel_loader import ParallelLoader
+
+TABLES = ('employees', 'departments', 'department_stats', 'department_hire_years')
+
+
+def _write_shards(directory):
+    """Three employee shards and departments.csv; Research is only named by employees."""
+    directory.mkdir()
+    names = ['Legal', 'Sales', 'Legal', 'Research', 'Sales']
+    for shard in range(3):
+        with open(directory / f'employees{shard}.csv', 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(EMPLOYEE_CSV_COLUMNS)
+            for row_id in range(shard * 5 + 1, shard * 5 + 6):
+                writer.writerow((row_id, f'First{row_id}', f'Last{row_id}',
+                                 names[row_id % len(names)], 40000 + row_id * 1000,
+                                 f'20{10 + row_id % 12}-0{1 + row_id % 9}-15',
+                                 'Yes' if row_id % 5 == 0 else 'No'))
+    with open(directory / 'departments.csv', 'w', newline='') as file:
+        csv.writer(file).writerows([('id', 'name', 'manager'), (1, 'Legal', ''), (2, 'Sales', '')])
+    return sorted(directory.glob('employees*.csv')), directory / 'departments.csv'
+
+
+def _contents(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+                for table in TABLES}
+    finally:
+        conn.close()
+
+
+def test_process_pool_load_matches_bulk_loader(tmp_path, make_db):
+    employees, departments = _write_shards(tmp_path / 'csv')
+    bulk_path = make_db(tmp_path / 'bulk.db', [], [])
+    pool_path = make_db(tmp_path / 'pool.db', [], [])
+
+    conn = sqlite3.connect(bulk_path)
+    BulkLoader(conn, batch_size=2).load(
+        [(path, 'employees', EMPLOYEE_COLUMNS, checked_employee_row) for path in employees]
+        + [(departments, 'departments', DEPARTMENT_COLUMNS, department_row)])
+    conn.close()
+    conn = sqlite3.connect(pool_path)
+    result = ParallelLoader(conn, batch_size=2, workers=2).load([
+        (employees, 'employees', EMPLOYEE_COLUMNS, checked_employee_row),
+        (departments, 'departments', DEPARTMENT_COLUMNS, department_row),
+    ])
+    conn.close()
+
+    assert result['rows'] == {'departments': 2, 'employees': 15}
+    bulk, pool = _contents(bulk_path), _contents(pool_path)
+    assert len(bulk['employees']) == 15
+    assert bulk['departments'] == pool['departments'] == [
+        (1, 'Legal', 5), (2, 'Sales', None), (3, 'Research', None)]
+    assert bulk == pool
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_id_in_two_shards_names_the_file_and_id(db_path, tmp_path, workers):
+    shards = tmp_path / 'shards'
+    shards.mkdir()
+    for name, row_id in (('a.csv', 10), ('b.csv', 11), ('c.csv', 10)):
+        with open(shards / name, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(EMPLOYEE_CSV_COLUMNS)
+            writer.writerow((row_id, 'Ann', 'Lee', 'Legal', 90000, '2020-01-15', 'No'))
+
+    conn = sqlite3.connect(db_path)
+    loader = ParallelLoader(conn, workers=workers)
+    with pytest.raises(sqlite3.IntegrityError, match=r"\.csv: employees row with id 10 "):
+        loader.load([(shards, 'employees', EMPLOYEE_COLUMNS, checked_employee_row)], clear=True)
+    assert conn.execute("SELECT COUNT(*) FROM employees").fetchone() == (5,)
+    conn.close()
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from src.chatbot.query_handler import QueryHandler
+
+
+def test_department_named_before_the_average(db_path):
+    handler = QueryHandler(page_size=0, db_path=db_path)
+    scoped = handler.process_query("show legal department average salary")
+    assert scoped == handler.process_query("average salary in legal department")
+    assert scoped != handler.process_query("average salary")
+    handler.close()
+
+
+def test_salary_too_large_for_sqlite(db_path):
+    handler = QueryHandler(page_size=0, db_path=db_path)
+    response = handler.process_query("salary above " + "9" * 30)
+    assert response == "Please specify a valid salary amount."
+    handler.close()
+
+
+def test_version_1_database_is_migrated_when_opened(tmp_path):
+    path = tmp_path / 'v1.db'
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE employees (id INTEGER PRIMARY KEY, first_name TEXT NOT NULL, "
+                 "last_name TEXT NOT NULL, department TEXT NOT NULL, salary INTEGER NOT NULL, "
+                 "hire_date DATE NOT NULL, is_manager TEXT NOT NULL)")
+    conn.execute("CREATE TABLE departments (id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+                  "manager TEXT NOT NULL)")
+    conn.execute("INSERT INTO departments VALUES (1, 'Legal', 'Ann Lee')")
+    conn.executemany("INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        (1, 'Ann', 'Lee', 'Legal', 90000, '2020-01-15', 'Yes'),
+        (2, 'Bob', 'Moss', 'Legal', 70000, '2021-03-01', 'No'),
+    ])
+    conn.commit()
+    conn.close()
+
+    handler = QueryHandler(page_size=0, db_path=path)
+    assert "$80,000.00" in handler.process_query("average salary")
+    assert "Ann Lee" in handler.process_query("who is the legal manager")
+    handler.close()
+
+
+@pytest.mark.parametrize('query, names', [
+    ("show employees hired since 2021", {'Bob Moss', 'Cid Park', 'Eve Sun'}),
+    ("show employees hired after 2021", {'Cid Park', 'Eve Sun'}),
+    ("show employees hired before 2021", {'Ann Lee', 'Dee Ray'}),
+    ("show employees hired since march 2021", {'Bob Moss', 'Cid Park', 'Eve Sun'}),
+    ("show employees hired after march 2021", {'Cid Park', 'Eve Sun'}),
+    ("show employees hired before april 2021", {'Ann Lee', 'Bob Moss', 'Dee Ray'}),
+])
+def test_hired_since_after_before(db_path, query, names):
+    handler = QueryHandler(page_size=0, db_path=db_path)
+    response = handler.process_query(query)
+    assert {line[2:].split(' (')[0] for line in response.splitlines()
+            if line.startswith('- ')} == names
+    handler.close()
+
+
+def test_first_page_is_cached_and_next_still_pages(db_path):
+    handler = QueryHandler(page_size=2, db_path=db_path)
+    first = handler.process_query("show employees in legal department", session_id='a')
+    hits = handler.cache_stats()['hits']
+    assert handler.process_query("show employees in legal department", session_id='b') == first
+    assert handler.cache_stats()['hits'] == hits + 1
+    assert "Cid Park" in handler.process_query("next", session_id='b')
+    assert "Cid Park" not in first
+    handler.close()
@@ -0,0 +1,19 @@
+import sqlite3
+
+from src.database.queries import INDEXED_QUERIES
+from src.database.schema import check_query_plans
+
+
+def test_indexed_queries_do_not_scan(db_path):
+    conn = sqlite3.connect(db_path)
+    assert check_query_plans(conn, INDEXED_QUERIES) == {}
+    conn.close()
+
+
+def test_dropped_index_is_reported_as_a_scan(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP INDEX idx_employees_hire_date")
+    scans = check_query_plans(conn, INDEXED_QUERIES)
+    assert 'hired_after' in scans
+    assert all('SCAN' in step for steps in scans.values() for step in steps)
+    conn.close()
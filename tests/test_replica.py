@@ -0,0 +1,46 @@
+import sqlite3
+import time
+
+import pytest
+
+from src.database.replica import SnapshotDatabaseManager
+
+
+def _count(db):
+    return db.execute_query("SELECT COUNT(*) FROM employees")[0][0]
+
+
+def _hire(db_path, employee_id):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO employees VALUES (?, 'New', 'Hire', 1, 50000, '2024-01-01', 0)",
+                 (employee_id,))
+    conn.commit()
+    conn.close()
+
+
+def test_replica_serves_reads_and_sees_writes_after_a_refresh(db_path):
+    db = SnapshotDatabaseManager(db_path, check_interval=3600)
+    assert _count(db) == 5
+    generation = db.data_version()
+
+    _hire(db_path, 6)
+    # Reads come from the in-memory copy until it is refreshed.
+    assert _count(db) == 5
+    db.pool.refresh()
+    assert _count(db) == 6
+    assert db.data_version() != generation
+
+    with pytest.raises(sqlite3.OperationalError):
+        db.execute_query("DELETE FROM employees")
+    db.close()
+
+
+def test_replica_refreshes_in_the_background_after_a_write(db_path):
+    db = SnapshotDatabaseManager(db_path, check_interval=0)
+    generation = db.data_version()
+    _hire(db_path, 6)
+    deadline = time.monotonic() + 5
+    while db.data_version() == generation and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _count(db) == 6
+    db.close()
@@ -0,0 +1,14 @@
+from itertools import chain, repeat
+
+from src.chatbot.result_cache import ResultCache
+
+
+def test_result_computed_before_a_write_is_not_cached():
+    versions = chain([1], repeat(2))
+    cache = ResultCache(version_source=lambda: next(versions))
+    version = cache.version()
+    # The tables change while the response is being computed.
+    cache.put('key', 'stale', version)
+    assert cache.get('key') is None
+    cache.put('key', 'fresh', cache.version())
+    assert cache.get('key') == 'fresh'
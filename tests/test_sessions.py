@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+from src.chatbot.query_handler import QueryHandler
+from src.service.chat_server import ChatServer
+
+
+def test_anonymous_callers_do_not_share_context(db_path):
+    handler = QueryHandler(page_size=0, db_path=db_path)
+    handler.process_query("show legal department")
+    assert handler.process_query("how many of them") == handler.formatter.format_no_context()
+
+    handler.process_query("show legal department", 'a')
+    assert "3 employees" in handler.process_query("how many of them", 'a')
+    assert handler.process_query("how many of them", 'b') == handler.formatter.format_no_context()
+    handler.close()
+
+
+async def _post(reader, writer, query):
+    body = json.dumps({'query': query}).encode()
+    writer.write(b'POST /query HTTP/1.1\r\nContent-Type: application/json\r\n'
+                 + f'Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+    await writer.drain()
+    await reader.readline()
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode()
+        if line == '\r\n':
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    payload = json.loads(await reader.readexactly(int(headers['content-length'])))
+    return headers, payload['response']
+
+
+def test_anonymous_connections_get_their_own_sessions(db_path):
+    async def scenario():
+        handler = QueryHandler(page_size=0, db_path=db_path)
+        server = await ChatServer(handler, port=0).start()
+        first = await asyncio.open_connection(server.host, server.port)
+        second = await asyncio.open_connection(server.host, server.port)
+        try:
+            first_headers, _ = await _post(*first, "show legal department")
+            second_headers, response = await _post(*second, "how many of them")
+            assert response == handler.formatter.format_no_context()
+            _, response = await _post(*first, "how many of them")
+            assert "3 employees" in response
+            assert first_headers['x-session-id'] != second_headers['x-session-id']
+        finally:
+            for _, writer in (first, second):
+                writer.close()
+            await server.stop(grace=0)
+
+    asyncio.run(scenario())
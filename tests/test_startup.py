@@ -0,0 +1,10 @@
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPT = Path(__file__).parent.parent / 'scripts' / 'check_startup.py'
+
+
+def test_startup_import_time_within_budget():
+    result = subprocess.run([sys.executable, str(SCRIPT)], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr